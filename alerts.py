@@ -0,0 +1,189 @@
+import os
+import subprocess
+import time
+
+import numpy as np
+
+from collector import SERIES
+
+LEVEL = 'level'
+RATE = 'rate'
+PROCESS = 'process'
+PROCESS_FIELDS = ('cpu_percent', 'memory_percent', 'memory_mb')
+
+
+def default_rules(settings):
+    rules = []
+    for name in ('cpu', 'memory', 'disk'):
+        threshold = settings[f'{name}_alert']
+        rules.append({
+            'name': name,
+            'kind': LEVEL,
+            'series': f'{name}_percent',
+            'above': threshold,
+            'clear': threshold - settings['alert_hysteresis'],
+            'seconds': settings['alert_sustain_s']
+        })
+    return rules + list(settings['alert_rules'])
+
+
+class AlertEngine:
+    def __init__(self, rules, series=SERIES):
+        self.series = list(series)
+        self.set_rules(rules)
+
+    def set_rules(self, rules):
+        # Rules naming an unknown series or field come from a hand-edited settings.json and are skipped.
+        self.metric_rules = [rule for rule in rules
+                             if rule.get('kind') in (LEVEL, RATE) and rule.get('series') in self.series]
+        self.process_rules = [rule for rule in rules
+                              if rule.get('kind') == PROCESS and rule.get('field') in PROCESS_FIELDS]
+
+        rules = self.metric_rules
+        self.columns = np.array([self.series.index(rule['series']) for rule in rules], dtype=int)
+        self.above = np.array([rule['above'] for rule in rules], dtype=float)
+        self.clear = np.array([rule.get('clear', rule['above']) for rule in rules], dtype=float)
+        self.seconds = np.array([rule.get('seconds', 0) for rule in rules], dtype=float)
+        self.is_rate = np.array([rule['kind'] == RATE for rule in rules], dtype=bool)
+        self.active = np.zeros(len(rules), dtype=bool)
+
+        self.process_pending = {}
+        self.process_active = set()
+
+    def evaluate(self, store):
+        if not self.metric_rules or store.latest_time is None:
+            return []
+        now = store.latest_time
+        tier = store.tiers[0]
+        times, mins, avgs, maxs = tier.window(now - self.seconds.max() - tier.resolution)
+        if not len(times):
+            return []
+
+        # One column per rule: every rule is evaluated at once over the finest tier.
+        starts = now - self.seconds
+        in_window = times[:, None] > starts[None, :] - tier.resolution
+        sustained = np.where(in_window, mins[:, self.columns], np.inf).min(axis=0)
+        covered = times[0] <= starts - tier.resolution
+
+        latest = avgs[-1, self.columns]
+        first = np.minimum(np.searchsorted(times, starts - tier.resolution), len(times) - 1)
+        elapsed = times[-1] - times[first]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(elapsed > 0, (latest - avgs[first, self.columns]) / elapsed, 0.0)
+
+        value = np.where(self.is_rate, rate, sustained)
+        current = np.where(self.is_rate, rate, latest)
+        trigger = covered & (value > self.above)
+        fired = trigger & ~self.active
+        self.active = np.where(self.active, current >= self.clear, trigger)
+
+        return [{
+            'rule': self.metric_rules[index],
+            'key': self.metric_rules[index]['name'],
+            'time': now,
+            'value': float(current[index])
+        } for index in np.flatnonzero(fired)]
+
+    def evaluate_processes(self, processes, now=None):
+        if not self.process_rules:
+            return []
+        now = now if now is not None else time.time()
+        names = [proc['name'].lower() for proc in processes]
+        columns = {}
+        alerts = []
+        pending = {}
+        active = set()
+
+        for index, rule in enumerate(self.process_rules):
+            field = rule['field']
+            if field not in columns:
+                columns[field] = np.array([proc[field] or 0 for proc in processes], dtype=float)
+            values = columns[field]
+            candidates = values > min(rule['above'], rule.get('clear', rule['above']))
+            if rule.get('match'):
+                match = rule['match'].lower()
+                candidates &= np.array([match in name for name in names], dtype=bool)
+
+            for row in np.flatnonzero(candidates):
+                proc = processes[row]
+                # With the start time in the key, a reused PID starts with no pending time, state or cooldown.
+                key = (index, proc['pid'], proc.get('create_time'))
+                if key in self.process_active and values[row] >= rule.get('clear', rule['above']):
+                    active.add(key)
+                    continue
+                if values[row] <= rule['above']:
+                    continue
+                since = pending[key] = self.process_pending.get(key, now)
+                if now - since >= rule.get('seconds', 0):
+                    active.add(key)
+                    alerts.append({
+                        'rule': rule,
+                        'key': f"{rule['name']}:{proc['pid']}:{proc.get('create_time')}",
+                        'time': now,
+                        'value': float(values[row]),
+                        'pid': proc['pid'],
+                        'process': proc['name']
+                    })
+
+        self.process_pending = {key: since for key, since in pending.items() if key not in active}
+        self.process_active = active
+        return alerts
+
+
+class AlertSink:
+    def __init__(self, log_path='', command='', cooldown=60):
+        self.log_path = log_path
+        self.command = command
+        self.cooldown = cooldown
+        # (rule name, key) -> when the cooldown that started with its last report ends.
+        self.quiet_until = {}
+        self.pruned = 0.0
+        self.suppressed = 0
+        self.children = []
+
+    def deliver(self, alert, message):
+        now = time.monotonic()
+        rule = alert['rule']
+        cooldown = rule.get('cooldown', self.cooldown)
+        # A flapping key is reported once per cooldown; other keys of the same rule, such as a second
+        # process crossing it, are reported on their own.
+        key = (rule['name'], alert['key'])
+        if now < self.quiet_until.get(key, now):
+            self.suppressed += 1
+            return False
+        self.quiet_until[key] = now + cooldown
+        if now - self.pruned >= self.cooldown:
+            self.prune(now)
+
+        if self.log_path:
+            try:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alert['time']))
+                    f.write(f"{stamp}\t{rule['name']}\t{alert['value']:.1f}\t{message}\n")
+            except OSError:
+                pass
+
+        if self.command:
+            self.run_command(alert, message)
+        return True
+
+    def prune(self, now):
+        # Keys of exited processes would otherwise pile up.
+        self.pruned = now
+        self.quiet_until = {key: until for key, until in self.quiet_until.items() if until > now}
+
+    def run_command(self, alert, message):
+        self.children = [child for child in self.children if child.poll() is None]
+        env = dict(os.environ)
+        env.update({
+            'ALERT_RULE': alert['rule']['name'],
+            'ALERT_VALUE': f"{alert['value']:.1f}",
+            'ALERT_MESSAGE': message,
+            'ALERT_PID': str(alert.get('pid', ''))
+        })
+        try:
+            self.children.append(subprocess.Popen(
+                self.command, shell=True, env=env,
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        except OSError:
+            pass
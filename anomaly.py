@@ -0,0 +1,176 @@
+import numpy as np
+
+CPU = 'cpu'
+MEMORY = 'memory'
+LEAK = 'leak'
+
+
+class StreamingDetector:
+    def __init__(self, floors, halflife=300.0, threshold=4.0, warmup=20, capacity=64,
+                 leak_column=None, leak_seconds=600.0, leak_steps=4, leak_rate=0.5):
+        # floors: per column, the smallest deviation that counts as one standard deviation,
+        # so a series that has been perfectly flat does not flag its first wiggle.
+        self.floors = np.asarray(floors, dtype=float)
+        self.width = len(self.floors)
+        self.halflife = halflife
+        self.threshold = threshold
+        self.warmup = warmup
+        self.leak_column = leak_column
+        self.leak_step = leak_seconds / leak_steps
+        self.leak_steps = leak_steps
+        self.leak_rate = leak_rate
+        self.slots = {}
+        self.keys = []
+        self.free = []
+        self.tick = 0
+        self.capacity = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        def resize(array, fill):
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        if not self.capacity:
+            self.mean = np.zeros((0, self.width))
+            self.variance = np.zeros((0, self.width))
+            self.count = np.zeros(0, dtype=np.int64)
+            self.last_time = np.zeros(0)
+            self.seen = np.zeros(0, dtype=np.int64)
+            self.step_start = np.zeros(0)
+            self.step_min = np.zeros(0)
+            self.previous_min = np.zeros(0)
+            self.rising = np.zeros(0, dtype=np.int64)
+        self.mean = resize(self.mean, 0.0)
+        self.variance = resize(self.variance, 0.0)
+        self.count = resize(self.count, 0)
+        self.last_time = resize(self.last_time, np.nan)
+        self.seen = resize(self.seen, -1)
+        self.step_start = resize(self.step_start, np.nan)
+        self.step_min = resize(self.step_min, np.nan)
+        self.previous_min = resize(self.previous_min, np.nan)
+        self.rising = resize(self.rising, 0)
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.keys.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def reset(self, slots):
+        self.count[slots] = 0
+        self.last_time[slots] = np.nan
+        self.step_start[slots] = np.nan
+        self.step_min[slots] = np.nan
+        self.previous_min[slots] = np.nan
+        self.rising[slots] = 0
+
+    def lookup(self, keys):
+        self.tick += 1
+        slots = np.empty(len(keys), dtype=np.int64)
+        new = []
+        get = self.slots.get
+        for row, key in enumerate(keys):
+            slot = get(key)
+            if slot is None:
+                new.append(row)
+            else:
+                slots[row] = slot
+        if len(new) > len(self.free):
+            self.grow(max(self.capacity * 2, self.capacity + len(new) - len(self.free)))
+        for row in new:
+            slot = self.free.pop()
+            self.slots[keys[row]] = slot
+            self.keys[slot] = keys[row]
+            slots[row] = slot
+        self.reset(slots[new])
+        self.seen[slots] = self.tick
+        return slots
+
+    def sweep(self):
+        # Series missing from the latest update (exited processes) give their slots back.
+        stale = np.flatnonzero((self.seen >= 0) & (self.seen < self.tick))
+        for slot in stale:
+            del self.slots[self.keys[slot]]
+            self.keys[slot] = None
+            self.free.append(int(slot))
+        self.seen[stale] = -1
+
+    def update(self, keys, values, now, sweep=True):
+        slots = self.lookup(keys)
+        if sweep:
+            self.sweep()
+        values = np.asarray(values, dtype=float).reshape(len(slots), self.width)
+        mean = self.mean[slots]
+        variance = self.variance[slots]
+        count = self.count[slots]
+
+        # The decay follows elapsed time, so a series sampled less often while hidden keeps the same memory.
+        elapsed = now - self.last_time[slots]
+        alpha = np.where(count > 0, -np.expm1(-np.log(2) * np.nan_to_num(elapsed) / self.halflife), 1.0)[:, None]
+        scale = np.maximum(np.sqrt(variance), self.floors)
+        deviation = values - mean
+        scores = np.where(count[:, None] >= self.warmup, deviation / scale, 0.0)
+
+        # Winsorized update: a spike moves the baseline by at most `threshold` deviations,
+        # so it can't hide itself or the next one, while a lasting level shift is still absorbed.
+        limit = self.threshold * scale
+        deviation = np.clip(deviation, -limit, limit)
+        first = count == 0
+        mean = np.where(first[:, None], values, mean + alpha * deviation)
+        variance = np.where(first[:, None], 0.0, (1 - alpha) * (variance + alpha * deviation * deviation))
+        self.mean[slots] = mean
+        self.variance[slots] = variance
+        self.count[slots] = count + 1
+        self.last_time[slots] = now
+
+        leaking = self.track_leaks(slots, values[:, self.leak_column], now) if self.leak_column is not None else None
+        return scores, leaking
+
+    def track_leaks(self, slots, values, now):
+        # The RSS minimum of each step is compared with the previous step's: garbage-collector
+        # sawtooth and one-off allocations raise at most one step, a leak raises all of them.
+        step_start = self.step_start[slots]
+        step_min = np.fmin(self.step_min[slots], values)
+        step_start = np.where(np.isnan(step_start), now, step_start)
+        ended = now - step_start >= self.leak_step
+        previous = self.previous_min[slots]
+        with np.errstate(invalid='ignore'):
+            slope = (step_min - previous) / (now - step_start) * 60
+            rising = np.where(slope >= self.leak_rate, self.rising[slots] + 1, 0)
+        self.rising[slots] = np.where(ended, rising, self.rising[slots])
+        self.previous_min[slots] = np.where(ended, step_min, previous)
+        self.step_min[slots] = np.where(ended, values, step_min)
+        self.step_start[slots] = np.where(ended, now, step_start)
+        return self.rising[slots] >= self.leak_steps
+
+
+class MetricAnomalies:
+    def __init__(self, series, threshold=4.0, halflife=300.0):
+        self.series = list(series)
+        # Percentages are compared in points; KB/s rates on a log scale, where a doubling is a doubling at any load.
+        self.rates = np.array([not name.endswith('_percent') for name in self.series])
+        floors = np.where(self.rates, 0.5, 2.0)
+        self.detector = StreamingDetector(floors, halflife, threshold, capacity=1)
+
+    def update(self, sample):
+        values = np.array([sample[name] for name in self.series], dtype=float)
+        values = np.where(self.rates, np.log1p(np.maximum(values, 0)), values)
+        scores, _ = self.detector.update(['host'], values, sample['time'], sweep=False)
+        # Only upward moves are anomalies here: a resource suddenly going idle is not a problem.
+        return scores[0] > self.detector.threshold
+
+
+class ProcessAnomalies:
+    def __init__(self, threshold=4.0, halflife=300.0, leak_seconds=600.0, leak_rate=0.5):
+        # Columns: CPU % and RSS MB. The leak check watches RSS.
+        self.detector = StreamingDetector((5.0, 16.0), halflife, threshold, capacity=1024,
+                                          leak_column=1, leak_seconds=leak_seconds, leak_rate=leak_rate)
+
+    def update(self, processes, now):
+        keys = [(proc['pid'], proc.get('create_time')) for proc in processes]
+        values = np.array([(proc['cpu_percent'] or 0, proc['memory_mb'] or 0) for proc in processes],
+                          dtype=float).reshape(len(processes), 2)
+        scores, leaking = self.detector.update(keys, values, now)
+        flagged = scores > self.detector.threshold
+        for row in np.flatnonzero(leaking | flagged.any(axis=1)):
+            proc = processes[row]
+            proc['anomaly'] = LEAK if leaking[row] else CPU if flagged[row, 0] else MEMORY
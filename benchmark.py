@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+NAMES = [
+    'chrome.exe', 'firefox.exe', 'code.exe', 'slack.exe', 'spotify.exe', 'telegram.exe',
+    'python', 'bash', 'sshd', 'postgres', 'nginx', 'java', 'node', 'systemd', 'dockerd'
+]
+USERS = ['root', 'build', 'www-data', 'postgres', 'alice']
+SERIES_RANGES = {
+    'cpu_percent': 100,
+    'memory_percent': 100,
+    'disk_percent': 100,
+    'bytes_sent': 5000,
+    'bytes_recv': 5000
+}
+
+
+class SyntheticProcessBackend:
+    name = 'synthetic'
+
+    def __init__(self, count, churn=0.0, seed=0):
+        self.random = random.Random(seed)
+        self.count = count
+        self.churn = churn
+        self.next_pid = 1000
+        self.processes = [self.spawn() for _ in range(count)]
+
+    def spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        # Parents are drawn from earlier PIDs, so the synthetic tree has realistic depth and fan-out.
+        ppid = self.random.randrange(max(1000, pid - 500), pid) if pid > 1000 else 1
+        name = self.random.choice(NAMES)
+        if self.random.random() < 0.5:
+            name = f"{name}-{pid % 997}"
+        memory_mb = self.random.lognormvariate(3, 1.2)
+        return {
+            'pid': pid,
+            'create_time': 1700000000.0 + pid,
+            'name': name,
+            'cmdline': f"/usr/bin/{name} --worker {self.random.randrange(64)} --port {8000 + pid % 101}",
+            'user': self.random.choice(USERS),
+            'ppid': ppid,
+            'status': 'sleeping',
+            'cpu_percent': 0.0,
+            'memory_percent': memory_mb / 16384 * 100,
+            'memory_mb': memory_mb,
+            'io_bytes': 0
+        }
+
+    def scan(self):
+        for _ in range(int(self.count * self.churn)):
+            self.processes[self.random.randrange(self.count)] = self.spawn()
+
+        results = []
+        for proc in self.processes:
+            proc['cpu_percent'] = round(self.random.expovariate(2.0), 1)
+            proc['status'] = 'running' if proc['cpu_percent'] > 1 else 'sleeping'
+            proc['io_bytes'] += self.random.randrange(0, 65536)
+            results.append(dict(proc))
+        return results
+
+
+class SyntheticSamples:
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.time = time.time()
+
+    def next(self):
+        self.time += 1
+        sample = {name: self.random.uniform(0, limit) for name, limit in SERIES_RANGES.items()}
+        sample['time'] = self.time
+        return sample
+
+
+def measure(call, iterations, prepare=None):
+    timings = []
+    for _ in range(iterations):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+
+    # Peak memory is taken in a separate, shorter pass so tracing doesn't distort the latencies.
+    tracemalloc.start()
+    for _ in range(min(iterations, 3)):
+        if prepare:
+            prepare()
+        tracemalloc.reset_peak()
+        call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'peak_kb': peak / 1024
+    }
+
+
+def create_snapshot(count, churn, seed):
+    from collector import ProcessSnapshot
+    from process_history import ProcessHistory, WINDOWS
+    history = ProcessHistory(16 << 30, points=max(WINDOWS) // 3)
+    snapshot = ProcessSnapshot(3.0, 'psutil', history)
+    snapshot.backend = SyntheticProcessBackend(count, churn, seed)
+    return snapshot
+
+
+def bench_headless(count, args):
+    snapshot = create_snapshot(count, args.churn, args.seed)
+    snapshot.refresh()
+    results = {'refresh_processes': measure(snapshot.refresh, args.iterations)}
+    snapshot.window = 300
+    results['refresh_processes_windowed'] = measure(snapshot.refresh, args.iterations)
+    return results
+
+
+def create_monitor():
+    import matplotlib
+    matplotlib.use('Agg')
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return None, str(e)
+    root.withdraw()
+    from gui import SystemMonitor
+    app = SystemMonitor(root, overrides={'history_enabled': False, 'aggregator_listen': ''})
+    app.setup_applications_tab()
+    app.setup_processes_tab()
+    # Counts as the first paint, so the real process scanner is never started, and caches the blit backgrounds.
+    app.first_paint_done = True
+    app.canvas.draw()
+    root.update()
+    return app, None
+
+
+def bench_gui(app, count, args):
+    root = app.root
+    samples = SyntheticSamples(args.seed)
+    app.process_snapshot = create_snapshot(count, args.churn, args.seed)
+    app.applications_cache = (None, None, [])
+    app.process_snapshot.refresh()
+
+    def push_sample():
+        app.collector.samples.put(samples.next())
+
+    def rescan():
+        app.process_snapshot.refresh()
+
+    def idle(call):
+        def run():
+            call()
+            root.update_idletasks()
+        return run
+
+    return {
+        'update_data': measure(idle(app.update_data), args.iterations, push_sample),
+        'update_plot': measure(idle(app.update_plot), args.iterations, push_sample),
+        'get_processes': measure(app.get_processes, args.iterations, rescan),
+        'filter_applications': measure(idle(app.filter_applications), args.iterations, rescan),
+        'filter_processes': measure(idle(app.filter_processes), args.iterations, rescan)
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in sorted(results.items()):
+        before = baseline.get(key)
+        if not before:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  REGRESSION'
+            regressions.append(key)
+        print(f"{key:<40}{before['p50_ms']:10.2f} ->{result['p50_ms']:10.2f} ms  x{ratio:.2f}{marker}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the monitor's hot paths against synthetic processes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                        help="process counts to simulate")
+    parser.add_argument('--churn', type=float, default=0.05,
+                        help="fraction of processes replaced by new PIDs on every scan")
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-gui', action='store_true',
+                        help="skip the paths that need a Tk root")
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', default=None,
+                        help="earlier --output file to compare p50 latencies against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="p50 slowdown, as a fraction, reported as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    # The monitor reads and writes settings.json in the working directory; keep the user's untouched.
+    os.chdir(tempfile.mkdtemp(prefix='monitor-bench-'))
+
+    app, gui_error = (None, "disabled with --no-gui") if args.no_gui else create_monitor()
+    if gui_error:
+        print(f"GUI paths skipped: {gui_error}", file=sys.stderr)
+
+    results = {}
+    for count in args.sizes:
+        measured = bench_headless(count, args)
+        if app:
+            measured.update(bench_gui(app, count, args))
+        for name, result in measured.items():
+            key = f"{name}@{count}"
+            results[key] = result
+            print(f"{key:<40}p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms  "
+                  f"peak {result['peak_kb']:10.0f} KB")
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'churn': args.churn,
+            'seed': args.seed,
+            'gui': app is not None
+        },
+        'results': results
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    status = 0
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            status = 1
+
+    if app:
+        app.root.destroy()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+# CPU samples kept per cgroup for the chart: 15 minutes at the default 3 s scan interval.
+HISTORY_POINTS = 300
+# cgroup files are a few lines; io.stat has one line per device.
+READ_SIZE = 65536
+# Each cgroup directory holds dozens of files, so the tree is listed again only this often, or as soon
+# as a process turns up in a cgroup that isn't known yet.
+WALK_INTERVAL = 30.0
+
+
+def is_cgroup2(root):
+    # Only the unified hierarchy has cgroup.controllers at its root; v1 and hybrid-only mounts are not supported.
+    return os.path.exists(os.path.join(root, 'cgroup.controllers'))
+
+
+def read_file(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, READ_SIZE)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def parse_usage(data):
+    # cpu.stat starts with "usage_usec N"; the cpu controller adds the throttling lines after it.
+    fields = data.split(None, 2)
+    return int(fields[1]) if len(fields) > 1 and fields[0] == b'usage_usec' else None
+
+
+def parse_io(data):
+    # One line per device: "8:0 rbytes=... wbytes=... rios=... wios=... dbytes=... dios=...".
+    total = 0
+    for field in data.split():
+        if field.startswith((b'rbytes=', b'wbytes=')):
+            total += int(field[7:])
+    return total
+
+
+def parse_int(data):
+    try:
+        return int(data)
+    except ValueError:
+        return None
+
+
+def cgroup_name(path):
+    return path.rsplit('/', 1)[1] or path
+
+
+class CgroupCollector:
+    def __init__(self, root=CGROUP_ROOT, proc_root='/proc', points=HISTORY_POINTS, capacity=256):
+        self.root = root.rstrip('/')
+        self.proc_root = proc_root
+        self.points = points
+        # Held while the slots and history change; the UI thread takes it to read the chart history.
+        self.lock = threading.Lock()
+        # (path, inode) -> slot; the inode tells a recreated cgroup from the one that had its name.
+        self.slots = {}
+        self.paths = {}
+        self.free = []
+        self.capacity = 0
+        # (pid, create_time) -> (cgroup path, process name), read once per process.
+        self.membership = {}
+        self.tree = None
+        self.walked = None
+        # Paths processes report that aren't under the root, as with a cgroup namespace or a subtree as root.
+        self.outside = set()
+        self.times = np.full(points, np.nan)
+        self.position = 0
+        # Replaced, never mutated, once published.
+        self.records = []
+        self.elapsed = 0.0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        def resize(array, fill):
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        if not self.capacity:
+            self.usage = np.zeros(0)
+            self.io = np.zeros(0)
+            self.last_time = np.zeros(0)
+            self.history = np.zeros((0, self.points), dtype=np.float32)
+        self.usage = resize(self.usage, np.nan)
+        self.io = resize(self.io, np.nan)
+        self.last_time = resize(self.last_time, np.nan)
+        self.history = resize(self.history, np.nan)
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def walk(self):
+        # Every cgroup as (path, inode), with paths written as in /proc/<pid>/cgroup. The root comes first:
+        # its cpu.stat and io.stat are the totals for the whole host.
+        try:
+            found = [('/', os.stat(self.root or '/').st_ino)]
+        except OSError:
+            found = []
+        stack = ['']
+        while stack:
+            relative = stack.pop()
+            try:
+                with os.scandir(self.root + relative) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            path = f"{relative}/{entry.name}"
+                            found.append((path, entry.inode()))
+                            stack.append(path)
+            except OSError:
+                continue
+        return found
+
+    def read_membership(self, pid):
+        data = read_file(f"{self.proc_root}/{pid}/cgroup")
+        for line in (data or b'').split(b'\n'):
+            # The unified hierarchy is the "0::" line; hybrid systems list their v1 controllers too.
+            if line.startswith(b'0::'):
+                return line[3:].decode('utf-8', 'replace')
+        return ''
+
+    def assign(self, processes, current):
+        membership = {}
+        members = Counter()
+        for proc in processes:
+            key = (proc['pid'], proc.get('create_time'))
+            path, name = self.membership.get(key, (None, None))
+            # systemd and container runtimes move a process between fork and exec, so it is read again
+            # once its name changes, or once the cgroup it was in is gone.
+            if path is None or name != proc['name'] or path and path not in current:
+                path = self.read_membership(proc['pid'])
+            membership[key] = (path, proc['name'])
+            proc['cgroup'] = path
+            members[path] += 1
+        self.membership = membership
+        return members
+
+    def update(self, processes, now):
+        started = time.perf_counter()
+        if self.tree is None or now - self.walked >= WALK_INTERVAL:
+            self.tree = self.walk()
+            self.walked = now
+            self.outside = set()
+        current = {'/', ''} | {path for path, _ in self.tree}
+        members = self.assign(processes, current | self.outside)
+        unknown = set(members) - current - self.outside
+        if unknown:
+            self.tree = self.walk()
+            self.walked = now
+            self.outside |= unknown - {path for path, _ in self.tree}
+
+        # One pass over all cgroups; files a controller doesn't provide read as missing.
+        cgroups = []
+        usage = []
+        io = []
+        memory = []
+        tasks = []
+        for key in self.tree:
+            directory = self.root + key[0].rstrip('/')
+            data = read_file(directory + '/cpu.stat')
+            if data is None:
+                # cpu.stat is a core file every cgroup has, so the cgroup was removed since the last walk.
+                continue
+            cgroups.append(key)
+            value = parse_usage(data)
+            usage.append(np.nan if value is None else value)
+            data = read_file(directory + '/io.stat')
+            io.append(np.nan if data is None else parse_io(data))
+            data = read_file(directory + '/memory.current')
+            memory.append(parse_int(data) if data else None)
+            data = read_file(directory + '/pids.current')
+            tasks.append(parse_int(data) if data else None)
+
+        if len(cgroups) < len(self.tree):
+            self.tree = cgroups
+        usage = np.array(usage, dtype=float)
+        io = np.array(io, dtype=float)
+
+        with self.lock:
+            alive = set(cgroups)
+            for key in [key for key in self.slots if key not in alive]:
+                slot = self.slots.pop(key)
+                self.usage[slot] = self.io[slot] = self.last_time[slot] = np.nan
+                self.history[slot] = np.nan
+                self.free.append(slot)
+            new = [key for key in cgroups if key not in self.slots]
+            if len(new) > len(self.free):
+                self.grow(max(self.capacity * 2, self.capacity + len(new) - len(self.free)))
+            for key in new:
+                self.slots[key] = self.free.pop()
+            slots = np.array([self.slots[key] for key in cgroups], dtype=np.int64)
+
+            # Counters are cumulative, so rates come from the previous pass; a new cgroup has none yet.
+            elapsed = now - self.last_time[slots]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cpu = (usage - self.usage[slots]) / elapsed / 1e4
+                io_rate = (io - self.io[slots]) / elapsed / 1024
+                # A cgroup recreated under the same name between walks starts its counters again.
+                cpu[cpu < 0] = np.nan
+                io_rate[io_rate < 0] = np.nan
+            self.usage[slots] = usage
+            self.io[slots] = io
+            self.last_time[slots] = now
+            self.history[:, self.position] = np.nan
+            self.history[slots, self.position] = cpu
+            self.times[self.position] = now
+            self.position = (self.position + 1) % self.points
+            self.paths = {path: int(slot) for (path, _), slot in zip(cgroups, slots)}
+
+        self.records = [
+            {
+                'path': path,
+                'name': cgroup_name(path),
+                'cpu_percent': None if np.isnan(cpu_percent) else round(float(cpu_percent), 1),
+                'memory_mb': None if memory_bytes is None else memory_bytes / 1024 / 1024,
+                'io_rate': None if np.isnan(rate) else float(rate),
+                'tasks': task_count,
+                'processes': members.get(path, 0)
+            }
+            for (path, _), cpu_percent, memory_bytes, rate, task_count in zip(cgroups, cpu, memory, io_rate, tasks)
+        ]
+        self.elapsed = time.perf_counter() - started
+
+    def history_window(self, paths):
+        # CPU % of the given cgroups over the kept samples, oldest first: (times, values[time, cgroup]).
+        with self.lock:
+            order = (self.position + np.arange(self.points)) % self.points
+            order = order[~np.isnan(self.times[order])]
+            slots = [self.paths.get(path) for path in paths]
+            values = np.full((len(order), len(paths)), np.nan, dtype=np.float32)
+            for column, slot in enumerate(slots):
+                if slot is not None:
+                    values[:, column] = self.history[slot, order]
+            return self.times[order], values
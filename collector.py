@@ -0,0 +1,381 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+import psutil
+
+from scheduler import SLACK, series_moved
+
+SERIES = ('cpu_percent', 'memory_percent', 'disk_percent', 'bytes_sent', 'bytes_recv')
+# Loop and RAM block devices only add noise rows to the per-disk view.
+IGNORED_DISKS = ('loop', 'ram', 'zram')
+
+log = logging.getLogger(__name__)
+
+
+def counter_rates(current, previous, fields, elapsed):
+    rates = {}
+    for name, counters in current.items():
+        last = previous.get(name)
+        if last is None:
+            rates[name] = 0.0
+            continue
+        delta = sum(getattr(counters, field) - getattr(last, field) for field in fields)
+        rates[name] = max(delta, 0) / elapsed / 1024
+    return rates
+
+
+class MetricsCollector(threading.Thread):
+    def __init__(self, settings, interval=1.0, scheduler=None):
+        super().__init__(name="MetricsCollector", daemon=True)
+        self.settings = settings
+        self.interval = interval
+        self.scheduler = scheduler
+        self.samples = queue.SimpleQueue()
+        self.history = None
+        self.missed_ticks = 0
+        self.last_sample = None
+        self.last_devices = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+
+        # The first non-blocking call only primes psutil's internal counters.
+        psutil.cpu_percent(interval=None, percpu=True)
+        self.prime_counters()
+
+    def prime_counters(self):
+        self.last_net_io = psutil.net_io_counters(pernic=True)
+        self.last_disk_io = self.disk_counters()
+        self.last_sample_time = self.last_disk_time = time.monotonic()
+
+    def disk_counters(self):
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except (OSError, RuntimeError):
+            return {}
+        return {name: value for name, value in counters.items() if not name.startswith(IGNORED_DISKS)}
+
+    def sample(self, devices=True):
+        now = time.monotonic()
+        # One per-core call; the aggregate is their mean rather than a second, separately primed call.
+        cores = psutil.cpu_percent(interval=None, percpu=True)
+        cpu_percent = round(sum(cores) / len(cores), 1)
+        memory_percent = psutil.virtual_memory().percent
+
+        try:
+            disk_percent = psutil.disk_usage(self.settings['selected_disk']).percent
+        except OSError:
+            disk_percent = 0
+
+        net_io = psutil.net_io_counters(pernic=True)
+        time_diff = max(now - self.last_sample_time, 1e-3)
+        sent = counter_rates(net_io, self.last_net_io, ('bytes_sent',), time_diff)
+        received = counter_rates(net_io, self.last_net_io, ('bytes_recv',), time_diff)
+        self.last_net_io = net_io
+        self.last_sample_time = now
+
+        sample = {
+            'time': time.time(),
+            'cpu_percent': cpu_percent,
+            'memory_percent': memory_percent,
+            'disk_percent': disk_percent,
+            'bytes_sent': sum(sent.values()),
+            'bytes_recv': sum(received.values())
+        }
+        if devices:
+            # Per-disk counters are only read when the per-device view is due; their rate spans the gap.
+            disk_io = self.disk_counters()
+            disks = counter_rates(disk_io, self.last_disk_io, ('read_bytes', 'write_bytes'),
+                                  max(now - self.last_disk_time, 1e-3))
+            self.last_disk_io = disk_io
+            self.last_disk_time = now
+            sample['cores'] = cores
+            sample['disks'] = disks
+            sample['nics'] = {name: sent[name] + received[name] for name in net_io}
+        return sample
+
+    def run(self):
+        try:
+            self.sample_loop()
+        finally:
+            if self.history:
+                self.history.close()
+
+    def record(self, sample):
+        try:
+            self.history.append_sample(sample)
+        except OSError:
+            # A full or read-only disk must not stop live monitoring.
+            self.history = None
+
+    def sample_loop(self):
+        next_tick = time.monotonic()
+        while not self.stop_event.is_set():
+            if not self.resume_event.is_set():
+                self.resume_event.wait(0.5)
+                next_tick = time.monotonic()
+                continue
+
+            devices = self.scheduler is None or self.scheduler.due('devices', next_tick)
+            try:
+                sample = self.sample(devices)
+            except (psutil.Error, OSError):
+                # A failed read skips one tick; the thread must keep feeding the window and headless output.
+                log.exception("Sampling system metrics failed")
+                interval = self.interval
+            else:
+                self.samples.put(sample)
+                if self.history:
+                    self.record(sample)
+                interval = self.next_interval(sample, devices, next_tick)
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                self.missed_ticks += int(-delay // interval) + 1
+                next_tick = time.monotonic()
+                delay = 0
+            if self.wake_event.wait(delay):
+                self.wake_event.clear()
+                next_tick = time.monotonic()
+
+    def next_interval(self, sample, devices, now):
+        scheduler = self.scheduler
+        if scheduler is None:
+            return self.interval
+
+        values = {name: sample[name] for name in SERIES}
+        scheduler.observe('metrics', self.last_sample is None or series_moved(values, self.last_sample))
+        self.last_sample = values
+        scheduler.schedule('metrics', now)
+        if devices:
+            values = {str(core): value for core, value in enumerate(sample['cores'])}
+            values.update(sample['disks'])
+            values.update(sample['nics'])
+            scheduler.observe('devices', self.last_devices is None or series_moved(values, self.last_devices))
+            self.last_devices = values
+            scheduler.schedule('devices', now)
+        # The next tick is whichever group is due first; devices ride along on metric ticks.
+        return max(scheduler.next_due(('metrics', 'devices')) - now, SLACK)
+
+    def wake(self):
+        self.wake_event.set()
+
+    def drain(self):
+        samples = []
+        while True:
+            try:
+                samples.append(self.samples.get_nowait())
+            except queue.Empty:
+                return samples
+
+    def pause(self):
+        self.resume_event.clear()
+
+    def resume(self):
+        # Skip the paused gap so the first rate after resuming isn't averaged over it.
+        self.prime_counters()
+        self.resume_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.resume_event.set()
+        self.wake_event.set()
+
+
+def started(handle):
+    # Process.create_time() is cached when the handle is made, so it never shows a reused PID. The platform
+    # value is read instead; on Linux it comes from the stat record as_dict just parsed under oneshot().
+    if psutil.LINUX:
+        return handle._proc._parse_stat_file()['create_time']
+    return handle._proc.create_time()
+
+
+def parent(handle):
+    # On POSIX Process.ppid() checks for a reused PID by building a second Process on every call; the pool
+    # already checks once per scan with started(), so the platform value is read directly.
+    return handle._proc.ppid() if psutil.POSIX else handle.ppid()
+
+
+class ProcessPool:
+    name = 'psutil'
+    attrs = ['name', 'status', 'cpu_percent', 'memory_percent', 'memory_info', 'io_counters']
+
+    def __init__(self):
+        self.handles = {}
+        # pid -> start time as read when the handle was made, to tell a reused PID.
+        self.started = {}
+        # (pid, create_time) -> (command line, owner)
+        self.details = {}
+
+    def get_details(self, key, handle):
+        # Command line and owner are read once per process, not on every scan.
+        details = self.details.get(key)
+        if details is None:
+            try:
+                details = (' '.join(handle.cmdline()), handle.username())
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                details = ('', '')
+            self.details[key] = details
+        return details
+
+    def open(self, pid):
+        handle = psutil.Process(pid)
+        # Prime the CPU counters so the next scan reports a real delta.
+        handle.cpu_percent(interval=None)
+        self.handles[pid] = handle
+        return handle
+
+    def read(self, handle):
+        with handle.oneshot():
+            info = handle.as_dict(self.attrs)
+            info['ppid'] = parent(handle)
+            return info, started(handle)
+
+    def scan(self):
+        pids = psutil.pids()
+        alive = set(pids)
+        for pid in [pid for pid in self.handles if pid not in alive]:
+            del self.handles[pid]
+            del self.started[pid]
+
+        results = []
+        keys = set()
+        for pid in pids:
+            try:
+                handle = self.handles.get(pid)
+                if handle is None:
+                    handle = self.open(pid)
+                    info, self.started[pid] = self.read(handle)
+                else:
+                    info, start = self.read(handle)
+                    if start != self.started[pid]:
+                        # Same PID, different start time: the old process exited and the PID was reused.
+                        handle = self.open(pid)
+                        info, self.started[pid] = self.read(handle)
+                create_time = handle.create_time()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self.handles.pop(pid, None)
+                self.started.pop(pid, None)
+                continue
+            key = (pid, create_time)
+            keys.add(key)
+            memory_info = info['memory_info']
+            io_counters = info['io_counters']
+            cmdline, user = self.get_details(key, handle)
+            results.append({
+                'pid': pid,
+                'create_time': create_time,
+                'name': info['name'] or '',
+                'cmdline': cmdline,
+                'user': user,
+                'ppid': info['ppid'],
+                'status': info['status'],
+                'cpu_percent': info['cpu_percent'],
+                'memory_percent': info['memory_percent'],
+                'memory_mb': memory_info.rss / 1024 / 1024 if memory_info else 0,
+                'io_bytes': io_counters.read_bytes + io_counters.write_bytes if io_counters else None
+            })
+        if len(self.details) > len(keys):
+            self.details = {key: self.details[key] for key in keys if key in self.details}
+        return results
+
+
+def create_process_backend(name='auto'):
+    if name in ('auto', 'procfs') and sys.platform.startswith('linux') and os.path.isdir('/proc'):
+        from procfs import ProcfsBackend
+        return ProcfsBackend()
+    return ProcessPool()
+
+
+class ProcessSnapshot(threading.Thread):
+    def __init__(self, ttl=3.0, backend='auto', history=None, scheduler=None, anomalies=None, enricher=None,
+                 index=None, cgroups=None):
+        super().__init__(name="ProcessSnapshot", daemon=True)
+        self.ttl = ttl
+        self.backend = create_process_backend(backend)
+        self.history = history
+        self.anomalies = anomalies
+        self.enricher = enricher
+        self.index = index
+        self.cgroups = cgroups
+        self.scheduler = scheduler
+        self.activity = None
+        self.moved = True
+        self.window = None
+        self.processes = []
+        self.window_processes = []
+        self.generation = 0
+        self.updated = None
+        self.scan_duration = None
+        self.stop_event = threading.Event()
+        self.refresh_event = threading.Event()
+
+    def scan(self):
+        return self.backend.scan()
+
+    def refresh(self):
+        started = time.perf_counter()
+        processes = self.scan()
+        now = time.time()
+        if self.enricher:
+            self.enricher.update(processes, now)
+        if self.cgroups:
+            self.cgroups.update(processes, now)
+        if self.history:
+            self.history.record(processes, now)
+            window = self.window
+            self.window_processes = self.history.window(window, now) if window else []
+        if self.anomalies:
+            self.anomalies.update(processes, now)
+        if self.index is not None and self.index.wanted:
+            self.index.update(processes)
+        self.scan_duration = time.perf_counter() - started
+        self.moved = self.track_activity(processes)
+        # Readers only ever see a complete list; it is replaced, never mutated.
+        self.processes = processes
+        self.updated = time.monotonic()
+        self.generation += 1
+
+    def track_activity(self, processes):
+        # Total CPU and the process count are a cheap proxy for "something changed" between scans.
+        activity = {'cpu_percent': sum(proc['cpu_percent'] or 0 for proc in processes), 'count': len(processes)}
+        moved = (self.activity is None or activity['count'] != self.activity['count']
+                 or abs(activity['cpu_percent'] - self.activity['cpu_percent']) >= 5.0)
+        self.activity = activity
+        return moved
+
+    def next_interval(self):
+        if self.scheduler is None:
+            return self.ttl
+        self.scheduler.observe('processes', self.moved)
+        return self.scheduler.interval('processes')
+
+    def get(self):
+        return self.processes
+
+    def age(self):
+        if self.updated is None:
+            return float('inf')
+        return time.monotonic() - self.updated
+
+    def request_refresh(self):
+        self.refresh_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.refresh_event.clear()
+            try:
+                self.refresh()
+            except (psutil.Error, OSError):
+                # The previous table stays published until a scan succeeds.
+                log.exception("Scanning processes failed")
+            self.refresh_event.wait(self.next_interval())
+
+    def stop(self):
+        self.stop_event.set()
+        self.refresh_event.set()
@@ -0,0 +1,115 @@
+import heapq
+import time
+
+import psutil
+
+# Each probe is one psutil call that fills one or more record fields; probes are refreshed independently.
+PROBES = {
+    'threads': lambda handle: {'threads': handle.num_threads()},
+    'fds': lambda handle: {'fds': handle.num_fds()},
+    'connections': lambda handle: {'connections': len(connections(handle))},
+    'memory_full': lambda handle: full_memory(handle.memory_full_info())
+}
+FIELDS = ('threads', 'fds', 'connections', 'uss_mb', 'pss_mb')
+
+
+def connections(handle):
+    # psutil 6 renamed Process.connections to net_connections.
+    if hasattr(handle, 'net_connections'):
+        return handle.net_connections(kind='inet')
+    return handle.connections(kind='inet')
+
+
+def full_memory(info):
+    return {
+        'uss_mb': info.uss / 1024 / 1024,
+        'pss_mb': info.pss / 1024 / 1024 if hasattr(info, 'pss') else None
+    }
+
+
+class Enricher:
+    def __init__(self, budget=0.03, max_age=10.0, top=20, probes=None):
+        self.budget = budget
+        self.max_age = max_age
+        self.top = top
+        self.probes = {name: PROBES[name] for name in probes or PROBES if name in PROBES}
+        if not hasattr(psutil.Process, 'num_fds'):
+            self.probes.pop('fds', None)
+        # (pid, create_time) -> {'handle': psutil.Process or None, 'values': {...}, 'times': {probe: time}}
+        self.cache = {}
+        self.cursor = 0
+        # Set by the UI thread; replaced, never mutated.
+        self.visible = ()
+        self.probed = 0
+        self.elapsed = 0.0
+
+    def handle(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = self.cache[key] = {'handle': None, 'values': {}, 'times': {}}
+            try:
+                handle = psutil.Process(key[0])
+                # The pid may have been reused since the scan; the probes must not describe another process.
+                if key[1] is None or abs(handle.create_time() - key[1]) < 1.0:
+                    entry['handle'] = handle
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return entry
+
+    def probe(self, key, now, deadline):
+        entry = self.cache.get(key)
+        times = entry['times'] if entry else {}
+        due = [name for name in self.probes if now - times.get(name, -float('inf')) >= self.max_age]
+        if not due:
+            return True
+        if time.perf_counter() >= deadline:
+            return False
+        entry = self.handle(key)
+        handle = entry['handle']
+        for name in due:
+            if time.perf_counter() >= deadline:
+                return False
+            probe = self.probes[name]
+            try:
+                entry['values'].update(probe(handle) if handle else {})
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                # Denied values stay unknown, but are not asked for again before max_age.
+                pass
+            entry['times'][name] = now
+            self.probed += 1
+        return True
+
+    def update(self, processes, now):
+        started = time.perf_counter()
+        deadline = started + self.budget
+        self.probed = 0
+        keys = [(proc['pid'], proc.get('create_time')) for proc in processes]
+        current = set(keys)
+        for key in [key for key in self.cache if key not in current]:
+            del self.cache[key]
+
+        # Rows on screen first, then the top consumers, then everyone else in turn. The cursor survives
+        # across ticks, so with a fixed budget every process is still refreshed eventually.
+        visible = [key for key in self.visible if key in current]
+        rows = range(len(processes))
+        top = [keys[row] for row in heapq.nlargest(self.top, rows, key=lambda row: processes[row]['cpu_percent'] or 0)
+               + heapq.nlargest(self.top, rows, key=lambda row: processes[row]['memory_mb'] or 0)]
+        done = True
+        for key in visible + top:
+            done = self.probe(key, now, deadline)
+            if not done:
+                break
+        count = len(keys)
+        if done and count:
+            self.cursor %= count
+            for _ in range(count):
+                if not self.probe(keys[self.cursor], now, deadline):
+                    break
+                self.cursor = (self.cursor + 1) % count
+
+        for proc, key in zip(processes, keys):
+            entry = self.cache.get(key)
+            if entry is not None and entry['times']:
+                proc.update(entry['values'])
+                proc['enriched'] = dict(entry['times'])
+        self.elapsed = time.perf_counter() - started
@@ -0,0 +1,374 @@
+import asyncio
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+from collector import SERIES, MetricsCollector, ProcessSnapshot
+from headless import FRAME_HEADER, encode_frame, encode_short_string
+
+PROTOCOL_VERSION = 1
+FRAME_HELLO = 3
+FRAME_METRICS_DELTA = 4
+FRAME_PROCESSES_DELTA = 5
+MAX_FRAME = 16 * 1024 * 1024
+
+METRICS_HEADER = struct.Struct('<dB')
+PROCESSES_HEADER = struct.Struct('<dII')
+PROCESS_UPSERT = struct.Struct('<IBfff')
+VALUE = struct.Struct('<f')
+PID = struct.Struct('<I')
+HAS_LABELS = 1
+
+# Samples held per agent between two UI drains; if the UI stalls, the oldest are dropped.
+MAX_PENDING_SAMPLES = 600
+
+# Remote hosts get a shallower history than the local one: 10 min at 1 s, 1 h at 10 s, 24 h at 1 min.
+REMOTE_TIERS = ((1, 600), (10, 360), (60, 1440))
+
+
+def parse_address(address, default_host='0.0.0.0'):
+    host, _, port = address.rpartition(':')
+    return host or default_host, int(port)
+
+
+def read_short_string(payload, offset):
+    length = payload[offset]
+    end = offset + 1 + length
+    return payload[offset + 1:end].decode('utf-8', 'replace'), end
+
+
+def encode_hello(hostname):
+    return encode_frame(FRAME_HELLO, bytes([PROTOCOL_VERSION]) + encode_short_string(hostname))
+
+
+def decode_hello(payload):
+    if payload[0] != PROTOCOL_VERSION:
+        raise ValueError(f"unsupported protocol version {payload[0]}")
+    hostname, _ = read_short_string(payload, 1)
+    return hostname
+
+
+class MetricsEncoder:
+    def __init__(self):
+        self.last = None
+
+    def encode(self, sample):
+        values = [VALUE.unpack(VALUE.pack(sample[name]))[0] for name in SERIES]
+        mask = 0
+        parts = []
+        for bit, value in enumerate(values):
+            if self.last is None or self.last[bit] != value:
+                mask |= 1 << bit
+                parts.append(VALUE.pack(value))
+        self.last = values
+        return encode_frame(FRAME_METRICS_DELTA, METRICS_HEADER.pack(sample['time'], mask) + b''.join(parts))
+
+
+class MetricsDecoder:
+    def __init__(self):
+        self.values = [0.0] * len(SERIES)
+
+    def decode(self, payload):
+        timestamp, mask = METRICS_HEADER.unpack_from(payload)
+        offset = METRICS_HEADER.size
+        for bit in range(len(SERIES)):
+            if mask & (1 << bit):
+                self.values[bit] = VALUE.unpack_from(payload, offset)[0]
+                offset += VALUE.size
+        sample = dict(zip(SERIES, self.values))
+        sample['time'] = timestamp
+        return sample
+
+
+class ProcessTableEncoder:
+    def __init__(self):
+        self.sent = {}
+
+    def encode(self, timestamp, processes):
+        current = {}
+        upserts = []
+        for proc in processes:
+            pid = proc['pid']
+            row = (
+                VALUE.unpack(VALUE.pack(proc['cpu_percent'] or 0))[0],
+                VALUE.unpack(VALUE.pack(proc['memory_percent'] or 0))[0],
+                VALUE.unpack(VALUE.pack(proc['memory_mb']))[0],
+                proc['name'],
+                proc['status']
+            )
+            current[pid] = row
+            previous = self.sent.get(pid)
+            if previous == row:
+                continue
+            labels = previous is None or previous[3:] != row[3:]
+            upsert = PROCESS_UPSERT.pack(pid, HAS_LABELS if labels else 0, *row[:3])
+            if labels:
+                upsert += encode_short_string(row[3]) + encode_short_string(row[4])
+            upserts.append(upsert)
+
+        removed = [pid for pid in self.sent if pid not in current]
+        self.sent = current
+        payload = [PROCESSES_HEADER.pack(timestamp, len(removed), len(upserts))]
+        payload.extend(PID.pack(pid) for pid in removed)
+        payload.extend(upserts)
+        return encode_frame(FRAME_PROCESSES_DELTA, b''.join(payload))
+
+
+class ProcessTableDecoder:
+    def __init__(self):
+        self.table = {}
+
+    def decode(self, payload):
+        timestamp, removed, upserts = PROCESSES_HEADER.unpack_from(payload)
+        offset = PROCESSES_HEADER.size
+        for _ in range(removed):
+            self.table.pop(PID.unpack_from(payload, offset)[0], None)
+            offset += PID.size
+        for _ in range(upserts):
+            pid, flags, cpu_percent, memory_percent, memory_mb = PROCESS_UPSERT.unpack_from(payload, offset)
+            offset += PROCESS_UPSERT.size
+            record = self.table.get(pid)
+            if flags & HAS_LABELS or record is None:
+                name, offset = read_short_string(payload, offset) if flags & HAS_LABELS else ('', offset)
+                status, offset = read_short_string(payload, offset) if flags & HAS_LABELS else ('', offset)
+            else:
+                name, status = record['name'], record['status']
+            # Records are replaced, never mutated, so a snapshot handed to the UI stays consistent.
+            self.table[pid] = {
+                'pid': pid,
+                'name': name,
+                'status': status,
+                'cpu_percent': cpu_percent,
+                'memory_percent': memory_percent,
+                'memory_mb': memory_mb
+            }
+        return timestamp, list(self.table.values())
+
+
+class FleetAggregator(threading.Thread):
+    def __init__(self, host='0.0.0.0', port=7878):
+        super().__init__(name="FleetAggregator", daemon=True)
+        self.host = host
+        self.port = port
+        # Per-host state not yet drained by the UI: bounded samples and only the newest process table,
+        # so a stalled UI can't make the aggregator buffer without limit.
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.dropped = 0
+        # Host keys of open connections; only touched on the event loop.
+        self.active = set()
+        self.ready = threading.Event()
+        self.error = None
+        self.loop = None
+        self.stop_future = None
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stop_future = self.loop.create_future()
+        server = await asyncio.start_server(self.handle_agent, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        async with server:
+            await self.stop_future
+
+    def host_key(self, hostname, peer):
+        # Two agents reporting the same name are kept apart by their address, so neither overwrites the
+        # other's history; a reconnecting agent gets its plain name, and its history, back.
+        key = hostname
+        if key in self.active and peer:
+            key = f"{hostname} ({peer[0]}:{peer[1]})"
+        suffix = 2
+        while key in self.active:
+            key = f"{hostname} ({suffix})"
+            suffix += 1
+        self.active.add(key)
+        return key
+
+    def push(self, key, kind, data=None):
+        with self.lock:
+            state = self.pending.get(key)
+            if state is None:
+                state = self.pending[key] = {'connected': None, 'opened': False, 'peer': None, 'processes': None,
+                                             'samples': deque(maxlen=MAX_PENDING_SAMPLES)}
+            if kind == 'connected':
+                state['connected'] = True
+                state['peer'] = data
+                state['opened'] = True
+            elif kind == 'disconnected':
+                state['connected'] = False
+            elif kind == 'metrics':
+                if len(state['samples']) == MAX_PENDING_SAMPLES:
+                    self.dropped += 1
+                state['samples'].append(data)
+            elif kind == 'processes':
+                state['processes'] = data
+
+    async def handle_agent(self, reader, writer):
+        key = None
+        metrics = MetricsDecoder()
+        processes = ProcessTableDecoder()
+        try:
+            while True:
+                length, kind = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                if not 1 <= length <= MAX_FRAME:
+                    break
+                payload = await reader.readexactly(length - 1)
+
+                if kind == FRAME_HELLO:
+                    if key is not None:
+                        break
+                    peer = writer.get_extra_info('peername')
+                    key = self.host_key(decode_hello(payload), peer)
+                    self.push(key, 'connected', peer)
+                elif key is None:
+                    break
+                elif kind == FRAME_METRICS_DELTA:
+                    self.push(key, 'metrics', metrics.decode(payload))
+                elif kind == FRAME_PROCESSES_DELTA:
+                    self.push(key, 'processes', processes.decode(payload))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, struct.error, IndexError):
+            pass
+        finally:
+            if key is not None:
+                self.active.discard(key)
+                self.push(key, 'disconnected')
+            writer.close()
+
+    def drain(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        events = []
+        for key, state in pending.items():
+            if state['opened']:
+                events.append(('connected', key, state['peer']))
+            events.extend(('metrics', key, sample) for sample in state['samples'])
+            if state['processes'] is not None:
+                events.append(('processes', key, state['processes']))
+            if state['connected'] is False:
+                events.append(('disconnected', key, None))
+        return events
+
+    def stop(self):
+        if self.loop and self.stop_future:
+            self.loop.call_soon_threadsafe(
+                lambda: self.stop_future.done() or self.stop_future.set_result(None))
+
+
+class RemoteHost:
+    def __init__(self, hostname):
+        # Imported here so agents, which never build a FleetState, don't pay for NumPy.
+        from metric_store import MetricStore
+        self.hostname = hostname
+        self.metric_store = MetricStore(tiers=REMOTE_TIERS)
+        self.latest = None
+        self.processes = []
+        self.generation = 0
+        self.connected = False
+        self.last_seen = None
+
+    def get(self):
+        return self.processes
+
+
+class FleetState:
+    def __init__(self):
+        self.hosts = {}
+
+    def apply(self, events):
+        for kind, hostname, data in events:
+            host = self.hosts.get(hostname)
+            if host is None:
+                host = self.hosts[hostname] = RemoteHost(hostname)
+            host.last_seen = time.time()
+
+            if kind == 'connected':
+                host.connected = True
+            elif kind == 'disconnected':
+                host.connected = False
+            elif kind == 'metrics':
+                host.latest = data
+                host.metric_store.append_sample(data)
+            elif kind == 'processes':
+                host.processes = data[1]
+                host.generation += 1
+
+    def overview(self):
+        rows = []
+        for hostname, host in self.hosts.items():
+            latest = host.latest or {}
+            rows.append({
+                'host': hostname,
+                'connected': host.connected,
+                'cpu_percent': latest.get('cpu_percent', 0),
+                'memory_percent': latest.get('memory_percent', 0),
+                'disk_percent': latest.get('disk_percent', 0),
+                'bytes_sent': latest.get('bytes_sent', 0),
+                'bytes_recv': latest.get('bytes_recv', 0),
+                'processes': len(host.processes),
+                'last_seen': host.last_seen
+            })
+        return rows
+
+
+async def stream_to_aggregator(host, port, hostname, collector, snapshot, stop_event):
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    metrics = MetricsEncoder()
+    processes = ProcessTableEncoder()
+    seen_generation = None
+    try:
+        writer.write(encode_hello(hostname))
+        while not stop_event.is_set():
+            try:
+                sample = await loop.run_in_executor(None, collector.samples.get, True, 1.0)
+            except queue.Empty:
+                continue
+            # If the aggregator is slow the backlog is collapsed to the newest sample.
+            backlog = collector.drain()
+            if backlog:
+                sample = backlog[-1]
+
+            writer.write(metrics.encode(sample))
+            if snapshot and snapshot.generation != seen_generation:
+                seen_generation = snapshot.generation
+                writer.write(processes.encode(sample['time'], snapshot.get()))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def run_agent(args):
+    host, port = parse_address(args.agent, default_host='127.0.0.1')
+    hostname = args.agent_name or socket.gethostname()
+    collector = MetricsCollector({'selected_disk': args.disk}, args.interval)
+    snapshot = ProcessSnapshot(args.process_interval, args.process_backend)
+    stop_event = threading.Event()
+    collector.start()
+    snapshot.start()
+
+    backoff = 1
+    try:
+        while True:
+            try:
+                asyncio.run(stream_to_aggregator(host, port, hostname, collector, snapshot, stop_event))
+                backoff = 1
+            except (ConnectionError, OSError):
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        collector.stop()
+        snapshot.stop()
+    return 0
@@ -0,0 +1,2696 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import psutil
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.ticker import FuncFormatter
+import bisect
+from collections import Counter, deque
+import copy
+import json
+import math
+import os
+import time
+
+from collector import SERIES, MetricsCollector, ProcessSnapshot
+from metric_store import MetricStore, DeviceStore
+from history_file import HistoryReader, HistoryWriter
+from fleet import FleetAggregator, FleetState, parse_address
+from alerts import AlertEngine, AlertSink, default_rules
+from anomaly import CPU, LEAK, MEMORY, MetricAnomalies, ProcessAnomalies
+from cgroups import CgroupCollector, cgroup_name, is_cgroup2
+from enrichment import Enricher
+from terminate import ALIVE, DENIED, GONE, KILLED, TERMINATED, ProcessTerminator
+from scheduler import SamplingScheduler
+from process_history import ProcessHistory, WINDOWS
+from process_tree import ProcessTree
+from query import QueryError, ProcessIndex, compile_query, literal_query
+from instrumentation import Instrumentation
+
+HEARTBEAT_INTERVAL = 0.1
+CHART_SPANS = {'1m': 60, '10m': 600, '1h': 3600, '6h': 21600, '24h': 86400, '7d': 604800}
+REPLAY_SPEEDS = (1, 2, 5, 10, 25, 50, 100)
+# After a seek, at most this much of the session before the new position is loaded back into the charts.
+REPLAY_BACKFILL = 3600
+# Anomalous samples kept for the chart markers, across all series.
+ANOMALY_POINTS = 2000
+LEAK_RULE = {'name': 'memory-leak', 'kind': 'anomaly', 'field': 'memory_mb'}
+# Cgroups charted when none are selected: the busiest ones.
+CGROUP_CHART_ROWS = 16
+
+def format_age(seconds, pos=None):
+    seconds = -seconds
+    if seconds <= 0:
+        return '0'
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"-{seconds / size:g}{unit}"
+    return f"-{seconds:g}s"
+
+def longest_increasing_subsequence(values):
+    tails = []
+    tail_indices = []
+    parents = [None] * len(values)
+    for index, value in enumerate(values):
+        position = bisect.bisect_left(tails, value)
+        if position == len(tails):
+            tails.append(value)
+            tail_indices.append(index)
+        else:
+            tails[position] = value
+            tail_indices[position] = index
+        parents[index] = tail_indices[position - 1] if position else None
+    
+    result = set()
+    index = tail_indices[-1] if tail_indices else None
+    while index is not None:
+        result.add(index)
+        index = parents[index]
+    return result
+
+class TreeviewSync:
+    def __init__(self, tree, format_row, sort_keys, sort_column, reverse=True, empty_values=None, key='pid',
+                 parent='', format_text=None, format_tags=None):
+        self.tree = tree
+        self.key = key
+        self.parent = parent
+        self.format_row = format_row
+        self.format_text = format_text
+        self.format_tags = format_tags
+        self.sort_keys = sort_keys
+        self.sort_column = sort_column
+        self.reverse = reverse
+        self.empty_values = empty_values
+        self.items = {}
+        self.values = {}
+        self.records = {}
+        self.placeholder = None
+    
+    def sync(self, records):
+        records = sorted(records, key=self.sort_keys[self.sort_column], reverse=self.reverse)
+        
+        self.records = {record[self.key]: record for record in records}
+        
+        for pid in [pid for pid in self.items if pid not in self.records]:
+            self.tree.delete(self.items.pop(pid))
+            del self.values[pid]
+        
+        for pid, record in self.records.items():
+            values = self.format_row(record)
+            text = self.format_text(record) if self.format_text else ''
+            tags = self.format_tags(record) if self.format_tags else ()
+            if pid not in self.items:
+                self.items[pid] = self.tree.insert(self.parent, 'end', text=text, values=values, tags=tags)
+                self.values[pid] = (text, values, tags)
+            elif self.values[pid] != (text, values, tags):
+                self.tree.item(self.items[pid], text=text, values=values, tags=tags)
+                self.values[pid] = (text, values, tags)
+        
+        self.update_placeholder()
+        self.reorder([record[self.key] for record in records])
+    
+    def update_placeholder(self):
+        if self.empty_values is None:
+            return
+        if not self.records and self.placeholder is None:
+            self.placeholder = self.tree.insert(self.parent, 'end', values=self.empty_values())
+        elif self.records and self.placeholder is not None:
+            self.tree.delete(self.placeholder)
+            self.placeholder = None
+    
+    def reorder(self, order):
+        current = [item for item in self.tree.get_children(self.parent) if item != self.placeholder]
+        desired = [self.items[pid] for pid in order]
+        if current == desired:
+            return
+        
+        # Rows on the longest already-ordered run stay put; every other row is moved
+        # directly after its new predecessor, so a refresh costs one move per displaced row.
+        position = {item: index for index, item in enumerate(current)}
+        stable = longest_increasing_subsequence([position[item] for item in desired])
+        # Rows still waiting to move keep their old places, so the predecessor sits after the rows already placed
+        # plus the waiting rows before the last row that stayed put. A Fenwick tree over old positions counts
+        # those, which keeps a full reversal at O(n log n) instead of searching the list for every move.
+        waiting = [0] * (len(current) + 1)
+        
+        def mark(index, delta):
+            index += 1
+            while index < len(waiting):
+                waiting[index] += delta
+                index += index & -index
+        
+        def waiting_before(index):
+            total = 0
+            while index:
+                total += waiting[index]
+                index -= index & -index
+            return total
+        
+        for index, item in enumerate(desired):
+            if index not in stable:
+                mark(position[item], 1)
+        anchor = 0
+        for index, item in enumerate(desired):
+            if index in stable:
+                anchor = position[item]
+                continue
+            mark(position[item], -1)
+            self.tree.move(item, self.parent, index + waiting_before(anchor))
+    
+    def sort_by(self, column):
+        if column == self.sort_column:
+            reverse = not self.reverse
+        else:
+            reverse = column not in ('pid', 'name', 'title', 'status', 'host')
+        self.set_sort(column, reverse)
+    
+    def set_sort(self, column, reverse):
+        self.sort_column = column
+        self.reverse = reverse
+        sort_key = self.sort_keys[column]
+        records = sorted(self.records.values(), key=sort_key, reverse=self.reverse)
+        self.reorder([record[self.key] for record in records])
+    
+    def clear(self):
+        for item in self.items.values():
+            if self.tree.exists(item):
+                self.tree.delete(item)
+        if self.placeholder is not None and self.tree.exists(self.placeholder):
+            self.tree.delete(self.placeholder)
+        self.items = {}
+        self.values = {}
+        self.records = {}
+        self.placeholder = None
+    
+    def refresh_placeholder_text(self):
+        if self.placeholder is not None:
+            self.tree.item(self.placeholder, values=self.empty_values())
+
+class VirtualTable:
+    def __init__(self, tree, scrollbar, format_row, sort_keys, sort_column, reverse=True, key='pid',
+                 format_tags=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.key = key
+        self.format_row = format_row
+        self.format_tags = format_tags
+        self.sort_keys = sort_keys
+        self.sort_column = sort_column
+        self.reverse = reverse
+        self.records = []
+        self.positions = None
+        self.rows = []
+        self.row_values = {}
+        self.row_keys = {}
+        self.offset = 0
+        self.selected = None
+        self.selected_keys = set()
+        self.extend_selection = False
+        self.rendered_selection = ()
+        self.active = False
+        
+        self.tree.bind('<Configure>', self.on_configure, add='+')
+        self.tree.bind('<<TreeviewSelect>>', self.on_select, add='+')
+        self.tree.bind('<ButtonPress-1>', self.on_press, add='+')
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self.on_mousewheel, add='+')
+        for sequence, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page_up'), ('<Next>', 'page_down'),
+                               ('<Home>', 'home'), ('<End>', 'end')):
+            self.tree.bind(sequence, lambda event, step=step: self.on_key(step), add='+')
+    
+    def attach(self):
+        # The Treeview only ever holds one screenful of rows; the scrollbar moves through the
+        # records instead, so scrolling costs the same for 50 processes as for 50,000.
+        self.active = True
+        self.tree.configure(yscrollcommand='')
+        self.scrollbar.configure(command=self.yview)
+        self.resize()
+    
+    def detach(self):
+        self.active = False
+        for item in self.rows:
+            if self.tree.exists(item):
+                self.tree.delete(item)
+        self.rows = []
+        self.row_values = {}
+        self.row_keys = {}
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+    
+    def sync(self, records):
+        self.records = sorted(records, key=self.sort_keys[self.sort_column], reverse=self.reverse)
+        self.positions = None
+        self.render()
+    
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.reverse = not self.reverse
+        else:
+            self.sort_column = column
+            self.reverse = column not in ('pid', 'name', 'title', 'status', 'host')
+        self.sync(self.records)
+    
+    def position(self, key):
+        if self.positions is None:
+            self.positions = {record[self.key]: index for index, record in enumerate(self.records)}
+        return self.positions.get(key)
+    
+    def selected_record(self):
+        index = self.position(self.selected)
+        return self.records[index] if index is not None else None
+    
+    def selected_records(self):
+        positions = sorted(index for index in map(self.position, self.selected_keys) if index is not None)
+        return [self.records[index] for index in positions]
+    
+    def on_configure(self, event):
+        if self.active:
+            self.resize()
+    
+    def resize(self):
+        if not self.rows:
+            self.rows.append(self.tree.insert('', 'end'))
+        bbox = self.tree.bbox(self.rows[0])
+        if not bbox:
+            # No layout yet: measure again once Tk has placed the row, or on the first <Configure>.
+            if self.tree.winfo_ismapped():
+                self.tree.after_idle(self.resize)
+            self.render()
+            return
+        top, row_height = bbox[1], bbox[3]
+        count = max((self.tree.winfo_height() - top) // row_height, 1)
+        while len(self.rows) < count:
+            self.rows.append(self.tree.insert('', 'end'))
+        while len(self.rows) > count:
+            item = self.rows.pop()
+            self.tree.delete(item)
+            self.row_values.pop(item, None)
+            self.row_keys.pop(item, None)
+        self.render()
+    
+    def render(self):
+        if not self.active:
+            return
+        self.offset = max(min(self.offset, len(self.records) - len(self.rows)), 0)
+        selected_items = []
+        for index, item in enumerate(self.rows):
+            position = self.offset + index
+            if position < len(self.records):
+                record = self.records[position]
+                key = record[self.key]
+                values = self.format_row(record)
+                tags = self.format_tags(record) if self.format_tags else ()
+            else:
+                key = None
+                values = ()
+                tags = ()
+            if self.row_values.get(item) != (values, tags):
+                self.tree.item(item, values=values, tags=tags)
+                self.row_values[item] = (values, tags)
+            self.row_keys[item] = key
+            if key is not None and key in self.selected_keys:
+                selected_items.append(item)
+        
+        # Rows are recycled, so the selection follows the records, not the Treeview items.
+        current = self.tree.selection()
+        if set(current) != set(selected_items):
+            if selected_items:
+                self.tree.selection_set(selected_items)
+            else:
+                self.tree.selection_remove(current)
+        self.rendered_selection = tuple(selected_items)
+        
+        total = len(self.records)
+        if total <= len(self.rows):
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + len(self.rows)) / total)
+    
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.records))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self.offset += amount * max(len(self.rows) - 1, 1) if args[2] == 'pages' else amount
+        self.render()
+    
+    def on_mousewheel(self, event):
+        if not self.active:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.offset -= 3
+        elif event.num == 5 or event.delta < 0:
+            self.offset += 3
+        self.render()
+        return 'break'
+    
+    def on_press(self, event):
+        # Shift and Control add to the selection, which may include records scrolled out of view.
+        self.extend_selection = bool(event.state & 0x0005)
+    
+    def on_select(self, event):
+        if not self.active:
+            return
+        # Selections set by render come from recycling rows while scrolling, not from the user.
+        selection = self.tree.selection()
+        if set(selection) == set(self.rendered_selection):
+            return
+        keys = {self.row_keys[item] for item in selection if self.row_keys.get(item) is not None}
+        if self.extend_selection:
+            visible = {key for key in self.row_keys.values() if key is not None}
+            self.selected_keys = (self.selected_keys - visible) | keys
+        else:
+            self.selected_keys = keys
+        self.rendered_selection = selection
+        focus = self.row_keys.get(self.tree.focus())
+        self.selected = focus if focus in keys else next(iter(keys), None)
+    
+    def on_key(self, step):
+        if not self.active or not self.records:
+            return None
+        index = self.position(self.selected)
+        if index is None:
+            index = self.offset
+        page = max(len(self.rows) - 1, 1)
+        if step == 'page_up':
+            index -= page
+        elif step == 'page_down':
+            index += page
+        elif step == 'home':
+            index = 0
+        elif step == 'end':
+            index = len(self.records) - 1
+        else:
+            index += step
+        index = max(min(index, len(self.records) - 1), 0)
+        self.selected = self.records[index][self.key]
+        self.selected_keys = {self.selected}
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + len(self.rows):
+            self.offset = index - len(self.rows) + 1
+        self.render()
+        return 'break'
+
+class SystemMonitor:
+    def __init__(self, root, profiler=None, overrides=None):
+        self.root = root
+        self.profiler = profiler
+        self.root.title("System Monitor")
+        self.root.geometry("1200x800")
+        
+        self.settings = {
+            'language': 'english',
+            'theme': 'light',
+            'selected_disk': '/',
+            'cpu_alert': 90,
+            'memory_alert': 85,
+            'disk_alert': 90,
+            'sample_interval_ms': 1000,
+            'render_interval_ms': 1000,
+            'blit_rendering': True,
+            'process_snapshot_ttl_ms': 3000,
+            'search_debounce_ms': 250,
+            'chart_span': '1m',
+            'history_enabled': True,
+            'history_dir': 'history',
+            'history_segment_records': 86400,
+            'history_retention_segments': 14,
+            'history_load_seconds': 86400,
+            'process_backend': 'auto',
+            'aggregator_listen': '',
+            'alert_sustain_s': 5,
+            'alert_hysteresis': 5,
+            'alert_cooldown_s': 300,
+            'alert_rules': [],
+            'alert_log': 'alerts.log',
+            'alert_command': '',
+            'process_history_slots': 2048,
+            'process_tree_view': False,
+            'adaptive_sampling': True,
+            'sampling_budgets': {},
+            'record_path': '',
+            'record_codec': 'zlib',
+            'replay_path': '',
+            'replay_speed': 1.0,
+            'anomaly_detection': True,
+            'anomaly_threshold': 4.0,
+            'anomaly_halflife_s': 300,
+            'leak_window_s': 600,
+            'leak_rate_mb_min': 0.5,
+            'enrichment': True,
+            'enrichment_budget_ms': 30,
+            'enrichment_max_age_s': 10,
+            'terminate_timeout_s': 3,
+            'filter_presets': {},
+            'cgroups': True,
+            'cgroup_root': '/sys/fs/cgroup',
+            'instrumentation': True
+        }
+        
+        self.is_paused = False
+        self.render_job = None
+        self.next_render_time = None
+        self.late_ticks = 0
+        self.search_jobs = {}
+        self.process_views_generation = None
+        self.alert_generation = None
+        self.anomaly_points = deque(maxlen=ANOMALY_POINTS)
+        self.leaking = set()
+        self.unseen_alerts = 0
+        self.heartbeat_job = None
+        self.heartbeat_due = None
+        self.debug_job = None
+        self.applications_cache = (None, None, [])
+        self.apps_tab_built = False
+        self.processes_tab_built = False
+        self.process_tree_syncs = {}
+        self.process_tree_expanders = {}
+        self.process_tree_visible = None
+        self.hardware_tab_built = False
+        self.cgroups_tab_built = False
+        self.first_paint_done = False
+        self.startup_reported = False
+        self.selected_host = None
+        self.window_mapped = True
+        
+        self.load_settings(overrides)
+        
+        self.localization = {
+            'english': {
+                'title': "System Monitor",
+                'cpu': "CPU Usage (%)",
+                'memory': "Memory Usage (%)", 
+                'disk': "Disk Usage (%)",
+                'network': "Network (KB/s)",
+                'cpu_label': "CPU: {}%",
+                'memory_label': "Memory: {}%",
+                'disk_label': "Disk ({}): {}%",
+                'network_label': "Network: ↑ {} KB/s ↓ {} KB/s",
+                'settings': "Settings",
+                'alerts': "Alerts",
+                'high_cpu': "High CPU usage: {}%",
+                'high_memory': "High memory usage: {}%",
+                'high_disk': "High disk usage: {}%",
+                'language': "Language",
+                'theme': "Theme", 
+                'disk_select': "Disk",
+                'apply': "Apply",
+                'alert_thresholds': "Alert Thresholds (%)",
+                'cpu_alert': "CPU Alert:",
+                'memory_alert': "Memory Alert:",
+                'disk_alert': "Disk Alert:",
+                'network_sent': "Sent",
+                'network_received': "Received",
+                'applications': "Applications",
+                'processes': "Processes",
+                'pid': "PID",
+                'name': "Name",
+                'status': "Status",
+                'cpu_percent': "CPU %",
+                'memory_percent': "Memory %",
+                'memory_usage': "Memory Usage",
+                'pause': "Pause",
+                'resume': "Resume",
+                'refresh': "Refresh",
+                'search': "Search...",
+                'no_apps': "No applications found",
+                'end_task': "End Task",
+                'window_title': "Window Title",
+                'end_task_confirm': "Are you sure you want to end this task?",
+                'end_tree': "End Process Tree",
+                'end_tasks_confirm': "Are you sure you want to end these {} tasks?",
+                'end_tree_confirm': "Are you sure you want to end {} tasks and all their child processes?",
+                'termination': "Ending tasks",
+                'termination_progress': "Finished {} of {}",
+                'termination_done': "Done: {} ended, {} killed, {} failed",
+                'result': "Result",
+                'result_terminated': "ended",
+                'result_killed': "killed (did not exit in time)",
+                'result_gone': "already exited",
+                'result_denied': "access denied",
+                'result_alive': "still running",
+                'presets': "Filters:",
+                'save_preset': "Save Filter",
+                'delete_preset': "Delete Filter",
+                'preset_name': "Name for this filter:",
+                'sample_interval': "Sample interval (ms):",
+                'render_interval': "Render interval (ms):",
+                'timing_label': "Late frames: {} | Missed samples: {}",
+                'time_span': "Time span:",
+                'fleet': "Fleet",
+                'host': "Host",
+                'host_select': "Host:",
+                'replay': "Replay:",
+                'replay_speed': "Speed:",
+                'local_host': "local",
+                'connection': "Connection",
+                'online': "online",
+                'offline': "offline",
+                'sent_rate': "Sent KB/s",
+                'received_rate': "Received KB/s",
+                'process_count': "Processes",
+                'aggregator_error': "Could not listen for agents:",
+                'alerts_count': "Alerts ({})",
+                'alert_time': "Time",
+                'alert_rule': "Rule",
+                'alert_message': "Message",
+                'clear': "Clear",
+                'alert_sustain': "Sustained for (s):",
+                'alert_command': "Command on alert:",
+                'rate_alert': "{}: changing by {:.1f} per second",
+                'process_alert': "{} (PID {}): {} {:.1f}",
+                'rule_alert': "{}: {:.1f}",
+                'leak_alert': "{} (PID {}): memory keeps growing, now {:.0f} MB",
+                'io_rate': "I/O KB/s",
+                'cpu_trend': "CPU trend",
+                'tree_view': "Tree view",
+                'threads': "Threads",
+                'fds': "Files",
+                'connections': "Sockets",
+                'uss': "USS MB",
+                'average_over': "Average over:",
+                'window_now': "now",
+                'window_minutes': "{} min",
+                'debug': "Debug",
+                'measurement': "Measurement",
+                'count': "Count",
+                'p50': "p50 ms",
+                'p90': "p90 ms",
+                'p99': "p99 ms",
+                'max': "Max ms",
+                'export_json': "Export JSON",
+                'reset': "Reset",
+                'instrumentation_off': "Instrumentation is disabled in settings.json",
+                'hardware': "Hardware",
+                'cpu_cores': "CPU per core (%)",
+                'disk_io': "Disk I/O per device (KB/s)",
+                'nic_io': "Network per interface (KB/s)",
+                'cgroups': "Cgroups",
+                'cgroup': "Cgroup",
+                'tasks': "Tasks",
+                'cgroup_cpu': "CPU % by cgroup (selected, or the busiest)"
+            },
+            'russian': {
+                'title': "Системный монитор",
+                'cpu': "Загрузка CPU (%)",
+                'memory': "Использование памяти (%)",
+                'disk': "Использование диска (%)",
+                'network': "Сеть (КБ/с)",
+                'cpu_label': "CPU: {}%",
+                'memory_label': "Память: {}%", 
+                'disk_label': "Диск ({}): {}%",
+                'network_label': "Сеть: ↑ {} КБ/с ↓ {} КБ/с",
+                'settings': "Настройки",
+                'alerts': "Оповещения",
+                'high_cpu': "Высокая загрузка CPU: {}%",
+                'high_memory': "Высокое использование памяти: {}%",
+                'high_disk': "Высокое использование диска: {}%",
+                'language': "Язык",
+                'theme': "Тема",
+                'disk_select': "Диск",
+                'apply': "Применить",
+                'alert_thresholds': "Пороги оповещений (%)",
+                'cpu_alert': "Оповещение CPU:",
+                'memory_alert': "Оповещение памяти:",
+                'disk_alert': "Оповещение диска:",
+                'network_sent': "Отправлено",
+                'network_received': "Получено",
+                'applications': "Приложения",
+                'processes': "Процессы",
+                'pid': "PID",
+                'name': "Имя",
+                'status': "Статус",
+                'cpu_percent': "CPU %",
+                'memory_percent': "Память %",
+                'memory_usage': "Исп. памяти",
+                'pause': "Пауза",
+                'resume': "Продолжить",
+                'refresh': "Обновить",
+                'search': "Поиск...",
+                'no_apps': "Приложения не найдены",
+                'end_task': "Завершить задачу",
+                'window_title': "Окно",
+                'end_task_confirm': "Вы уверены, что хотите завершить эту задачу?",
+                'end_tree': "Завершить дерево процессов",
+                'end_tasks_confirm': "Вы уверены, что хотите завершить эти задачи ({})?",
+                'end_tree_confirm': "Вы уверены, что хотите завершить задачи ({}) вместе со всеми дочерними процессами?",
+                'termination': "Завершение задач",
+                'termination_progress': "Готово {} из {}",
+                'termination_done': "Готово: завершено {}, принудительно {}, не удалось {}",
+                'result': "Результат",
+                'result_terminated': "завершён",
+                'result_killed': "завершён принудительно (не успел выйти)",
+                'result_gone': "уже завершён",
+                'result_denied': "нет доступа",
+                'result_alive': "всё ещё работает",
+                'presets': "Фильтры:",
+                'save_preset': "Сохранить фильтр",
+                'delete_preset': "Удалить фильтр",
+                'preset_name': "Название фильтра:",
+                'sample_interval': "Интервал замеров (мс):",
+                'render_interval': "Интервал отрисовки (мс):",
+                'timing_label': "Опоздавшие кадры: {} | Пропущенные замеры: {}",
+                'time_span': "Период:",
+                'fleet': "Парк",
+                'host': "Узел",
+                'host_select': "Узел:",
+                'replay': "Запись:",
+                'replay_speed': "Скорость:",
+                'local_host': "локальный",
+                'connection': "Соединение",
+                'online': "в сети",
+                'offline': "не в сети",
+                'sent_rate': "Отправлено КБ/с",
+                'received_rate': "Получено КБ/с",
+                'process_count': "Процессы",
+                'aggregator_error': "Не удалось принимать подключения агентов:",
+                'alerts_count': "Оповещения ({})",
+                'alert_time': "Время",
+                'alert_rule': "Правило",
+                'alert_message': "Сообщение",
+                'clear': "Очистить",
+                'alert_sustain': "Держится не менее (с):",
+                'alert_command': "Команда при оповещении:",
+                'rate_alert': "{}: изменяется на {:.1f} в секунду",
+                'process_alert': "{} (PID {}): {} {:.1f}",
+                'rule_alert': "{}: {:.1f}",
+                'leak_alert': "{} (PID {}): память постоянно растёт, сейчас {:.0f} МБ",
+                'io_rate': "Ввод-вывод КБ/с",
+                'cpu_trend': "Динамика CPU",
+                'tree_view': "Дерево",
+                'threads': "Потоки",
+                'fds': "Файлы",
+                'connections': "Сокеты",
+                'uss': "USS МБ",
+                'average_over': "Среднее за:",
+                'window_now': "сейчас",
+                'window_minutes': "{} мин",
+                'debug': "Отладка",
+                'measurement': "Измерение",
+                'count': "Количество",
+                'p50': "p50 мс",
+                'p90': "p90 мс",
+                'p99': "p99 мс",
+                'max': "Макс. мс",
+                'export_json': "Экспорт JSON",
+                'reset': "Сбросить",
+                'instrumentation_off': "Измерения отключены в settings.json",
+                'hardware': "Оборудование",
+                'cpu_cores': "CPU по ядрам (%)",
+                'disk_io': "Ввод-вывод по дискам (КБ/с)",
+                'nic_io': "Сеть по интерфейсам (КБ/с)",
+                'cgroups': "Контрольные группы",
+                'cgroup': "Группа",
+                'tasks': "Задачи",
+                'cgroup_cpu': "CPU % по группам (выбранные или самые загруженные)"
+            }
+        }
+        
+        self.metric_store = MetricStore()
+        self.core_store = DeviceStore()
+        self.disk_store = DeviceStore()
+        self.nic_store = DeviceStore()
+        
+        self.alert_engine = AlertEngine(default_rules(self.settings))
+        self.alert_sink = AlertSink(self.settings['alert_log'], self.settings['alert_command'],
+                                    self.settings['alert_cooldown_s'])
+        self.metric_anomalies = None
+        self.process_anomalies = None
+        if self.settings['anomaly_detection']:
+            self.reset_metric_anomalies()
+            self.process_anomalies = ProcessAnomalies(self.settings['anomaly_threshold'],
+                                                      self.settings['anomaly_halflife_s'],
+                                                      self.settings['leak_window_s'],
+                                                      self.settings['leak_rate_mb_min'])
+        
+        interval = self.settings['sample_interval_ms'] / 1000
+        ttl = self.settings['process_snapshot_ttl_ms'] / 1000
+        self.scheduler = None
+        self.replay = None
+        self.recorder = None
+        if self.settings['replay_path']:
+            # A replayed session stands in for the collector and, on the process tabs, for the scanner.
+            from session import SessionPlayer, SessionReader
+            self.replay = SessionPlayer(SessionReader(self.settings['replay_path']), self.settings['replay_speed'])
+            self.collector = self.replay
+        else:
+            if self.settings['adaptive_sampling']:
+                self.scheduler = SamplingScheduler({'metrics': interval, 'devices': interval, 'processes': ttl},
+                                                   self.settings['sampling_budgets'])
+            self.collector = MetricsCollector(self.settings, interval, self.scheduler)
+            if self.settings['record_path']:
+                from session import SessionRecorder
+                self.recorder = SessionRecorder(self.settings['record_path'], self.settings['record_codec'])
+        self.process_history = ProcessHistory(psutil.virtual_memory().total,
+                                              self.settings['process_history_slots'],
+                                              math.ceil(max(WINDOWS) / ttl))
+        self.process_query_index = ProcessIndex()
+        self.cgroups = None
+        if self.settings['cgroups'] and not self.replay and is_cgroup2(self.settings['cgroup_root']):
+            self.cgroups = CgroupCollector(self.settings['cgroup_root'])
+        self.enricher = None
+        if self.settings['enrichment']:
+            self.enricher = Enricher(self.settings['enrichment_budget_ms'] / 1000,
+                                     self.settings['enrichment_max_age_s'])
+        self.process_snapshot = ProcessSnapshot(ttl, self.settings['process_backend'], self.process_history,
+                                                self.scheduler, self.process_anomalies, self.enricher,
+                                                self.process_query_index, self.cgroups)
+        self.process_index = ProcessTree()
+        
+        self.aggregator = None
+        self.fleet = None
+        if self.settings['aggregator_listen']:
+            host, port = parse_address(self.settings['aggregator_listen'])
+            self.aggregator = FleetAggregator(host, port)
+            self.fleet = FleetState()
+        self.instruments = Instrumentation() if self.settings['instrumentation'] else None
+        if self.settings['history_enabled']:
+            self.load_history()
+        self.setup_ui()
+        self.install_instrumentation()
+        self.apply_theme()
+        self.root.bind('<Map>', self.on_window_state, add='+')
+        self.root.bind('<Unmap>', self.on_window_state, add='+')
+        self.update_watched()
+        
+    def load_settings(self, overrides=None):
+        self.saved_settings = {}
+        try:
+            if os.path.exists('settings.json'):
+                with open('settings.json', 'r') as f:
+                    saved_settings = json.load(f)
+                    self.settings.update(saved_settings)
+                    self.saved_settings = saved_settings
+        except:
+            pass
+        self.settings.update(overrides or {})
+        # Only keys changed since startup are saved, so command-line overrides apply to this run only and
+        # the saved values of overridden keys stay put unless the user changes those keys too.
+        self.settings_baseline = copy.deepcopy(self.settings)
+            
+    def save_settings(self):
+        changed = {key: value for key, value in self.settings.items()
+                   if key not in self.settings_baseline or self.settings_baseline[key] != value}
+        self.saved_settings.update(copy.deepcopy(changed))
+        self.settings_baseline.update(copy.deepcopy(changed))
+        try:
+            with open('settings.json', 'w') as f:
+                json.dump(self.saved_settings, f)
+        except:
+            pass
+    
+    def load_history(self):
+        try:
+            reader = HistoryReader(self.settings['history_dir'])
+            now = time.time()
+            times, values = reader.query(now - self.settings['history_load_seconds'], now,
+                                         self.metric_store.series)
+            reader.close()
+            self.metric_store.extend(times, values)
+            
+            self.collector.history = HistoryWriter(
+                self.settings['history_dir'],
+                self.metric_store.series,
+                segment_records=self.settings['history_segment_records'],
+                retention_segments=self.settings['history_retention_segments']
+            )
+        except OSError:
+            self.collector.history = None
+    
+    def get_localized_text(self, key):
+        lang = self.settings['language']
+        return self.localization[lang].get(key, key)
+    
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        control_frame = ttk.Frame(main_frame)
+        control_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        self.settings_btn = ttk.Button(
+            control_frame, 
+            text=self.get_localized_text('settings'),
+            command=self.open_settings
+        )
+        self.settings_btn.pack(side=tk.RIGHT, padx=5)
+        
+        self.pause_btn = ttk.Button(
+            control_frame,
+            text=self.get_localized_text('pause'),
+            command=self.toggle_pause
+        )
+        self.pause_btn.pack(side=tk.RIGHT, padx=5)
+        
+        self.span_label = ttk.Label(control_frame, text=self.get_localized_text('time_span'))
+        self.span_label.pack(side=tk.LEFT, padx=5)
+        
+        self.span_var = tk.StringVar(value=self.settings['chart_span'])
+        span_combo = ttk.Combobox(control_frame, textvariable=self.span_var, values=list(CHART_SPANS),
+                                  state='readonly', width=6)
+        span_combo.pack(side=tk.LEFT, padx=5)
+        span_combo.bind('<<ComboboxSelected>>', lambda event: self.set_chart_span(self.span_var.get()))
+        
+        if self.fleet:
+            self.host_label = ttk.Label(control_frame, text=self.get_localized_text('host_select'))
+            self.host_label.pack(side=tk.LEFT, padx=5)
+            
+            self.host_var = tk.StringVar(value=self.get_localized_text('local_host'))
+            self.host_combo = ttk.Combobox(control_frame, textvariable=self.host_var, state='readonly', width=20,
+                                           values=[self.get_localized_text('local_host')])
+            self.host_combo.pack(side=tk.LEFT, padx=5)
+            self.host_combo.bind('<<ComboboxSelected>>', lambda event: self.select_host(self.host_combo.current()))
+        
+        if self.replay:
+            self.setup_replay_bar(control_frame)
+        
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.monitor_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.monitor_frame, text="Monitoring")
+        
+        self.apps_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.apps_frame, text=self.get_localized_text('applications'))
+        
+        self.processes_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.processes_frame, text=self.get_localized_text('processes'))
+        
+        self.hardware_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.hardware_frame, text=self.get_localized_text('hardware'))
+        
+        if self.cgroups:
+            self.cgroups_frame = ttk.Frame(self.notebook)
+            self.notebook.add(self.cgroups_frame, text=self.get_localized_text('cgroups'))
+        
+        if self.fleet:
+            self.fleet_frame = ttk.Frame(self.notebook)
+            self.notebook.add(self.fleet_frame, text=self.get_localized_text('fleet'))
+            self.setup_fleet_tab()
+        
+        self.alerts_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.alerts_frame, text=self.get_localized_text('alerts'))
+        self.setup_alerts_tab()
+        
+        # Hidden until Ctrl+Shift+D.
+        self.debug_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.debug_frame, text=self.get_localized_text('debug'))
+        self.notebook.hide(self.debug_frame)
+        self.setup_debug_tab()
+        self.root.bind('<Control-D>', self.toggle_debug_tab)
+        
+        self.fig, ((self.ax1, self.ax2), (self.ax3, self.ax4)) = plt.subplots(2, 2, figsize=(12, 8))
+        
+        if self.settings['theme'] == 'dark':
+            self.fig.patch.set_facecolor('#2b2b2b')
+        else:
+            self.fig.patch.set_facecolor('white')
+            
+        # Margins tight_layout(pad=3.0) produces for this grid, fixed so startup doesn't pay ~150 ms to measure text.
+        self.fig.subplots_adjust(left=0.06, right=0.96, top=0.92, bottom=0.08, wspace=0.17, hspace=0.3)
+        
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.monitor_frame)
+        self.use_blit = self.settings['blit_rendering'] and self.canvas.supports_blit
+        self.backgrounds = {}
+        
+        self.cpu_line, = self.setup_plot(self.ax1, self.get_localized_text('cpu'), "red")
+        self.memory_line, = self.setup_plot(self.ax2, self.get_localized_text('memory'), "blue")
+        self.disk_line, = self.setup_plot(self.ax3, self.get_localized_text('disk'), "green")
+        self.sent_line, self.recv_line = self.setup_plot(
+            self.ax4, self.get_localized_text('network'), "purple", two_lines=True)
+        
+        self.plot_lines = [
+            (self.ax1, [(self.cpu_line, self.metric_store.index['cpu_percent'])]),
+            (self.ax2, [(self.memory_line, self.metric_store.index['memory_percent'])]),
+            (self.ax3, [(self.disk_line, self.metric_store.index['disk_percent'])]),
+            (self.ax4, [(self.sent_line, self.metric_store.index['bytes_sent']),
+                        (self.recv_line, self.metric_store.index['bytes_recv'])])
+        ]
+        self.anomaly_markers = {
+            ax: [(ax.plot([], [], linestyle='', marker='o', markersize=7, markerfacecolor='none',
+                          markeredgecolor='red', markeredgewidth=1.5, animated=self.use_blit)[0],
+                  self.metric_store.series[column]) for _, column in lines]
+            for ax, lines in self.plot_lines
+        }
+        
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        
+        self.stats_frame = ttk.Frame(self.monitor_frame)
+        self.stats_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=10)
+        
+        self.cpu_label = ttk.Label(self.stats_frame, text=self.get_localized_text('cpu_label').format(0))
+        self.cpu_label.pack(side=tk.LEFT, padx=10)
+        
+        self.memory_label = ttk.Label(self.stats_frame, text=self.get_localized_text('memory_label').format(0))
+        self.memory_label.pack(side=tk.LEFT, padx=10)
+        
+        self.disk_label = ttk.Label(self.stats_frame, text=self.get_localized_text('disk_label').format(
+            self.settings['selected_disk'], 0))
+        self.disk_label.pack(side=tk.LEFT, padx=10)
+        
+        self.network_label = ttk.Label(self.stats_frame, text=self.get_localized_text('network_label').format(0, 0))
+        self.network_label.pack(side=tk.LEFT, padx=10)
+        
+        self.timing_label = ttk.Label(self.stats_frame, text=self.get_localized_text('timing_label').format(0, 0))
+        self.timing_label.pack(side=tk.RIGHT, padx=10)
+        
+        # The Applications and Processes tabs are built the first time they are selected.
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event):
+        self.update_watched()
+        selected = self.notebook.select()
+        if selected == str(self.monitor_frame) and self.first_paint_done and not self.is_paused:
+            self.update_plot()
+        self.reschedule_render()
+        if selected == str(self.debug_frame):
+            # Leaving and coming back must not start a second refresh chain next to the pending one.
+            if self.debug_job:
+                self.root.after_cancel(self.debug_job)
+            self.refresh_debug_tab()
+            return
+        if selected == str(self.alerts_frame):
+            self.unseen_alerts = 0
+            self.update_alerts_tab_text()
+            return
+        if selected == str(self.hardware_frame):
+            if not self.hardware_tab_built:
+                self.setup_hardware_tab()
+            self.update_heatmaps()
+            return
+        if self.cgroups and selected == str(self.cgroups_frame):
+            if not self.cgroups_tab_built:
+                self.setup_cgroups_tab()
+            self.start_process_snapshot()
+            return
+        if selected == str(self.apps_frame) and not self.apps_tab_built:
+            self.setup_applications_tab()
+        elif selected == str(self.processes_frame) and not self.processes_tab_built:
+            self.setup_processes_tab()
+        else:
+            return
+        self.start_process_snapshot()
+    
+    def setup_applications_tab(self):
+        apps_control_frame = ttk.Frame(self.apps_frame)
+        apps_control_frame.pack(fill=tk.X, pady=5)
+        
+        self.apps_search_var = tk.StringVar()
+        self.apps_search_entry = ttk.Entry(
+            apps_control_frame, 
+            textvariable=self.apps_search_var,
+            width=30
+        )
+        self.apps_search_entry.pack(side=tk.LEFT, padx=5)
+        self.apps_search_entry.insert(0, self.get_localized_text('search'))
+        
+        self.apps_refresh_btn = ttk.Button(
+            apps_control_frame,
+            text=self.get_localized_text('refresh'),
+            command=self.refresh_applications
+        )
+        self.apps_refresh_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.end_task_btn = ttk.Button(
+            apps_control_frame,
+            text=self.get_localized_text('end_task'),
+            command=self.end_selected_task,
+            state='disabled'
+        )
+        self.end_task_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.apps_end_tree_btn = ttk.Button(
+            apps_control_frame,
+            text=self.get_localized_text('end_tree'),
+            command=lambda: self.end_processes(self.selected_applications(), tree=True),
+            state='disabled'
+        )
+        self.apps_end_tree_btn.pack(side=tk.LEFT, padx=5)
+        
+        columns = ('pid', 'name', 'title', 'cpu', 'memory')
+        self.apps_tree = ttk.Treeview(
+            self.apps_frame, 
+            columns=columns,
+            show='headings',
+            height=20
+        )
+        
+        self.apps_tree.heading('pid', text=self.get_localized_text('pid'))
+        self.apps_tree.heading('name', text=self.get_localized_text('name'))
+        self.apps_tree.heading('title', text=self.get_localized_text('window_title'))
+        self.apps_tree.heading('cpu', text=self.get_localized_text('cpu_percent'))
+        self.apps_tree.heading('memory', text=self.get_localized_text('memory_usage'))
+        
+        self.apps_tree.column('pid', width=80)
+        self.apps_tree.column('name', width=150)
+        self.apps_tree.column('title', width=250)
+        self.apps_tree.column('cpu', width=80)
+        self.apps_tree.column('memory', width=100)
+        
+        apps_scrollbar = ttk.Scrollbar(self.apps_frame, orient=tk.VERTICAL, command=self.apps_tree.yview)
+        self.apps_tree.configure(yscrollcommand=apps_scrollbar.set)
+        apps_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.apps_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.apps_sync = TreeviewSync(
+            self.apps_tree,
+            lambda app: (
+                app['pid'],
+                app['name'],
+                app['title'],
+                f"{app['cpu_percent'] or 0:.1f}",
+                f"{app['memory_mb']:.1f} MB"
+            ),
+            {
+                'pid': lambda app: app['pid'],
+                'name': lambda app: app['name'].lower(),
+                'title': lambda app: (app['title'] or '').lower(),
+                'cpu': lambda app: app['cpu_percent'] or 0,
+                'memory': lambda app: app['memory_mb']
+            },
+            'memory',
+            empty_values=lambda: ('', self.get_localized_text('no_apps'), '', '', '')
+        )
+        for column in columns:
+            self.apps_tree.heading(column, command=lambda column=column: self.apps_sync.sort_by(column))
+        
+        self.apps_search_var.trace('w', lambda *args: self.debounce_search('apps', self.filter_applications))
+        self.apps_tree.bind('<<TreeviewSelect>>', self.on_app_selection)
+        
+        self.apps_tab_built = True
+        if self.instruments:
+            self.instruments.instrument(self.apps_sync, 'sync', 'treeview: applications')
+        self.filter_applications()
+    
+    def setup_processes_tab(self):
+        process_control_frame = ttk.Frame(self.processes_frame)
+        process_control_frame.pack(fill=tk.X, pady=5)
+        
+        self.process_search_var = tk.StringVar()
+        self.process_search_entry = ttk.Entry(
+            process_control_frame, 
+            textvariable=self.process_search_var,
+            width=30
+        )
+        self.process_search_entry.pack(side=tk.LEFT, padx=5)
+        self.process_search_entry.insert(0, self.get_localized_text('search'))
+        
+        self.process_refresh_btn = ttk.Button(
+            process_control_frame,
+            text=self.get_localized_text('refresh'),
+            command=self.refresh_processes
+        )
+        self.process_refresh_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.process_end_btn = ttk.Button(
+            process_control_frame,
+            text=self.get_localized_text('end_task'),
+            command=lambda: self.end_processes(self.selected_processes())
+        )
+        self.process_end_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.process_end_tree_btn = ttk.Button(
+            process_control_frame,
+            text=self.get_localized_text('end_tree'),
+            command=lambda: self.end_processes(self.selected_processes(), tree=True)
+        )
+        self.process_end_tree_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.process_window_label = ttk.Label(process_control_frame, text=self.get_localized_text('average_over'))
+        self.process_window_label.pack(side=tk.LEFT, padx=5)
+        
+        self.process_window_combo = ttk.Combobox(process_control_frame, state='readonly', width=10,
+                                                 values=self.process_window_names())
+        self.process_window_combo.current(0)
+        self.process_window_combo.pack(side=tk.LEFT, padx=5)
+        self.process_window_combo.bind('<<ComboboxSelected>>', self.set_process_window)
+        
+        self.process_tree_var = tk.BooleanVar(value=self.settings['process_tree_view'])
+        self.process_tree_check = ttk.Checkbutton(
+            process_control_frame,
+            text=self.get_localized_text('tree_view'),
+            variable=self.process_tree_var,
+            command=self.set_process_view
+        )
+        self.process_tree_check.pack(side=tk.LEFT, padx=5)
+        
+        self.process_preset_label = ttk.Label(process_control_frame, text=self.get_localized_text('presets'))
+        self.process_preset_label.pack(side=tk.LEFT, padx=5)
+        
+        self.process_preset_combo = ttk.Combobox(process_control_frame, state='readonly', width=15,
+                                                 values=sorted(self.settings['filter_presets']))
+        self.process_preset_combo.pack(side=tk.LEFT, padx=5)
+        self.process_preset_combo.bind('<<ComboboxSelected>>', self.apply_filter_preset)
+        
+        self.process_save_preset_btn = ttk.Button(
+            process_control_frame,
+            text=self.get_localized_text('save_preset'),
+            command=self.save_filter_preset
+        )
+        self.process_save_preset_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.process_delete_preset_btn = ttk.Button(
+            process_control_frame,
+            text=self.get_localized_text('delete_preset'),
+            command=self.delete_filter_preset
+        )
+        self.process_delete_preset_btn.pack(side=tk.LEFT, padx=5)
+        
+        columns = ('pid', 'name', 'status', 'cpu', 'memory', 'io', 'trend', 'threads', 'fds', 'connections', 'uss')
+        self.process_tree = ttk.Treeview(
+            self.processes_frame, 
+            columns=columns,
+            show='headings',
+            height=20
+        )
+        
+        self.process_tree.heading('pid', text=self.get_localized_text('pid'))
+        self.process_tree.heading('name', text=self.get_localized_text('name'))
+        self.process_tree.heading('status', text=self.get_localized_text('status'))
+        self.process_tree.heading('cpu', text=self.get_localized_text('cpu_percent'))
+        self.process_tree.heading('memory', text=self.get_localized_text('memory_percent'))
+        self.process_tree.heading('io', text=self.get_localized_text('io_rate'))
+        self.process_tree.heading('trend', text=self.get_localized_text('cpu_trend'))
+        for column in ('threads', 'fds', 'connections', 'uss'):
+            self.process_tree.heading(column, text=self.get_localized_text(column))
+        
+        self.process_tree.column('pid', width=80)
+        self.process_tree.column('name', width=200)
+        self.process_tree.column('status', width=100)
+        self.process_tree.column('cpu', width=80)
+        self.process_tree.column('memory', width=80)
+        self.process_tree.column('io', width=90)
+        self.process_tree.column('trend', width=130)
+        for column in ('threads', 'fds', 'connections', 'uss'):
+            self.process_tree.column(column, width=70)
+        self.process_tree.heading('#0', text=self.get_localized_text('name'))
+        self.process_tree.column('#0', width=260)
+        self.process_tree.bind('<<TreeviewOpen>>', self.on_process_tree_open)
+        self.process_tree.bind('<<TreeviewClose>>', self.on_process_tree_close)
+        
+        process_scrollbar = ttk.Scrollbar(self.processes_frame, orient=tk.VERTICAL, command=self.process_tree.yview)
+        self.process_tree.configure(yscrollcommand=process_scrollbar.set)
+        process_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.process_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.process_sort_keys = {
+            'pid': lambda proc: proc['pid'],
+            'name': lambda proc: (proc['name'] or '').lower(),
+            'status': lambda proc: proc['status'] or '',
+            'cpu': lambda proc: proc['cpu_percent'] or 0,
+            'memory': lambda proc: proc['memory_percent'] or 0,
+            'io': lambda proc: proc.get('io_rate') or 0,
+            'trend': lambda proc: proc['cpu_percent'] or 0,
+            'threads': lambda proc: proc.get('threads') or 0,
+            'fds': lambda proc: proc.get('fds') or 0,
+            'connections': lambda proc: proc.get('connections') or 0,
+            'uss': lambda proc: proc.get('uss_mb') or 0
+        }
+        # In the tree, CPU and memory sort by subtree totals, so the heaviest branches come first.
+        self.process_tree_sort_keys = {
+            **self.process_sort_keys,
+            'cpu': lambda proc: self.process_index.totals[proc['pid']][0],
+            'memory': lambda proc: self.process_index.totals[proc['pid']][1]
+        }
+        self.process_table = VirtualTable(self.process_tree, process_scrollbar, self.format_process_row,
+                                          self.process_sort_keys, 'cpu', format_tags=self.process_tags)
+        self.configure_anomaly_tags()
+        for column in columns:
+            self.process_tree.heading(column, command=lambda column=column: self.sort_processes(column))
+        
+        self.process_search_var.trace('w', lambda *args: self.debounce_search('processes', self.filter_processes))
+        
+        self.processes_tab_built = True
+        if self.instruments:
+            self.instruments.instrument(self.process_table, 'sync', 'treeview: processes')
+            self.instruments.instrument(self.process_index, 'update', 'process tree index')
+        self.configure_process_view()
+        self.filter_processes()
+    
+    def format_process_row(self, proc):
+        return (
+            proc['pid'],
+            proc['name'],
+            proc['status'],
+            f"{proc['cpu_percent'] or 0:.1f}",
+            f"{proc['memory_percent'] or 0:.2f}",
+            f"{proc['io_rate']:.1f}" if proc.get('io_rate') is not None else '',
+            proc.get('cpu_trend', ''),
+            *self.format_enriched(proc)
+        )
+    
+    def format_enriched(self, proc):
+        enriched = proc.get('enriched')
+        if not enriched:
+            return ('', '', '', '')
+        # Values read more than two refresh periods ago are marked as stale with '~'.
+        now = time.time()
+        stale_after = 2 * self.settings['enrichment_max_age_s']
+        values = []
+        for field, probe, text in (('threads', 'threads', '{}'), ('fds', 'fds', '{}'),
+                                   ('connections', 'connections', '{}'), ('uss_mb', 'memory_full', '{:.1f}')):
+            value = proc.get(field)
+            if value is None:
+                values.append('')
+            else:
+                stale = now - enriched.get(probe, now) > stale_after
+                values.append(('~' if stale else '') + text.format(value))
+        return tuple(values)
+    
+    def process_tags(self, proc):
+        anomaly = proc.get('anomaly')
+        return (anomaly,) if anomaly else ()
+    
+    def configure_anomaly_tags(self):
+        dark = self.settings['theme'] == 'dark'
+        self.process_tree.tag_configure(LEAK, background='#5a1e1e' if dark else '#ffd6d6')
+        for tag in (CPU, MEMORY):
+            self.process_tree.tag_configure(tag, background='#4d4000' if dark else '#fff2cc')
+    
+    def format_process_tree_row(self, proc):
+        values = self.format_process_row(proc)
+        cpu, memory, descendants = self.process_index.totals[proc['pid']]
+        if not descendants:
+            return values
+        return values[:3] + (f"{values[3]} (Σ {cpu:.1f})", f"{values[4]} (Σ {memory:.2f})") + values[5:]
+    
+    def create_process_tree_sync(self, parent):
+        root = self.process_tree_syncs.get(None)
+        return TreeviewSync(
+            self.process_tree,
+            self.format_process_tree_row,
+            self.process_tree_sort_keys,
+            root.sort_column if root else 'cpu',
+            root.reverse if root else True,
+            parent=parent,
+            format_text=lambda proc: proc['name'],
+            format_tags=self.process_tags
+        )
+    
+    def configure_process_view(self):
+        for sync in self.process_tree_syncs.values():
+            sync.clear()
+        self.process_tree_syncs = {}
+        self.process_tree_expanders = {}
+        
+        columns = self.process_tree['columns']
+        if self.settings['process_tree_view']:
+            # The name moves into the tree column, next to the expand arrows.
+            self.process_table.detach()
+            self.process_tree.configure(show='tree headings',
+                                        displaycolumns=[column for column in columns if column != 'name'])
+            self.process_tree_syncs[None] = self.create_process_tree_sync('')
+        else:
+            self.process_tree.configure(show='headings', displaycolumns=columns)
+            self.process_table.attach()
+    
+    def set_process_view(self):
+        self.settings['process_tree_view'] = self.process_tree_var.get()
+        self.save_settings()
+        self.configure_process_view()
+        self.filter_processes()
+    
+    def sort_processes(self, column):
+        if not self.settings['process_tree_view']:
+            self.process_table.sort_by(column)
+            return
+        root = self.process_tree_syncs[None]
+        root.sort_by(column)
+        for sync in self.process_tree_syncs.values():
+            if sync is not root:
+                sync.set_sort(root.sort_column, root.reverse)
+    
+    def sync_process_tree(self, processes, predicate=None):
+        index = self.process_index
+        index.update(processes)
+        self.process_tree_visible = index.matching(predicate) if predicate else None
+        
+        # Only the top level and the branches the user has opened have rows; parents are
+        # opened before their children, so dict order syncs every level after its parent.
+        expanders = {}
+        for pid, sync in list(self.process_tree_syncs.items()):
+            if pid is not None and not self.process_tree.exists(sync.parent):
+                del self.process_tree_syncs[pid]
+                continue
+            sync.sync(index.child_records(pid, self.process_tree_visible))
+            self.update_process_expanders(sync, expanders)
+        self.process_tree_expanders = expanders
+    
+    def update_process_expanders(self, sync, expanders):
+        # Collapsed rows with children get one empty child, which is what makes Tk draw the expand arrow.
+        for pid, item in sync.items.items():
+            opened = self.process_tree_syncs.get(pid)
+            if opened is not None and opened.parent == item:
+                continue
+            expander = self.process_tree_expanders.get(item)
+            if self.process_index.has_children(pid, self.process_tree_visible):
+                if expander is None:
+                    expander = self.process_tree.insert(item, 'end')
+                expanders[item] = expander
+            elif expander is not None:
+                self.process_tree.delete(expander)
+    
+    def on_process_tree_open(self, event):
+        item = self.process_tree.focus()
+        expander = self.process_tree_expanders.pop(item, None)
+        if expander is None:
+            return
+        self.process_tree.delete(expander)
+        pid = int(self.process_tree.set(item, 'pid'))
+        sync = self.process_tree_syncs[pid] = self.create_process_tree_sync(item)
+        sync.sync(self.process_index.child_records(pid, self.process_tree_visible))
+        self.update_process_expanders(sync, self.process_tree_expanders)
+    
+    def on_process_tree_close(self, event):
+        item = self.process_tree.focus()
+        pid = int(self.process_tree.set(item, 'pid'))
+        sync = self.process_tree_syncs.get(pid)
+        if sync is None or sync.parent != item:
+            return
+        # Collapsing drops the branch's rows, so a closed subtree costs nothing on later refreshes.
+        sync.clear()
+        del self.process_tree_syncs[pid]
+        for key, nested in list(self.process_tree_syncs.items()):
+            if key is not None and not self.process_tree.exists(nested.parent):
+                del self.process_tree_syncs[key]
+        if self.process_index.has_children(pid, self.process_tree_visible):
+            self.process_tree_expanders[item] = self.process_tree.insert(item, 'end')
+    
+    def setup_hardware_tab(self):
+        # matplotlib's image path is only loaded when the tab is first opened.
+        from heatmap import HeatmapPanel
+        self.heatmaps = HeatmapPanel(
+            self.hardware_frame,
+            self.heatmap_titles(),
+            CHART_SPANS[self.settings['chart_span']],
+            format_age,
+            dark=self.settings['theme'] == 'dark',
+            use_blit=self.settings['blit_rendering']
+        )
+        self.heatmaps.widget().pack(fill=tk.BOTH, expand=True)
+        if self.instruments:
+            self.instruments.instrument(self.heatmaps, 'render', 'heatmap render')
+        self.hardware_tab_built = True
+    
+    def heatmap_titles(self):
+        return [self.get_localized_text(name) for name in ('cpu_cores', 'disk_io', 'nic_io')]
+    
+    def update_heatmaps(self):
+        now = self.now()
+        span = CHART_SPANS[self.settings['chart_span']]
+        for index, (store, vmax) in enumerate(((self.core_store, 100), (self.disk_store, None),
+                                               (self.nic_store, None))):
+            times, values = store.window(span, now)
+            self.heatmaps.update(index, store.names, times, values, now, vmax)
+        self.heatmaps.render()
+    
+    def setup_cgroups_tab(self):
+        # The heatmap is the same panel the Hardware tab uses, loaded on first use like there.
+        from heatmap import HeatmapPanel
+        columns = ('name', 'cpu', 'memory', 'io', 'tasks', 'processes')
+        table_frame = ttk.Frame(self.cgroups_frame)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        self.cgroup_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=12)
+        self.update_cgroup_headings()
+        self.cgroup_tree.column('name', width=360)
+        for column in columns[1:]:
+            self.cgroup_tree.column(column, width=90)
+        
+        cgroup_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+        cgroup_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.cgroup_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        sort_keys = {
+            'name': lambda group: group['path'],
+            'cpu': lambda group: group['cpu_percent'] or 0,
+            'memory': lambda group: group['memory_mb'] or 0,
+            'io': lambda group: group['io_rate'] or 0,
+            'tasks': lambda group: group['tasks'] or 0,
+            'processes': lambda group: group['processes']
+        }
+        # Hosts can have thousands of cgroups, so the table is virtual like the process list.
+        self.cgroup_table = VirtualTable(self.cgroup_tree, cgroup_scrollbar, self.format_cgroup_row, sort_keys, 'cpu',
+                                         key='path')
+        for column in columns:
+            self.cgroup_tree.heading(column, command=lambda column=column: self.cgroup_table.sort_by(column))
+        self.cgroup_tree.bind('<Double-1>', self.show_cgroup_processes)
+        self.cgroup_table.attach()
+        
+        self.cgroup_heatmap = HeatmapPanel(
+            self.cgroups_frame,
+            [self.get_localized_text('cgroup_cpu')],
+            CHART_SPANS[self.settings['chart_span']],
+            format_age,
+            dark=self.settings['theme'] == 'dark',
+            use_blit=self.settings['blit_rendering']
+        )
+        self.cgroup_heatmap.widget().pack(fill=tk.BOTH, expand=True)
+        if self.instruments:
+            self.instruments.instrument(self.cgroup_table, 'sync', 'treeview: cgroups')
+        self.cgroups_tab_built = True
+        self.update_cgroups_tab()
+    
+    def update_cgroup_headings(self):
+        self.cgroup_tree.heading('name', text=self.get_localized_text('cgroup'))
+        self.cgroup_tree.heading('cpu', text=self.get_localized_text('cpu_percent'))
+        self.cgroup_tree.heading('memory', text=self.get_localized_text('memory_usage'))
+        self.cgroup_tree.heading('io', text=self.get_localized_text('io_rate'))
+        self.cgroup_tree.heading('tasks', text=self.get_localized_text('tasks'))
+        self.cgroup_tree.heading('processes', text=self.get_localized_text('processes'))
+    
+    def format_cgroup_row(self, group):
+        return (
+            group['path'],
+            f"{group['cpu_percent']:.1f}" if group['cpu_percent'] is not None else '',
+            f"{group['memory_mb']:.1f} MB" if group['memory_mb'] is not None else '',
+            f"{group['io_rate']:.1f}" if group['io_rate'] is not None else '',
+            group['tasks'] if group['tasks'] is not None else '',
+            group['processes']
+        )
+    
+    def update_cgroups_tab(self):
+        records = self.cgroups.records
+        self.cgroup_table.sync(records)
+        if not self.window_mapped or self.notebook.select() != str(self.cgroups_frame):
+            return
+        paths = sorted(self.cgroup_table.selected_keys)
+        if not paths:
+            # The root is the host total and would set the scale for every other row, so it is charted on request only.
+            busiest = sorted((group for group in records if group['path'] != '/'),
+                             key=lambda group: group['cpu_percent'] or 0, reverse=True)[:CGROUP_CHART_ROWS]
+            paths = sorted(group['path'] for group in busiest)
+        # One column per process scan, placed at the time of that scan.
+        times, values = self.cgroups.history_window(paths)
+        self.cgroup_heatmap.update(0, [cgroup_name(path) for path in paths], times, values, self.now())
+        self.cgroup_heatmap.render()
+    
+    def show_cgroup_processes(self, event):
+        path = self.cgroup_table.row_keys.get(self.cgroup_tree.identify_row(event.y))
+        if path is None:
+            return
+        # The Processes tab lists the cgroup's own members through the search query. The tab change
+        # event is queued, so the tab is built here if it hasn't been yet.
+        if not self.processes_tab_built:
+            self.setup_processes_tab()
+        self.notebook.select(self.processes_frame)
+        self.process_search_entry.delete(0, tk.END)
+        self.process_search_entry.insert(0, f'cgroup="{path}"')
+    
+    def setup_debug_tab(self):
+        debug_control_frame = ttk.Frame(self.debug_frame)
+        debug_control_frame.pack(fill=tk.X, pady=5)
+        
+        self.debug_export_btn = ttk.Button(
+            debug_control_frame,
+            text=self.get_localized_text('export_json'),
+            command=self.export_instrumentation
+        )
+        self.debug_export_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.debug_reset_btn = ttk.Button(
+            debug_control_frame,
+            text=self.get_localized_text('reset'),
+            command=lambda: self.instruments and self.instruments.reset()
+        )
+        self.debug_reset_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.debug_status_label = ttk.Label(debug_control_frame, text='')
+        self.debug_status_label.pack(side=tk.LEFT, padx=10)
+        
+        columns = ('name', 'count', 'p50', 'p90', 'p99', 'max')
+        self.debug_tree = ttk.Treeview(
+            self.debug_frame,
+            columns=columns,
+            show='headings',
+            height=20
+        )
+        self.update_debug_headings()
+        self.debug_tree.column('name', width=220)
+        for column in columns[1:]:
+            self.debug_tree.column(column, width=90)
+        self.debug_tree.pack(fill=tk.BOTH, expand=True)
+        
+        self.debug_sync = TreeviewSync(
+            self.debug_tree,
+            lambda row: (
+                row['name'],
+                row['count'],
+                f"{row['p50_ms']:.2f}",
+                f"{row['p90_ms']:.2f}",
+                f"{row['p99_ms']:.2f}",
+                f"{row['max_ms']:.2f}"
+            ),
+            {'name': lambda row: row['name']},
+            'name',
+            reverse=False,
+            key='name'
+        )
+    
+    def update_debug_headings(self):
+        for column in ('count', 'p50', 'p90', 'p99', 'max'):
+            self.debug_tree.heading(column, text=self.get_localized_text(column))
+        self.debug_tree.heading('name', text=self.get_localized_text('measurement'))
+    
+    def toggle_debug_tab(self, event=None):
+        if self.notebook.tab(self.debug_frame, 'state') == 'hidden':
+            self.notebook.add(self.debug_frame)
+            self.notebook.select(self.debug_frame)
+        else:
+            self.notebook.hide(self.debug_frame)
+    
+    def refresh_debug_tab(self):
+        self.debug_job = None
+        if self.notebook.select() != str(self.debug_frame):
+            return
+        
+        if self.instruments:
+            rows = [dict(histogram.summary(), name=name) for name, histogram in self.instruments.histograms.items()]
+            self.debug_sync.sync(rows)
+            self.debug_status_label.config(text=self.get_localized_text('timing_label').format(
+                self.late_ticks, self.collector.missed_ticks))
+        else:
+            self.debug_status_label.config(text=self.get_localized_text('instrumentation_off'))
+        self.debug_job = self.root.after(1000, self.refresh_debug_tab)
+    
+    def export_instrumentation(self):
+        if not self.instruments:
+            return
+        path = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[('JSON', '*.json')])
+        if not path:
+            return
+        report = self.instruments.export({
+            'late_frames': self.late_ticks,
+            'missed_samples': self.collector.missed_ticks,
+            'sample_interval_ms': self.settings['sample_interval_ms'],
+            'render_interval_ms': self.settings['render_interval_ms'],
+            'sampling_intervals_s': self.scheduler.intervals() if self.scheduler else None
+        })
+        try:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+    
+    def install_instrumentation(self):
+        if not self.instruments:
+            return
+        self.instruments.instrument(self, 'update_data', 'update_data')
+        self.instruments.instrument(self, 'update_plot', 'update_plot')
+        self.instruments.instrument(self.canvas, 'draw', 'canvas.draw')
+        if not self.replay:
+            self.instruments.instrument(self.collector, 'sample', 'sample (psutil)')
+        self.instruments.instrument(self.process_snapshot, 'scan', 'process scan')
+        self.instruments.instrument(self.process_history, 'record', 'process history')
+        if self.process_anomalies:
+            self.instruments.instrument(self.process_anomalies, 'update', 'process anomalies')
+        if self.enricher:
+            self.instruments.instrument(self.enricher, 'update', 'process enrichment')
+        self.instruments.instrument(self.process_query_index, 'update', 'process query index')
+        if self.cgroups:
+            self.instruments.instrument(self.cgroups, 'update', 'cgroup stats')
+        if self.fleet:
+            self.instruments.instrument(self.fleet_sync, 'sync', 'treeview: fleet')
+    
+    def heartbeat(self):
+        # How late Tk runs a timer is how long every other callback had to wait for the event loop.
+        now = time.monotonic()
+        if self.heartbeat_due is not None:
+            self.instruments.record('tk event loop lag', max(now - self.heartbeat_due, 0))
+        self.heartbeat_due = now + HEARTBEAT_INTERVAL
+        self.heartbeat_job = self.root.after(int(HEARTBEAT_INTERVAL * 1000), self.heartbeat)
+    
+    def process_window_names(self):
+        return [self.get_localized_text('window_now')] + [
+            self.get_localized_text('window_minutes').format(seconds // 60) for seconds in WINDOWS]
+    
+    def set_process_window(self, event=None):
+        index = self.process_window_combo.current()
+        self.process_snapshot.window = WINDOWS[index - 1] if index > 0 else None
+        if index > 0:
+            self.process_snapshot.request_refresh()
+        else:
+            self.filter_processes()
+    
+    def setup_alerts_tab(self):
+        alerts_control_frame = ttk.Frame(self.alerts_frame)
+        alerts_control_frame.pack(fill=tk.X, pady=5)
+        
+        self.alerts_clear_btn = ttk.Button(
+            alerts_control_frame,
+            text=self.get_localized_text('clear'),
+            command=lambda: self.alerts_tree.delete(*self.alerts_tree.get_children())
+        )
+        self.alerts_clear_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.alerts_tree = ttk.Treeview(
+            self.alerts_frame,
+            columns=('time', 'rule', 'message'),
+            show='headings',
+            height=20
+        )
+        self.update_alerts_headings()
+        self.alerts_tree.column('time', width=140)
+        self.alerts_tree.column('rule', width=120)
+        self.alerts_tree.column('message', width=500)
+        
+        alerts_scrollbar = ttk.Scrollbar(self.alerts_frame, orient=tk.VERTICAL, command=self.alerts_tree.yview)
+        self.alerts_tree.configure(yscrollcommand=alerts_scrollbar.set)
+        alerts_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.alerts_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    
+    def update_alerts_headings(self):
+        self.alerts_tree.heading('time', text=self.get_localized_text('alert_time'))
+        self.alerts_tree.heading('rule', text=self.get_localized_text('alert_rule'))
+        self.alerts_tree.heading('message', text=self.get_localized_text('alert_message'))
+    
+    def update_alerts_tab_text(self):
+        if self.unseen_alerts:
+            text = self.get_localized_text('alerts_count').format(self.unseen_alerts)
+        else:
+            text = self.get_localized_text('alerts')
+        self.notebook.tab(self.alerts_frame, text=text)
+    
+    def setup_fleet_tab(self):
+        columns = ('host', 'connection', 'cpu', 'memory', 'disk', 'sent', 'received', 'processes')
+        self.fleet_tree = ttk.Treeview(
+            self.fleet_frame,
+            columns=columns,
+            show='headings',
+            height=20
+        )
+        self.update_fleet_headings()
+        
+        for column in columns:
+            self.fleet_tree.column(column, width=90)
+        self.fleet_tree.column('host', width=200)
+        
+        # Listen errors are shown here rather than in a dialog, since they turn up during the render tick.
+        self.fleet_status_label = ttk.Label(self.fleet_frame, text="", foreground="red")
+        self.fleet_status_label.pack(side=tk.TOP, fill=tk.X)
+        
+        fleet_scrollbar = ttk.Scrollbar(self.fleet_frame, orient=tk.VERTICAL, command=self.fleet_tree.yview)
+        self.fleet_tree.configure(yscrollcommand=fleet_scrollbar.set)
+        fleet_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.fleet_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.fleet_sync = TreeviewSync(
+            self.fleet_tree,
+            lambda host: (
+                host['host'],
+                self.get_localized_text('online' if host['connected'] else 'offline'),
+                f"{host['cpu_percent']:.1f}",
+                f"{host['memory_percent']:.1f}",
+                f"{host['disk_percent']:.1f}",
+                f"{host['bytes_sent']:.1f}",
+                f"{host['bytes_recv']:.1f}",
+                host['processes']
+            ),
+            {
+                'host': lambda host: host['host'],
+                'connection': lambda host: host['connected'],
+                'cpu': lambda host: host['cpu_percent'],
+                'memory': lambda host: host['memory_percent'],
+                'disk': lambda host: host['disk_percent'],
+                'sent': lambda host: host['bytes_sent'],
+                'received': lambda host: host['bytes_recv'],
+                'processes': lambda host: host['processes']
+            },
+            'cpu',
+            key='host'
+        )
+        for column in columns:
+            self.fleet_tree.heading(column, command=lambda column=column: self.fleet_sync.sort_by(column))
+        
+        self.fleet_tree.bind('<Double-1>', self.on_fleet_double_click)
+    
+    def update_fleet_headings(self):
+        self.fleet_tree.heading('host', text=self.get_localized_text('host'))
+        self.fleet_tree.heading('connection', text=self.get_localized_text('connection'))
+        self.fleet_tree.heading('cpu', text=self.get_localized_text('cpu_percent'))
+        self.fleet_tree.heading('memory', text=self.get_localized_text('memory_percent'))
+        self.fleet_tree.heading('disk', text=self.get_localized_text('disk_select') + " %")
+        self.fleet_tree.heading('sent', text=self.get_localized_text('sent_rate'))
+        self.fleet_tree.heading('received', text=self.get_localized_text('received_rate'))
+        self.fleet_tree.heading('processes', text=self.get_localized_text('process_count'))
+    
+    def on_fleet_double_click(self, event):
+        item = self.fleet_tree.identify_row(event.y)
+        if not item:
+            return
+        hostname = self.fleet_tree.item(item, 'values')[0]
+        hosts = sorted(self.fleet.hosts)
+        self.host_combo.current(hosts.index(hostname) + 1)
+        self.select_host(hosts.index(hostname) + 1)
+    
+    def select_host(self, index):
+        self.selected_host = sorted(self.fleet.hosts)[index - 1] if index > 0 else None
+        self.process_views_generation = None
+        if self.apps_tab_built:
+            self.on_app_selection(None)
+        self.update_plot()
+    
+    def update_fleet(self):
+        status = f"{self.get_localized_text('aggregator_error')} {self.aggregator.error}" if self.aggregator.error else ""
+        if self.fleet_status_label.cget('text') != status:
+            self.fleet_status_label.config(text=status)
+        
+        known_hosts = len(self.fleet.hosts)
+        self.fleet.apply(self.aggregator.drain())
+        if len(self.fleet.hosts) != known_hosts:
+            self.host_combo.config(values=[self.get_localized_text('local_host')] + sorted(self.fleet.hosts))
+        self.fleet_sync.sync(self.fleet.overview())
+    
+    def current_process_source(self):
+        if self.selected_host:
+            return self.fleet.hosts[self.selected_host]
+        return self.replay or self.process_snapshot
+    
+    def current_metric_store(self):
+        if self.selected_host:
+            return self.fleet.hosts[self.selected_host].metric_store
+        return self.metric_store
+    
+    def setup_plot(self, ax, title, color, two_lines=False):
+        ax.set_title(title, color='white' if self.settings['theme'] == 'dark' else 'black')
+        ax.set_ylim(0, 100)
+        ax.grid(True, alpha=0.3)
+        
+        text_color = 'white' if self.settings['theme'] == 'dark' else 'black'
+        ax.tick_params(colors=text_color)
+        ax.xaxis.label.set_color(text_color)
+        ax.yaxis.label.set_color(text_color)
+        
+        if self.settings['theme'] == 'dark':
+            ax.set_facecolor('#1e1e1e')
+            for spine in ax.spines.values():
+                spine.set_color('white')
+        else:
+            ax.set_facecolor('white')
+            for spine in ax.spines.values():
+                spine.set_color('black')
+        
+        ax.set_xlim(-CHART_SPANS[self.settings['chart_span']], 0)
+        ax.xaxis.set_major_formatter(FuncFormatter(format_age))
+        
+        if two_lines:
+            ax.set_ylim(0, 1000)
+            sent_label = self.get_localized_text('network_sent')
+            received_label = self.get_localized_text('network_received')
+            lines = [
+                ax.plot([], [], color=color, linewidth=2, label=sent_label, animated=self.use_blit)[0],
+                ax.plot([], [], color='orange', linewidth=2, label=received_label, animated=self.use_blit)[0]
+            ]
+            ax.legend(facecolor='#1e1e1e' if self.settings['theme'] == 'dark' else 'white', 
+                     labelcolor=text_color)
+        else:
+            lines = [ax.plot([], [], color=color, linewidth=2, animated=self.use_blit)[0]]
+        
+        return lines
+    
+    def on_canvas_draw(self, event):
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            self.root.after_idle(self.on_first_paint)
+        
+        if not self.use_blit:
+            return
+        
+        # A full draw (resize, theme or language change) invalidates the cached backgrounds.
+        self.backgrounds = {ax: self.canvas.copy_from_bbox(ax.bbox) for ax, _ in self.plot_lines}
+        for ax, lines in self.plot_lines:
+            for line, _ in lines:
+                ax.draw_artist(line)
+            for marker, _ in self.anomaly_markers[ax]:
+                ax.draw_artist(marker)
+    
+    def setup_replay_bar(self, control_frame):
+        reader = self.replay.reader
+        self.replay_label = ttk.Label(control_frame, text=self.get_localized_text('replay'))
+        self.replay_label.pack(side=tk.LEFT, padx=5)
+        
+        self.replay_var = tk.DoubleVar(value=reader.start)
+        self.replay_scale = ttk.Scale(control_frame, from_=reader.start, to=max(reader.end, reader.start + 1),
+                                      variable=self.replay_var, length=300,
+                                      command=lambda value: self.update_replay_position(float(value)))
+        self.replay_scale.pack(side=tk.LEFT, padx=5)
+        # Seeking decodes a block and rebuilds the stores, so it happens when the slider is released.
+        self.replay_scale.bind('<ButtonRelease-1>', lambda event: self.seek_replay(self.replay_var.get()))
+        self.replay_dragging = False
+        self.replay_scale.bind('<ButtonPress-1>', lambda event: setattr(self, 'replay_dragging', True))
+        
+        self.replay_position_label = ttk.Label(control_frame, width=20)
+        self.replay_position_label.pack(side=tk.LEFT, padx=5)
+        
+        self.replay_speed_label = ttk.Label(control_frame, text=self.get_localized_text('replay_speed'))
+        self.replay_speed_label.pack(side=tk.LEFT, padx=5)
+        
+        self.replay_speed_var = tk.StringVar(value=f"{self.replay.speed:g}x")
+        speed_combo = ttk.Combobox(control_frame, textvariable=self.replay_speed_var, state='readonly', width=6,
+                                   values=[f"{speed}x" for speed in REPLAY_SPEEDS])
+        speed_combo.pack(side=tk.LEFT, padx=5)
+        speed_combo.bind('<<ComboboxSelected>>',
+                         lambda event: setattr(self.replay, 'speed', float(self.replay_speed_var.get()[:-1])))
+        
+        self.seek_replay(reader.start)
+    
+    def update_replay_position(self, position):
+        self.replay_position_label.config(text=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(position)))
+    
+    def seek_replay(self, position):
+        self.replay_dragging = False
+        position = self.replay.seek(position)
+        
+        # The stores only grow forward, so they are rebuilt from the file up to the new position.
+        self.metric_store = MetricStore()
+        self.core_store = DeviceStore()
+        self.disk_store = DeviceStore()
+        self.nic_store = DeviceStore()
+        span = min(CHART_SPANS[self.settings['chart_span']], REPLAY_BACKFILL)
+        self.store_samples(self.replay.reader.samples(position - span, position))
+        if self.metric_anomalies:
+            # The detector only moves forward in time; after a seek it learns the recording again.
+            self.reset_metric_anomalies()
+        self.replay_var.set(position)
+        self.update_replay_position(position)
+        if self.first_paint_done:
+            self.update_plot()
+    
+    def now(self):
+        return self.replay.position if self.replay else time.time()
+    
+    def set_chart_span(self, span):
+        self.settings['chart_span'] = span
+        self.save_settings()
+        for ax, _ in self.plot_lines:
+            ax.set_xlim(-CHART_SPANS[span], 0)
+        self.update_plot_lines()
+        self.canvas.draw()
+        if self.hardware_tab_built:
+            self.heatmaps.set_span(CHART_SPANS[span])
+        if self.cgroups_tab_built:
+            self.cgroup_heatmap.set_span(CHART_SPANS[span])
+    
+    def toggle_pause(self):
+        self.is_paused = not self.is_paused
+        
+        if self.is_paused:
+            self.pause_btn.config(text=self.get_localized_text('resume'))
+            self.collector.pause()
+            if self.render_job:
+                self.root.after_cancel(self.render_job)
+                self.render_job = None
+        else:
+            self.pause_btn.config(text=self.get_localized_text('pause'))
+            self.collector.resume()
+            self.schedule_render()
+    
+    def start_monitoring(self):
+        self.collector.start()
+        if self.recorder:
+            self.recorder.start()
+        if self.aggregator:
+            self.aggregator.start()
+        if self.instruments:
+            self.heartbeat()
+        self.schedule_render()
+    
+    def on_first_paint(self):
+        if self.profiler:
+            self.profiler.mark('first paint')
+        # Warm the process snapshot in the background so the lazy tabs open with data.
+        self.start_process_snapshot()
+    
+    def start_process_snapshot(self):
+        if self.process_snapshot.is_alive() or self.process_snapshot.stop_event.is_set():
+            return
+        if self.replay:
+            # Replayed tables come from the session file; the live scanner never runs.
+            self.process_snapshot.stop_event.set()
+        else:
+            self.process_snapshot.start()
+        self.poll_process_snapshot()
+    
+    def stop_monitoring(self):
+        self.collector.stop()
+        self.process_snapshot.stop()
+        if self.recorder:
+            # The last, partial block is written on the way out.
+            self.recorder.stop()
+            self.recorder.join(timeout=5)
+        if self.aggregator:
+            self.aggregator.stop()
+        for job in (self.heartbeat_job, self.debug_job):
+            if job:
+                self.root.after_cancel(job)
+        if self.collector.is_alive():
+            self.collector.join(timeout=2)
+        if self.render_job:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+    
+    def schedule_render(self):
+        self.render_interval = self.settings['render_interval_ms'] / 1000
+        if self.scheduler and not self.chart_visible() and not self.heatmaps_visible():
+            # Hidden charts only need to drain samples, which arrive at the slower hidden cadence.
+            self.render_interval = max(self.render_interval, self.scheduler.interval('metrics'))
+        self.next_render_time = time.monotonic() + self.render_interval
+        self.render_job = self.root.after(int(self.render_interval * 1000), self.render_tick)
+    
+    def reschedule_render(self):
+        # A chart that just became visible should not wait out the hidden cadence.
+        if self.render_job and not self.is_paused:
+            self.root.after_cancel(self.render_job)
+            self.schedule_render()
+    
+    def chart_visible(self):
+        return self.window_mapped and self.notebook.select() == str(self.monitor_frame)
+    
+    def heatmaps_visible(self):
+        return self.window_mapped and self.hardware_tab_built and self.notebook.select() == str(self.hardware_frame)
+    
+    def on_window_state(self, event):
+        # <Map> and <Unmap> on the root are also delivered for every child widget.
+        if event.widget is not self.root:
+            return
+        self.window_mapped = event.type == tk.EventType.Map
+        self.update_watched()
+        self.reschedule_render()
+    
+    def update_watched(self):
+        if not self.scheduler:
+            return
+        selected = self.notebook.select()
+        watched = {
+            'metrics': self.chart_visible(),
+            'devices': self.window_mapped and selected == str(self.hardware_frame),
+            # Process alert rules keep the scanner on its shown budget even when no process tab is open.
+            'processes': (self.window_mapped and selected in (str(self.apps_frame), str(self.processes_frame))
+                          or self.cgroups_tab_built and selected == str(self.cgroups_frame))
+                         or bool(self.alert_engine.process_rules)
+        }
+        shown = [name for name, value in watched.items() if self.scheduler.set_watched(name, value) and value]
+        if 'metrics' in shown or 'devices' in shown:
+            self.collector.wake()
+        if 'processes' in shown:
+            self.process_snapshot.request_refresh()
+    
+    def render_tick(self):
+        lateness = time.monotonic() - self.next_render_time
+        if lateness > self.render_interval / 2:
+            self.late_ticks += 1
+        
+        # Samples still feed the stores and alerts, but nothing is drawn that nobody can see.
+        if self.chart_visible():
+            self.update_plot()
+        else:
+            self.update_data()
+        if self.heatmaps_visible():
+            self.update_heatmaps()
+        self.schedule_render()
+    
+    def get_applications(self):
+        source = self.current_process_source()
+        cached_source, generation, applications = self.applications_cache
+        if cached_source is source and generation == source.generation:
+            return applications
+        
+        common_apps = set(self.get_common_apps())
+        applications = []
+        for proc in source.get():
+            if proc['name'].lower() in common_apps or self.has_windows(proc):
+                applications.append({
+                    'pid': proc['pid'],
+                    'name': proc['name'],
+                    'title': self.get_window_title(proc['pid']),
+                    'cpu_percent': proc['cpu_percent'],
+                    'memory_mb': proc['memory_mb'],
+                    'create_time': proc.get('create_time')
+                })
+        
+        self.applications_cache = (source, source.generation, applications)
+        return applications
+    
+    def get_common_apps(self):
+        return [
+            'chrome.exe', 'firefox.exe', 'msedge.exe', 'opera.exe',
+            'code.exe', 'pycharm.exe', 'idea.exe', 'clion.exe',
+            'notepad++.exe', 'notepad.exe', 'word.exe', 'excel.exe',
+            'powerpnt.exe', 'outlook.exe', 'teams.exe', 'discord.exe',
+            'spotify.exe', 'vlc.exe', 'winword.exe', 'excel.exe',
+            'devenv.exe', 'androidstudio.exe', 'figma.exe',
+            'telegram.exe', 'whatsapp.exe', 'slack.exe'
+        ]
+    
+    def has_windows(self, proc):
+        return proc['memory_mb'] > 50
+    
+    def get_window_title(self, pid):
+        try:
+            return f"Process {pid}"
+        except:
+            return "Unknown"
+    
+    def refresh_applications(self):
+        self.process_snapshot.request_refresh()
+    
+    def filter_applications(self, *args):
+        query = self.compile_search(self.apps_search_var.get(), ('name', 'title'))
+        applications = self.get_applications()
+        
+        if query:
+            applications = [app for app in applications if query.predicate(app)]
+        
+        self.apps_sync.sync(applications)
+    
+    def compile_search(self, text, default_fields):
+        text = text.strip()
+        if not text or text == self.get_localized_text('search'):
+            return None
+        try:
+            return compile_query(text, default_fields)
+        except QueryError:
+            # A half-typed query still searches, as plain text.
+            return literal_query(text, default_fields)
+    
+    def debounce_search(self, name, callback):
+        job = self.search_jobs.pop(name, None)
+        if job:
+            self.root.after_cancel(job)
+        self.search_jobs[name] = self.root.after(self.settings['search_debounce_ms'], callback)
+    
+    def poll_process_snapshot(self):
+        if self.profiler and not self.startup_reported and self.process_snapshot.generation:
+            self.startup_reported = True
+            self.profiler.record('first scan (background)', self.process_snapshot.scan_duration)
+            self.profiler.report()
+        
+        if self.process_snapshot.generation != self.alert_generation:
+            self.alert_generation = self.process_snapshot.generation
+            if self.recorder:
+                self.recorder.add_processes(time.time(), self.process_snapshot.get())
+            if not self.is_paused and not self.replay:
+                processes = self.process_snapshot.get()
+                self.show_alerts(self.alert_engine.evaluate_processes(processes) + self.leak_alerts(processes))
+            if self.cgroups_tab_built:
+                self.update_cgroups_tab()
+        
+        if self.enricher:
+            self.enricher.visible = self.visible_process_keys()
+        
+        source = self.current_process_source()
+        generation = (id(source), source.generation)
+        if generation != self.process_views_generation:
+            self.process_views_generation = generation
+            if self.apps_tab_built:
+                self.filter_applications()
+            if self.processes_tab_built:
+                self.filter_processes()
+        self.root.after(200, self.poll_process_snapshot)
+    
+    def visible_process_keys(self):
+        if not self.processes_tab_built or self.notebook.select() != str(self.processes_frame):
+            return ()
+        if self.settings['process_tree_view']:
+            records = [record for sync in self.process_tree_syncs.values() for record in sync.records.values()]
+        else:
+            table = self.process_table
+            records = table.records[table.offset:table.offset + len(table.rows)]
+        return tuple((record['pid'], record.get('create_time')) for record in records)
+    
+    def on_app_selection(self, event):
+        selection = self.apps_tree.selection()
+        if selection and not self.selected_host:
+            self.end_task_btn.config(state='normal')
+            self.apps_end_tree_btn.config(state='normal')
+        else:
+            self.end_task_btn.config(state='disabled')
+            self.apps_end_tree_btn.config(state='disabled')
+    
+    def end_selected_task(self):
+        self.end_processes(self.selected_applications())
+    
+    def selected_applications(self):
+        items = {item: pid for pid, item in self.apps_sync.items.items()}
+        return [self.apps_sync.records[items[item]] for item in self.apps_tree.selection() if item in items]
+    
+    def selected_processes(self):
+        if self.settings['process_tree_view']:
+            selection = set(self.process_tree.selection())
+            return [sync.records[pid] for sync in self.process_tree_syncs.values()
+                    for pid, item in sync.items.items() if item in selection]
+        return self.process_table.selected_records()
+    
+    def end_processes(self, records, tree=False):
+        if not records or self.selected_host or self.replay:
+            return
+        
+        if tree:
+            message = self.get_localized_text('end_tree_confirm').format(len(records))
+        elif len(records) == 1:
+            message = self.get_localized_text('end_task_confirm')
+        else:
+            message = self.get_localized_text('end_tasks_confirm').format(len(records))
+        listing = '\n'.join(f"{record['name']} (PID: {record['pid']})" for record in records[:10])
+        if len(records) > 10:
+            listing += '\n…'
+        if not messagebox.askyesno(self.get_localized_text('end_tree' if tree else 'end_task'), f"{message}\n{listing}"):
+            return
+        
+        # Signals, waiting and escalation run on their own thread; the window only polls the results.
+        terminator = ProcessTerminator([(record['pid'], record.get('create_time')) for record in records], tree,
+                                       self.settings['terminate_timeout_s'])
+        terminator.start()
+        self.show_termination(terminator)
+    
+    def show_termination(self, terminator):
+        window = tk.Toplevel(self.root)
+        window.title(self.get_localized_text('termination'))
+        window.geometry("520x360")
+        
+        progress = ttk.Progressbar(window, maximum=max(terminator.total, 1))
+        progress.pack(fill=tk.X, padx=10, pady=(10, 5))
+        label = ttk.Label(window)
+        label.pack(anchor=tk.W, padx=10)
+        
+        columns = ('pid', 'name', 'result')
+        report = ttk.Treeview(window, columns=columns, show='headings')
+        report.heading('pid', text=self.get_localized_text('pid'))
+        report.heading('name', text=self.get_localized_text('name'))
+        report.heading('result', text=self.get_localized_text('result'))
+        report.column('pid', width=80)
+        report.column('name', width=160)
+        report.column('result', width=240)
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=report.yview)
+        report.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
+        report.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0), pady=10)
+        
+        self.poll_termination(terminator, window, progress, label, report, 0)
+    
+    def poll_termination(self, terminator, window, progress, label, report, shown):
+        if not window.winfo_exists():
+            return
+        # done is read first: once it is set, every result is already in the list.
+        done = terminator.done
+        results = terminator.results[shown:]
+        for result in results:
+            report.insert('', 'end', values=(result['pid'], result['name'],
+                                             self.get_localized_text(f"result_{result['result']}")))
+        shown += len(results)
+        progress.config(maximum=max(terminator.total, 1), value=shown)
+        
+        if done:
+            counts = Counter(result['result'] for result in terminator.results)
+            label.config(text=self.get_localized_text('termination_done').format(
+                counts[TERMINATED] + counts[GONE], counts[KILLED], counts[DENIED] + counts[ALIVE]))
+            self.process_snapshot.request_refresh()
+            return
+        label.config(text=self.get_localized_text('termination_progress').format(shown, terminator.total))
+        self.root.after(100, lambda: self.poll_termination(terminator, window, progress, label, report, shown))
+    
+    def get_processes(self):
+        source = self.current_process_source()
+        if source is self.process_snapshot and source.window:
+            return source.window_processes
+        return source.get()
+    
+    def refresh_processes(self):
+        self.process_snapshot.request_refresh()
+    
+    def filter_processes(self, *args):
+        query = self.compile_search(self.process_search_var.get(), ('name',))
+        processes = self.get_processes()
+        # The snapshot thread only keeps the index up to date while a query on its list is active.
+        self.process_query_index.wanted = query if self.current_process_source() is self.process_snapshot else None
+        
+        matches = None
+        if query:
+            matches = self.process_query_index.filter(query, processes)
+            if matches is None:
+                # Averaged windows, other hosts and the first scan after a new query aren't indexed.
+                matches = [proc for proc in processes if query.predicate(proc)]
+        
+        if self.settings['process_tree_view']:
+            # Matches are shown with their ancestors, so the tree keeps its shape while searching.
+            pids = {proc['pid'] for proc in matches} if query else None
+            self.sync_process_tree(processes, (lambda proc: proc['pid'] in pids) if query else None)
+            return
+        
+        self.process_table.sync(processes if matches is None else matches)
+    
+    def apply_filter_preset(self, event=None):
+        text = self.settings['filter_presets'].get(self.process_preset_combo.get())
+        if text is not None:
+            self.process_search_var.set(text)
+    
+    def save_filter_preset(self):
+        text = self.process_search_var.get().strip()
+        if not text or text == self.get_localized_text('search'):
+            return
+        name = simpledialog.askstring(self.get_localized_text('save_preset'), self.get_localized_text('preset_name'),
+                                      initialvalue=self.process_preset_combo.get(), parent=self.root)
+        if not name or not name.strip():
+            return
+        self.settings['filter_presets'][name.strip()] = text
+        self.save_settings()
+        self.process_preset_combo.config(values=sorted(self.settings['filter_presets']))
+        self.process_preset_combo.set(name.strip())
+    
+    def delete_filter_preset(self):
+        name = self.process_preset_combo.get()
+        if self.settings['filter_presets'].pop(name, None) is None:
+            return
+        self.save_settings()
+        self.process_preset_combo.config(values=sorted(self.settings['filter_presets']))
+        self.process_preset_combo.set('')
+    
+    def apply_theme(self):
+        if self.settings['theme'] == 'dark':
+            self.root.configure(bg='#2b2b2b')
+            self.fig.patch.set_facecolor('#2b2b2b')
+            
+            style = ttk.Style()
+            style.configure('TFrame', background='#2b2b2b')
+            style.configure('TLabel', background='#2b2b2b', foreground='white')
+            style.configure('TButton', background='#404040', foreground='white')
+            style.configure('TCombobox', background='#404040', foreground='white')
+            style.configure('Treeview', 
+                          background='#1e1e1e', 
+                          foreground='white',
+                          fieldbackground='#1e1e1e')
+            style.configure('Treeview.Heading',
+                          background='#404040',
+                          foreground='white')
+            
+        else:
+            self.root.configure(bg='SystemButtonFace')
+            self.fig.patch.set_facecolor('white')
+            
+            style = ttk.Style()
+            style.configure('TFrame', background='SystemButtonFace')
+            style.configure('TLabel', background='SystemButtonFace', foreground='black')
+            style.configure('TButton', background='SystemButtonFace', foreground='black')
+            style.configure('TCombobox', background='SystemButtonFace', foreground='black')
+            style.configure('Treeview', 
+                          background='white', 
+                          foreground='black',
+                          fieldbackground='white')
+            style.configure('Treeview.Heading',
+                          background='SystemButtonFace',
+                          foreground='black')
+        
+        self.update_plot_colors()
+        if self.processes_tab_built:
+            self.configure_anomaly_tags()
+        
+        if hasattr(self, 'canvas'):
+            self.canvas.draw()
+        if self.hardware_tab_built:
+            self.heatmaps.set_theme(self.settings['theme'] == 'dark')
+        if self.cgroups_tab_built:
+            self.cgroup_heatmap.set_theme(self.settings['theme'] == 'dark')
+    
+    def update_plot_text(self):
+        self.ax1.set_title(self.get_localized_text('cpu'))
+        self.ax2.set_title(self.get_localized_text('memory'))
+        self.ax3.set_title(self.get_localized_text('disk'))
+        self.ax4.set_title(self.get_localized_text('network'))
+    
+    def update_plot_colors(self):
+        text_color = 'white' if self.settings['theme'] == 'dark' else 'black'
+        bg_color = '#1e1e1e' if self.settings['theme'] == 'dark' else 'white'
+        
+        for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
+            ax.title.set_color(text_color)
+            ax.tick_params(colors=text_color)
+            ax.xaxis.label.set_color(text_color)
+            ax.yaxis.label.set_color(text_color)
+            ax.set_facecolor(bg_color)
+            
+            for spine in ax.spines.values():
+                spine.set_color(text_color)
+            
+            if ax == self.ax4:
+                sent_label = self.get_localized_text('network_sent')
+                received_label = self.get_localized_text('network_received')
+                
+                lines = ax.get_lines()
+                if len(lines) >= 2:
+                    lines[0].set_label(sent_label)
+                    lines[1].set_label(received_label)
+                
+                legend = ax.get_legend()
+                if legend:
+                    legend.remove()
+                ax.legend(facecolor=bg_color, labelcolor=text_color)
+    
+    def open_settings(self):
+        settings_window = tk.Toplevel(self.root)
+        settings_window.title("Settings")
+        settings_window.geometry("450x520")
+        settings_window.resizable(False, False)
+        
+        notebook = ttk.Notebook(settings_window)
+        
+        general_frame = ttk.Frame(notebook)
+        notebook.add(general_frame, text="General")
+        
+        alerts_frame = ttk.Frame(notebook)
+        notebook.add(alerts_frame, text="Alerts")
+        
+        notebook.pack(expand=True, fill='both', padx=10, pady=10)
+        
+        ttk.Label(general_frame, text=self.get_localized_text('language') + ":").pack(pady=5)
+        lang_var = tk.StringVar(value=self.settings['language'])
+        lang_combo = ttk.Combobox(general_frame, textvariable=lang_var, 
+                                 values=['english', 'russian'], state='readonly')
+        lang_combo.pack(pady=5)
+        
+        ttk.Label(general_frame, text=self.get_localized_text('theme') + ":").pack(pady=5)
+        theme_var = tk.StringVar(value=self.settings['theme'])
+        theme_combo = ttk.Combobox(general_frame, textvariable=theme_var,
+                                  values=['light', 'dark'], state='readonly')
+        theme_combo.pack(pady=5)
+        
+        ttk.Label(general_frame, text=self.get_localized_text('disk_select') + ":").pack(pady=5)
+        disks = [partition.mountpoint for partition in psutil.disk_partitions()]
+        disk_var = tk.StringVar(value=self.settings['selected_disk'])
+        disk_combo = ttk.Combobox(general_frame, textvariable=disk_var,
+                                 values=disks, state='readonly')
+        disk_combo.pack(pady=5)
+        
+        ttk.Label(general_frame, text=self.get_localized_text('sample_interval')).pack(pady=5)
+        sample_interval_var = tk.StringVar(value=str(self.settings['sample_interval_ms']))
+        ttk.Entry(general_frame, textvariable=sample_interval_var, width=10).pack(pady=5)
+        
+        ttk.Label(general_frame, text=self.get_localized_text('render_interval')).pack(pady=5)
+        render_interval_var = tk.StringVar(value=str(self.settings['render_interval_ms']))
+        ttk.Entry(general_frame, textvariable=render_interval_var, width=10).pack(pady=5)
+        
+        ttk.Label(alerts_frame, text=self.get_localized_text('alert_thresholds'), 
+                 font=('Arial', 10, 'bold')).pack(pady=10)
+        
+        ttk.Label(alerts_frame, text=self.get_localized_text('cpu_alert')).pack()
+        cpu_alert_var = tk.StringVar(value=str(self.settings['cpu_alert']))
+        cpu_alert_entry = ttk.Entry(alerts_frame, textvariable=cpu_alert_var, width=10)
+        cpu_alert_entry.pack(pady=5)
+        
+        ttk.Label(alerts_frame, text=self.get_localized_text('memory_alert')).pack()
+        memory_alert_var = tk.StringVar(value=str(self.settings['memory_alert']))
+        memory_alert_entry = ttk.Entry(alerts_frame, textvariable=memory_alert_var, width=10)
+        memory_alert_entry.pack(pady=5)
+        
+        ttk.Label(alerts_frame, text=self.get_localized_text('disk_alert')).pack()
+        disk_alert_var = tk.StringVar(value=str(self.settings['disk_alert']))
+        disk_alert_entry = ttk.Entry(alerts_frame, textvariable=disk_alert_var, width=10)
+        disk_alert_entry.pack(pady=5)
+        
+        ttk.Label(alerts_frame, text=self.get_localized_text('alert_sustain')).pack()
+        sustain_var = tk.StringVar(value=str(self.settings['alert_sustain_s']))
+        ttk.Entry(alerts_frame, textvariable=sustain_var, width=10).pack(pady=5)
+        
+        ttk.Label(alerts_frame, text=self.get_localized_text('alert_command')).pack()
+        command_var = tk.StringVar(value=self.settings['alert_command'])
+        ttk.Entry(alerts_frame, textvariable=command_var, width=40).pack(pady=5)
+        
+        def apply_settings():
+            self.settings['language'] = lang_var.get()
+            self.settings['theme'] = theme_var.get()
+            self.settings['selected_disk'] = disk_var.get()
+            
+            try:
+                self.settings['cpu_alert'] = int(cpu_alert_var.get())
+                self.settings['memory_alert'] = int(memory_alert_var.get())
+                self.settings['disk_alert'] = int(disk_alert_var.get())
+                self.settings['alert_sustain_s'] = max(0, int(sustain_var.get()))
+            except ValueError:
+                messagebox.showerror("Error", "Please enter valid numbers for alert thresholds")
+                return
+            
+            try:
+                self.settings['sample_interval_ms'] = max(100, int(sample_interval_var.get()))
+                self.settings['render_interval_ms'] = max(100, int(render_interval_var.get()))
+            except ValueError:
+                messagebox.showerror("Error", "Please enter valid numbers for intervals")
+                return
+            if not self.replay:
+                self.collector.interval = self.settings['sample_interval_ms'] / 1000
+            if self.scheduler:
+                self.scheduler.set_fastest('metrics', self.collector.interval)
+                self.scheduler.set_fastest('devices', self.collector.interval)
+            
+            self.settings['alert_command'] = command_var.get().strip()
+            self.alert_engine.set_rules(default_rules(self.settings))
+            self.alert_sink.command = self.settings['alert_command']
+            self.update_watched()
+            
+            self.save_settings()
+            self.update_ui_text()
+            self.apply_theme()
+            settings_window.destroy()
+        
+        ttk.Button(settings_window, text=self.get_localized_text('apply'), 
+                  command=apply_settings).pack(pady=20)
+    
+    def update_ui_text(self):
+        self.root.title(self.get_localized_text('title'))
+        self.update_plot_text()
+        self.span_label.config(text=self.get_localized_text('time_span'))
+        self.settings_btn.config(text=self.get_localized_text('settings'))
+        self.pause_btn.config(text=self.get_localized_text('resume') if self.is_paused else self.get_localized_text('pause'))
+        self.notebook.tab(self.apps_frame, text=self.get_localized_text('applications'))
+        self.notebook.tab(self.processes_frame, text=self.get_localized_text('processes'))
+        self.notebook.tab(self.hardware_frame, text=self.get_localized_text('hardware'))
+        if self.hardware_tab_built:
+            self.heatmaps.set_titles(self.heatmap_titles())
+        if self.cgroups:
+            self.notebook.tab(self.cgroups_frame, text=self.get_localized_text('cgroups'))
+        if self.cgroups_tab_built:
+            self.cgroup_heatmap.set_titles([self.get_localized_text('cgroup_cpu')])
+            self.update_cgroup_headings()
+        
+        self.update_alerts_tab_text()
+        self.update_alerts_headings()
+        self.notebook.tab(self.debug_frame, text=self.get_localized_text('debug'))
+        self.update_debug_headings()
+        self.debug_export_btn.config(text=self.get_localized_text('export_json'))
+        self.debug_reset_btn.config(text=self.get_localized_text('reset'))
+        self.alerts_clear_btn.config(text=self.get_localized_text('clear'))
+        
+        if self.fleet:
+            self.notebook.tab(self.fleet_frame, text=self.get_localized_text('fleet'))
+            self.host_label.config(text=self.get_localized_text('host_select'))
+            self.host_combo.config(values=[self.get_localized_text('local_host')] + sorted(self.fleet.hosts))
+            if not self.selected_host:
+                self.host_var.set(self.get_localized_text('local_host'))
+            self.update_fleet_headings()
+        if self.replay:
+            self.replay_label.config(text=self.get_localized_text('replay'))
+            self.replay_speed_label.config(text=self.get_localized_text('replay_speed'))
+        
+        if self.apps_tab_built:
+            self.apps_refresh_btn.config(text=self.get_localized_text('refresh'))
+            self.end_task_btn.config(text=self.get_localized_text('end_task'))
+            self.apps_end_tree_btn.config(text=self.get_localized_text('end_tree'))
+            
+            self.apps_tree.heading('pid', text=self.get_localized_text('pid'))
+            self.apps_tree.heading('name', text=self.get_localized_text('name'))
+            self.apps_tree.heading('title', text=self.get_localized_text('window_title'))
+            self.apps_tree.heading('cpu', text=self.get_localized_text('cpu_percent'))
+            self.apps_tree.heading('memory', text=self.get_localized_text('memory_usage'))
+            
+            self.apps_sync.refresh_placeholder_text()
+            
+            self.apps_search_entry.delete(0, tk.END)
+            self.apps_search_entry.insert(0, self.get_localized_text('search'))
+        
+        if self.processes_tab_built:
+            self.process_refresh_btn.config(text=self.get_localized_text('refresh'))
+            self.process_end_btn.config(text=self.get_localized_text('end_task'))
+            self.process_end_tree_btn.config(text=self.get_localized_text('end_tree'))
+            
+            self.process_tree.heading('pid', text=self.get_localized_text('pid'))
+            self.process_tree.heading('name', text=self.get_localized_text('name'))
+            self.process_tree.heading('status', text=self.get_localized_text('status'))
+            self.process_tree.heading('cpu', text=self.get_localized_text('cpu_percent'))
+            self.process_tree.heading('memory', text=self.get_localized_text('memory_percent'))
+            self.process_tree.heading('io', text=self.get_localized_text('io_rate'))
+            self.process_tree.heading('trend', text=self.get_localized_text('cpu_trend'))
+            for column in ('threads', 'fds', 'connections', 'uss'):
+                self.process_tree.heading(column, text=self.get_localized_text(column))
+            self.process_tree.heading('#0', text=self.get_localized_text('name'))
+            self.process_tree_check.config(text=self.get_localized_text('tree_view'))
+            self.process_preset_label.config(text=self.get_localized_text('presets'))
+            self.process_save_preset_btn.config(text=self.get_localized_text('save_preset'))
+            self.process_delete_preset_btn.config(text=self.get_localized_text('delete_preset'))
+            
+            self.process_window_label.config(text=self.get_localized_text('average_over'))
+            index = self.process_window_combo.current()
+            self.process_window_combo.config(values=self.process_window_names())
+            self.process_window_combo.current(index)
+            
+            self.process_search_entry.delete(0, tk.END)
+            self.process_search_entry.insert(0, self.get_localized_text('search'))
+    
+    def check_alerts(self):
+        # A replay shows what was recorded; alerts from the past would read as live ones.
+        if self.is_paused or self.replay:
+            return
+        self.show_alerts(self.alert_engine.evaluate(self.metric_store))
+    
+    def format_alert(self, alert):
+        rule = alert['rule']
+        if 'message' in rule:
+            return rule['message'].format(**alert)
+        if rule['kind'] == 'anomaly':
+            return self.get_localized_text('leak_alert').format(alert['process'], alert['pid'], alert['value'])
+        if 'pid' in alert:
+            return self.get_localized_text('process_alert').format(
+                alert['process'], alert['pid'], rule['field'], alert['value'])
+        if rule['kind'] == 'rate':
+            return self.get_localized_text('rate_alert').format(rule['series'], alert['value'])
+        if rule['name'] in ('cpu', 'memory', 'disk'):
+            return self.get_localized_text(f"high_{rule['name']}").format(round(alert['value'], 1))
+        return self.get_localized_text('rule_alert').format(rule['series'], alert['value'])
+    
+    def show_alerts(self, alerts):
+        for alert in alerts:
+            message = self.format_alert(alert)
+            if not self.alert_sink.deliver(alert, message):
+                continue
+            stamp = time.strftime('%H:%M:%S', time.localtime(alert['time']))
+            self.alerts_tree.insert('', 0, values=(stamp, alert['rule']['name'], message))
+            self.unseen_alerts += 1
+        
+        if alerts:
+            rows = self.alerts_tree.get_children()
+            if len(rows) > 500:
+                self.alerts_tree.delete(*rows[500:])
+            if self.notebook.select() == str(self.alerts_frame):
+                self.unseen_alerts = 0
+            self.update_alerts_tab_text()
+    
+    def store_samples(self, samples):
+        for sample in samples:
+            self.metric_store.append_sample(sample)
+            if 'cores' in sample:
+                self.core_store.append(sample['time'], [str(core) for core in range(len(sample['cores']))],
+                                       sample['cores'])
+                self.disk_store.append_mapping(sample['time'], sample['disks'])
+                self.nic_store.append_mapping(sample['time'], sample['nics'])
+    
+    def reset_metric_anomalies(self):
+        self.metric_anomalies = MetricAnomalies(SERIES, self.settings['anomaly_threshold'],
+                                                self.settings['anomaly_halflife_s'])
+        self.anomaly_points.clear()
+    
+    def detect_anomalies(self, samples):
+        if not self.metric_anomalies:
+            return
+        for sample in samples:
+            flagged = self.metric_anomalies.update(sample)
+            for name, anomalous in zip(SERIES, flagged):
+                if anomalous:
+                    self.anomaly_points.append((sample['time'], name, sample[name]))
+    
+    def leak_alerts(self, processes):
+        now = time.time()
+        leaking = {(proc['pid'], proc['create_time']): proc for proc in processes if proc.get('anomaly') == LEAK}
+        # One alert when a process starts leaking, not one per scan while it keeps growing.
+        alerts = [{
+            'rule': LEAK_RULE,
+            # Keyed by process, not pid, so a reused pid is not held back by the old process's cooldown.
+            'key': f"{LEAK_RULE['name']}:{proc['pid']}:{proc['create_time']}",
+            'time': now,
+            'value': proc['memory_mb'],
+            'pid': proc['pid'],
+            'process': proc['name']
+        } for key, proc in leaking.items() if key not in self.leaking]
+        self.leaking = set(leaking)
+        return alerts
+    
+    def update_data(self):
+        samples = self.collector.drain()
+        
+        self.store_samples(samples)
+        self.detect_anomalies(samples)
+        if self.recorder and samples:
+            self.recorder.add_samples(samples)
+        if self.replay:
+            if not self.replay_dragging:
+                self.replay_var.set(self.replay.position)
+                self.update_replay_position(self.replay.position)
+        elif self.instruments and samples:
+            # Time from the psutil call to the sample reaching the UI thread.
+            self.instruments.record('sample latency', time.time() - samples[0]['time'])
+        
+        latest = samples[-1] if samples else None
+        if latest:
+            self.check_alerts()
+        
+        if self.fleet:
+            self.update_fleet()
+            if self.selected_host:
+                latest = self.fleet.hosts[self.selected_host].latest
+        
+        if latest:
+            self.cpu_label.config(text=self.get_localized_text('cpu_label').format(latest['cpu_percent']))
+            self.memory_label.config(text=self.get_localized_text('memory_label').format(latest['memory_percent']))
+            self.disk_label.config(text=self.get_localized_text('disk_label').format(
+                self.settings['selected_disk'], latest['disk_percent']))
+            self.network_label.config(text=self.get_localized_text('network_label').format(
+                f"{latest['bytes_sent']:.1f}", f"{latest['bytes_recv']:.1f}"))
+        
+        self.timing_label.config(text=self.get_localized_text('timing_label').format(
+            self.late_ticks, self.collector.missed_ticks))
+        
+        return samples
+    
+    def update_plot_lines(self):
+        now = self.now()
+        span = CHART_SPANS[self.settings['chart_span']]
+        times, mins, avgs, maxs = self.current_metric_store().window(span, now)
+        x = times - now
+        for ax, lines in self.plot_lines:
+            for line, column in lines:
+                line.set_data(x, avgs[:, column])
+        
+        # Anomalies are detected on this machine's samples only.
+        points = [point for point in self.anomaly_points if point[0] >= now - span] if not self.selected_host else []
+        for markers in self.anomaly_markers.values():
+            for marker, name in markers:
+                marked = [(point[0] - now, point[2]) for point in points if point[1] == name]
+                marker.set_data([age for age, _ in marked], [value for _, value in marked])
+    
+    def update_plot(self):
+        self.update_data()
+        self.update_plot_lines()
+        
+        if not self.use_blit or not self.backgrounds:
+            self.canvas.draw_idle()
+            return
+        
+        for ax, lines in self.plot_lines:
+            self.canvas.restore_region(self.backgrounds[ax])
+            for line, _ in lines:
+                ax.draw_artist(line)
+            for marker, _ in self.anomaly_markers[ax]:
+                ax.draw_artist(marker)
+            self.canvas.blit(ax.bbox)
+
+def run_gui(profiler=None, overrides=None):
+    root = tk.Tk()
+    app = SystemMonitor(root, profiler, overrides)
+    if profiler:
+        profiler.mark('ui build')
+    
+    def on_close():
+        app.stop_monitoring()
+        root.destroy()
+    
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    app.start_monitoring()
+    
+    root.mainloop()
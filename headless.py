@@ -0,0 +1,130 @@
+import json
+import logging
+import queue
+import struct
+import sys
+
+from collector import MetricsCollector, ProcessSnapshot
+
+# Binary stream: every frame is a little-endian uint32 length, a uint8 frame kind and the payload.
+FRAME_HEADER = struct.Struct('<IB')
+FRAME_METRICS = 1
+FRAME_PROCESSES = 2
+METRICS = struct.Struct('<d5f')
+PROCESSES = struct.Struct('<dI')
+PROCESS = struct.Struct('<Ifff')
+# How often the output loop checks that the collector threads are still running while it waits for a sample.
+POLL_INTERVAL = 1.0
+
+log = logging.getLogger(__name__)
+
+
+def encode_frame(kind, payload):
+    return FRAME_HEADER.pack(len(payload) + 1, kind) + payload
+
+
+def encode_short_string(text):
+    data = (text or '').encode('utf-8')[:255]
+    return bytes([len(data)]) + data
+
+
+def encode_metrics(sample):
+    return encode_frame(FRAME_METRICS, METRICS.pack(
+        sample['time'],
+        sample['cpu_percent'],
+        sample['memory_percent'],
+        sample['disk_percent'],
+        sample['bytes_sent'],
+        sample['bytes_recv']
+    ))
+
+
+def encode_processes(timestamp, processes):
+    parts = [PROCESSES.pack(timestamp, len(processes))]
+    for proc in processes:
+        parts.append(PROCESS.pack(
+            proc['pid'],
+            proc['cpu_percent'] or 0,
+            proc['memory_percent'] or 0,
+            proc['memory_mb']
+        ))
+        parts.append(encode_short_string(proc['name']))
+        parts.append(encode_short_string(proc['status']))
+    return encode_frame(FRAME_PROCESSES, b''.join(parts))
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_metrics(self, sample):
+        self.stream.write(json.dumps(dict(sample, type='metrics')) + '\n')
+        self.stream.flush()
+
+    def write_processes(self, timestamp, processes):
+        self.stream.write(json.dumps({'type': 'processes', 'time': timestamp, 'processes': processes}) + '\n')
+        self.stream.flush()
+
+
+class BinaryWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_metrics(self, sample):
+        self.stream.write(encode_metrics(sample))
+        self.stream.flush()
+
+    def write_processes(self, timestamp, processes):
+        self.stream.write(encode_processes(timestamp, processes))
+        self.stream.flush()
+
+
+def open_output(path, binary):
+    if path == '-':
+        return sys.stdout.buffer if binary else sys.stdout
+    return open(path, 'ab' if binary else 'a')
+
+
+def run_headless(args):
+    binary = args.format == 'binary'
+    stream = open_output(args.output, binary)
+    writer = BinaryWriter(stream) if binary else JsonLinesWriter(stream)
+
+    collector = MetricsCollector({'selected_disk': args.disk}, args.interval)
+    snapshot = ProcessSnapshot(args.process_interval, args.process_backend) if args.processes else None
+    seen_generation = 0
+
+    collector.start()
+    if snapshot:
+        snapshot.start()
+
+    written = 0
+    status = 0
+    try:
+        while args.count is None or written < args.count:
+            try:
+                sample = collector.samples.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                sample = None
+            if sample is None and not collector.is_alive() or snapshot and not snapshot.is_alive():
+                # Waiting on a dead thread would block forever; its traceback is already on stderr.
+                log.error("A collector thread stopped, exiting")
+                status = 1
+                break
+            if sample is None:
+                continue
+            writer.write_metrics(sample)
+            written += 1
+
+            if snapshot and snapshot.generation != seen_generation:
+                seen_generation = snapshot.generation
+                writer.write_processes(sample['time'], snapshot.get())
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        collector.stop()
+        if snapshot:
+            snapshot.stop()
+        if stream not in (sys.stdout, sys.stdout.buffer):
+            stream.close()
+    return status
@@ -0,0 +1,117 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.ticker import FuncFormatter
+
+# Row labels beyond this are thinned out; a 128-core heatmap is read by colour, not by name.
+MAX_ROW_LABELS = 16
+# Samples are resampled onto this many evenly spaced columns across the span.
+COLUMNS = 600
+# A sample is held until the next one, but for no longer than this many typical steps, so pauses stay blank.
+MAX_HOLD = 2
+
+
+def resample(times, values, start, stop, columns=COLUMNS):
+    # The adaptive scheduler, pauses and the coarser tiers space samples unevenly; each column shows the sample
+    # in effect at its centre, so every sample is drawn at its real time.
+    edges = np.linspace(start, stop, columns + 1)
+    centres = (edges[:-1] + edges[1:]) / 2
+    gaps = np.diff(times)
+    step = float(np.median(gaps)) if len(gaps) else 1.0
+    ends = np.minimum(np.append(times[1:], np.inf), times + MAX_HOLD * step)
+    index = np.searchsorted(times, centres, side='right') - 1
+    covered = (index >= 0) & (centres < ends[np.maximum(index, 0)])
+    grid = np.full((columns, values.shape[1]), np.nan)
+    grid[covered] = values[index[covered]]
+    return grid
+
+
+class HeatmapPanel:
+    def __init__(self, master, titles, span, format_x, dark=False, use_blit=True):
+        self.figure = Figure(figsize=(12, 8))
+        self.axes = self.figure.subplots(len(titles), 1, squeeze=False)[:, 0]
+        self.figure.subplots_adjust(left=0.1, right=0.97, top=0.95, bottom=0.06, hspace=0.35)
+        self.images = []
+        self.names = [None] * len(titles)
+        self.span = span
+
+        for ax, title in zip(self.axes, titles):
+            ax.set_title(title)
+            ax.set_xlim(-span, 0)
+            ax.xaxis.set_major_formatter(FuncFormatter(format_x))
+            # One image per group: the cost of a frame depends on pixels, not on how many cores or disks there are.
+            image = ax.imshow(np.zeros((1, 1)), aspect='auto', interpolation='nearest', origin='lower',
+                              cmap='inferno', extent=(-span, 0, -0.5, 0.5), animated=True)
+            self.images.append(image)
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.use_blit = use_blit and self.canvas.supports_blit
+        self.backgrounds = {}
+        self.needs_draw = True
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.set_theme(dark)
+
+    def widget(self):
+        return self.canvas.get_tk_widget()
+
+    def on_draw(self, event):
+        if not self.use_blit:
+            return
+        self.backgrounds = {ax: self.canvas.copy_from_bbox(ax.bbox) for ax in self.axes}
+        for ax, image in zip(self.axes, self.images):
+            ax.draw_artist(image)
+
+    def set_theme(self, dark):
+        text_color = 'white' if dark else 'black'
+        self.figure.patch.set_facecolor('#2b2b2b' if dark else 'white')
+        for ax in self.axes:
+            ax.set_facecolor('#1e1e1e' if dark else 'white')
+            ax.title.set_color(text_color)
+            ax.tick_params(colors=text_color)
+            for spine in ax.spines.values():
+                spine.set_color(text_color)
+        self.needs_draw = True
+
+    def set_titles(self, titles):
+        for ax, title in zip(self.axes, titles):
+            ax.set_title(title)
+        self.needs_draw = True
+
+    def set_span(self, span):
+        self.span = span
+        for ax in self.axes:
+            ax.set_xlim(-span, 0)
+        self.needs_draw = True
+
+    def update(self, index, names, times, values, now, vmax=None):
+        ax = self.axes[index]
+        image = self.images[index]
+        if names != self.names[index]:
+            # Ticks are part of the cached background, so a new device set needs one full redraw.
+            self.names[index] = list(names)
+            step = max(1, -(-len(names) // MAX_ROW_LABELS))
+            ax.set_yticks(range(0, len(names), step))
+            ax.set_yticklabels(names[::step])
+            ax.set_ylim(-0.5, max(len(names), 1) - 0.5)
+            self.needs_draw = True
+
+        if not len(times) or not len(names):
+            image.set_data(np.zeros((1, 1)))
+            return
+        times = np.asarray(times, dtype=float)
+        image.set_data(resample(times - now, values, -self.span, 0).T)
+        image.set_extent((-self.span, 0, -0.5, len(names) - 0.5))
+        if vmax is None:
+            # Samples without a value yet (NaN) are left blank and don't count towards the scale.
+            vmax = max(float(np.max(values, initial=0.0, where=~np.isnan(values))), 1.0)
+        image.set_clim(0, vmax)
+
+    def render(self):
+        if self.needs_draw or not self.use_blit or not self.backgrounds:
+            self.needs_draw = False
+            self.canvas.draw_idle()
+            return
+        for ax, image in zip(self.axes, self.images):
+            self.canvas.restore_region(self.backgrounds[ax])
+            ax.draw_artist(image)
+            self.canvas.blit(ax.bbox)
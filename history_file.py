@@ -0,0 +1,219 @@
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'SMTS'
+VERSION = 1
+HEADER = struct.Struct('<4sHH248s')
+INDEX_STRIDE = 1024
+
+
+def record_dtype(width):
+    return np.dtype([('time', '<f8'), ('values', '<f4', (width,))])
+
+
+def list_segments(directory):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith('segment-') and name.endswith('.bin'))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path}: truncated header")
+    magic, version, width, names = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a history segment")
+    series = names.rstrip(b'\0').decode('ascii').split(',')
+    if len(series) != width:
+        raise ValueError(f"{path}: corrupt series table")
+    return series
+
+
+class HistorySegment:
+    def __init__(self, path):
+        self.path = path
+        self.series = read_header(path)
+        self.dtype = record_dtype(len(self.series))
+        self.map = None
+        self.records = np.empty(0, dtype=self.dtype)
+        self.index = np.empty(0)
+
+        count = (os.path.getsize(path) - HEADER.size) // self.dtype.itemsize
+        if count > 0:
+            with open(path, 'rb') as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.map, dtype=self.dtype, count=count, offset=HEADER.size)
+            # Every INDEX_STRIDE-th timestamp; a lookup binary-searches this, then one block of the map.
+            self.index = self.records['time'][::INDEX_STRIDE].copy()
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def first_time(self):
+        return self.records['time'][0]
+
+    @property
+    def last_time(self):
+        return self.records['time'][-1]
+
+    def locate(self, timestamp, side):
+        block = max(int(np.searchsorted(self.index, timestamp, 'right')) - 1, 0)
+        start = block * INDEX_STRIDE
+        times = self.records['time'][start:start + INDEX_STRIDE]
+        return start + int(np.searchsorted(times, timestamp, side))
+
+    def range(self, start, end):
+        return self.records[self.locate(start, 'left'):self.locate(end, 'right')]
+
+    def close(self):
+        self.records = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class HistoryReader:
+    def __init__(self, directory):
+        self.segments = []
+        for path in list_segments(directory):
+            try:
+                segment = HistorySegment(path)
+            except (OSError, ValueError):
+                continue
+            if len(segment):
+                self.segments.append(segment)
+
+    def query(self, start, end, series):
+        times = []
+        values = []
+        for segment in self.segments:
+            if segment.last_time < start or segment.first_time > end:
+                continue
+            records = segment.range(start, end)
+            # Segments written by an older build may lack newer series; those read back as NaN.
+            columns = np.full((len(records), len(series)), np.nan, dtype=np.float32)
+            for column, name in enumerate(series):
+                if name in segment.series:
+                    columns[:, column] = records['values'][:, segment.series.index(name)]
+            times.append(records['time'].copy())
+            values.append(columns)
+
+        if not times:
+            return np.empty(0), np.empty((0, len(series)), dtype=np.float32)
+        return np.concatenate(times), np.concatenate(values)
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+
+class HistoryWriter:
+    def __init__(self, directory, series, segment_records=86400, retention_segments=14,
+                 batch_size=60, flush_interval=30):
+        self.directory = directory
+        self.series = list(series)
+        self.dtype = record_dtype(len(self.series))
+        self.segment_records = segment_records
+        self.retention_segments = retention_segments
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.fd = None
+        self.segment_count = 0
+
+        header_names = ','.join(self.series).encode('ascii')
+        if len(header_names) > HEADER.size - 8:
+            raise ValueError("too many series for the history header")
+        self.header = HEADER.pack(MAGIC, VERSION, len(self.series), header_names)
+
+        os.makedirs(directory, exist_ok=True)
+        self.reopen_last_segment()
+
+    def reopen_last_segment(self):
+        segments = list_segments(self.directory)
+        if not segments:
+            return
+        path = segments[-1]
+        try:
+            if read_header(path) != self.series:
+                return
+        except (OSError, ValueError):
+            return
+
+        count = (os.path.getsize(path) - HEADER.size) // self.dtype.itemsize
+        if count >= self.segment_records:
+            return
+        # Drop a partially written trailing record left by a crash.
+        os.truncate(path, HEADER.size + count * self.dtype.itemsize)
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        self.segment_count = count
+
+    def append(self, timestamp, values):
+        self.pending.append((timestamp, values))
+        if (len(self.pending) >= self.batch_size
+                or time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def append_sample(self, sample):
+        self.append(sample['time'], [sample[name] for name in self.series])
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+
+        records = np.empty(len(self.pending), dtype=self.dtype)
+        records['time'] = [timestamp for timestamp, _ in self.pending]
+        records['values'] = [values for _, values in self.pending]
+        self.pending = []
+
+        # A batch that crosses the segment boundary is split, so no segment grows past segment_records.
+        while len(records):
+            if self.fd is None or self.segment_count >= self.segment_records:
+                self.rotate(records['time'][0])
+            room = self.segment_records - self.segment_count
+            os.write(self.fd, records[:room].tobytes())
+            self.segment_count += len(records[:room])
+            records = records[room:]
+
+    def rotate(self, timestamp):
+        if self.fd is not None:
+            os.close(self.fd)
+        stamp = int(timestamp * 1000)
+        while True:
+            # Never append to an existing segment: after a clock step or two rotations in the same millisecond
+            # the name is taken, and the next free millisecond keeps the names in order.
+            path = os.path.join(self.directory, f"segment-{stamp:015d}.bin")
+            try:
+                self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+                break
+            except FileExistsError:
+                stamp += 1
+        os.write(self.fd, self.header)
+        self.segment_count = 0
+        self.enforce_retention()
+
+    def enforce_retention(self):
+        segments = list_segments(self.directory)
+        for path in segments[:max(len(segments) - self.retention_segments, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        self.flush()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,107 @@
+import time
+
+# Values are kept in microseconds with 4 significant bits: every bucket is within ~6% of the values it holds.
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_EXPONENT = 40
+
+
+def bucket_index(micros):
+    if micros < SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - SUB_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS
+
+
+def bucket_value(index):
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * ((MAX_EXPONENT + 1) * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = min(int(seconds * 1e6), (1 << MAX_EXPONENT) - 1)
+        self.counts[bucket_index(max(micros, 0))] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return bucket_value(index) / 1e6
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p90_ms': self.percentile(90) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'p999_ms': self.percentile(99.9) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class Instrumentation:
+    def __init__(self):
+        self.histograms = {}
+        self.started = time.time()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def wrap(self, function, name):
+        record = self.histogram(name).record
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(clock() - started)
+        return timed
+
+    def instrument(self, obj, attribute, name):
+        # Shadows the method on this one instance, so every caller, including the object itself, is timed.
+        setattr(obj, attribute, self.wrap(getattr(obj, attribute), name))
+
+    def reset(self):
+        # Reset in place: wrapped methods hold on to their histogram.
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.started = time.time()
+
+    def export(self, extra=None):
+        report = {
+            'started': self.started,
+            'exported': time.time(),
+            'histograms': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+        }
+        report.update(extra or {})
+        return report
@@ -0,0 +1,188 @@
+import math
+
+import numpy as np
+
+from collector import SERIES
+
+# (bucket width in seconds, number of buckets): 1 h at 1 s, 24 h at 10 s, 7 days at 1 min, 30 days at 10 min.
+TIERS = ((1, 3600), (10, 8640), (60, 10080), (600, 4320))
+
+
+class RingBuffer:
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.mins = np.zeros((capacity, width), dtype=np.float32)
+        self.avgs = np.zeros((capacity, width), dtype=np.float32)
+        self.maxs = np.zeros((capacity, width), dtype=np.float32)
+        self.head = 0
+        self.count = 0
+
+    def append(self, timestamp, mins, avgs, maxs):
+        self.times[self.head] = timestamp
+        self.mins[self.head] = mins
+        self.avgs[self.head] = avgs
+        self.maxs[self.head] = maxs
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, times, mins, avgs, maxs):
+        if len(times) > self.capacity:
+            times, mins, avgs, maxs = (column[-self.capacity:] for column in (times, mins, avgs, maxs))
+        rows = (self.head + np.arange(len(times))) % self.capacity
+        self.times[rows] = times
+        self.mins[rows] = mins
+        self.avgs[rows] = avgs
+        self.maxs[rows] = maxs
+        self.head = (self.head + len(times)) % self.capacity
+        self.count = min(self.count + len(times), self.capacity)
+
+    def last(self, n):
+        n = min(n, self.count)
+        start = self.head - n
+        if start >= 0:
+            rows = slice(start, self.head)
+        else:
+            rows = np.r_[start % self.capacity:self.capacity, 0:self.head]
+        return self.times[rows], self.mins[rows], self.avgs[rows], self.maxs[rows]
+
+
+class MetricTier:
+    def __init__(self, resolution, capacity, width):
+        self.resolution = resolution
+        self.buffer = RingBuffer(capacity, width)
+        self.bucket = None
+        self.sum = np.zeros(width, dtype=np.float64)
+        self.min = np.full(width, np.inf)
+        self.max = np.full(width, -np.inf)
+        self.samples = 0
+
+    @property
+    def span(self):
+        return self.resolution * self.buffer.capacity
+
+    def add(self, timestamp, values):
+        bucket = math.floor(timestamp / self.resolution) * self.resolution
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+        self.sum += values
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+        self.samples += 1
+
+    def extend(self, times, values):
+        if not len(times):
+            return
+        buckets = np.floor(times / self.resolution) * self.resolution
+        starts = np.r_[0, np.flatnonzero(np.diff(buckets)) + 1]
+        counts = np.diff(np.r_[starts, len(times)])[:, None]
+        sums = np.add.reduceat(values, starts, axis=0)
+        mins = np.minimum.reduceat(values, starts, axis=0)
+        maxs = np.maximum.reduceat(values, starts, axis=0)
+
+        if self.samples and buckets[0] == self.bucket:
+            # The batch continues the bucket left open by the last call; it is completed, not written twice.
+            sums[0] += self.sum
+            np.minimum(mins[0], self.min, out=mins[0])
+            np.maximum(maxs[0], self.max, out=maxs[0])
+            counts[0] += self.samples
+            self.samples = 0
+        self.flush()
+        self.buffer.extend(buckets[starts][:-1], mins[:-1], sums[:-1] / counts[:-1], maxs[:-1])
+        # The newest bucket stays open so live samples can keep filling it.
+        self.bucket = buckets[starts][-1]
+        self.sum[:] = sums[-1]
+        self.min[:] = mins[-1]
+        self.max[:] = maxs[-1]
+        self.samples = int(counts[-1, 0])
+
+    def flush(self):
+        if not self.samples:
+            return
+        self.buffer.append(self.bucket, self.min, self.sum / self.samples, self.max)
+        self.sum[:] = 0
+        self.min[:] = np.inf
+        self.max[:] = -np.inf
+        self.samples = 0
+
+    def window(self, start):
+        n = math.ceil((self.bucket - start) / self.resolution) + 1 if self.samples else 0
+        times, mins, avgs, maxs = self.buffer.last(n)
+        if self.samples:
+            # The bucket still being filled is part of every query so charts are never a bucket behind.
+            times = np.append(times, self.bucket)
+            mins = np.vstack([mins, self.min])
+            avgs = np.vstack([avgs, self.sum / self.samples])
+            maxs = np.vstack([maxs, self.max])
+        keep = times >= start
+        return times[keep], mins[keep], avgs[keep], maxs[keep]
+
+
+class MetricStore:
+    def __init__(self, series=SERIES, tiers=TIERS, max_points=1500):
+        self.series = list(series)
+        self.index = {name: i for i, name in enumerate(self.series)}
+        self.tiers = [MetricTier(resolution, capacity, len(self.series)) for resolution, capacity in tiers]
+        self.max_points = max_points
+        self.latest_time = None
+
+    def append(self, timestamp, values):
+        values = np.asarray(values, dtype=np.float64)
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+        self.latest_time = timestamp
+
+    def extend(self, times, values):
+        values = np.asarray(values, dtype=np.float64)
+        for tier in self.tiers:
+            tier.extend(times, values)
+        if len(times):
+            self.latest_time = times[-1]
+
+    def append_sample(self, sample):
+        self.append(sample['time'], [sample[name] for name in self.series])
+
+    def pick_tier(self, span):
+        for tier in self.tiers:
+            if tier.span >= span and span / tier.resolution <= self.max_points:
+                return tier
+        return self.tiers[-1]
+
+    def window(self, span, now=None):
+        if now is None:
+            now = self.latest_time or 0
+        return self.pick_tier(span).window(now - span)
+
+    def series_window(self, name, span, now=None):
+        times, mins, avgs, maxs = self.window(span, now)
+        column = self.index[name]
+        return times, mins[:, column], avgs[:, column], maxs[:, column]
+
+
+class DeviceStore:
+    # Many series per sample (one per core, disk or NIC), so only minutes to a day of history: ~3.7 MB at 128 cores.
+    TIERS = ((1, 600), (10, 360), (60, 1440))
+
+    def __init__(self, tiers=TIERS, max_points=600):
+        self.tiers = tiers
+        self.max_points = max_points
+        self.names = []
+        self.store = None
+
+    def append(self, timestamp, names, values):
+        if names != self.names:
+            # A device appeared or went away; its history restarts rather than misaligning the columns.
+            self.names = list(names)
+            self.store = MetricStore(series=self.names, tiers=self.tiers, max_points=self.max_points)
+        self.store.append(timestamp, values)
+
+    def append_mapping(self, timestamp, values):
+        names = sorted(values)
+        self.append(timestamp, names, [values[name] for name in names])
+
+    def window(self, span, now=None):
+        if self.store is None:
+            return np.empty(0), np.empty((0, 0), dtype=np.float32)
+        times, mins, avgs, maxs = self.store.window(span, now)
+        return times, avgs
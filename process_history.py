@@ -0,0 +1,211 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+SPARK_CHARS = np.array(list('▁▂▃▄▅▆▇█ '))
+FIELDS = ('cpu_percent', 'memory_mb', 'io_rate')
+WINDOWS = (60, 300, 900)
+# A process without a slot takes the slot of the least active tracked one only if it uses this many CPU
+# points more, or as much CPU and twice the memory, so near-idle processes don't keep trading places.
+DISPLACE_CPU = 1.0
+DISPLACE_MEMORY = 2.0
+# At most this share of the table changes hands per scan, so noisy newcomers cannot churn every slot.
+DISPLACE_SHARE = 1 / 64
+
+
+class ProcessHistory:
+    def __init__(self, total_memory, max_processes=2048, points=300, spark_width=16, top=100):
+        self.total_memory_mb = total_memory / 1024 / 1024
+        self.capacity = max_processes
+        self.points = points
+        self.spark_width = spark_width
+        self.top = top
+        # (field, slot, scan): all processes share the scan columns, so one write per field per scan.
+        self.values = np.full((len(FIELDS), max_processes, points), np.nan, dtype=np.float32)
+        self.times = np.full(points, np.nan)
+        self.column = -1
+        # Per window: running sums and sample counts per field and slot, and the scan columns they cover.
+        # Each scan adds its column and takes out the ones that left the window, so averages cost O(slots).
+        self.sums = {seconds: np.zeros((len(FIELDS), max_processes)) for seconds in WINDOWS}
+        self.counts = {seconds: np.zeros((len(FIELDS), max_processes)) for seconds in WINDOWS}
+        self.covered = {seconds: deque() for seconds in WINDOWS}
+        self.slots = {}
+        self.keys = [None] * max_processes
+        self.labels = [None] * max_processes
+        self.last_seen = np.full(max_processes, -np.inf)
+        self.last_io = np.full(max_processes, np.nan)
+        self.last_io_time = np.full(max_processes, np.nan)
+        self.free = list(range(max_processes - 1, -1, -1))
+        self.untracked = 0
+
+    def accumulate(self, seconds, column, sign):
+        block = self.values[:, :, column]
+        present = ~np.isnan(block)
+        self.sums[seconds] += sign * np.where(present, block, 0.0)
+        self.counts[seconds] += sign * present
+
+    def release(self, slot):
+        del self.slots[self.keys[slot]]
+        self.keys[slot] = None
+        self.values[:, slot, :] = np.nan
+        for seconds in WINDOWS:
+            self.sums[seconds][:, slot] = 0.0
+            self.counts[seconds][:, slot] = 0
+        self.last_seen[slot] = -np.inf
+        self.last_io[slot] = np.nan
+        self.last_io_time[slot] = np.nan
+
+    def means(self, seconds, slots):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums[seconds][:, slots] / self.counts[seconds][:, slots]
+
+    def allocate(self, processes, rows, now):
+        slots = self.free[-len(rows):][::-1] if rows else []
+        del self.free[len(self.free) - len(slots):]
+        if len(slots) < len(rows):
+            # Evict processes that have exited, least recently seen first.
+            exited = np.flatnonzero((self.last_seen < now) & (self.last_seen > -np.inf))
+            exited = exited[np.argsort(self.last_seen[exited])][:len(rows) - len(slots)]
+            for slot in exited:
+                self.release(slot)
+            slots.extend(int(slot) for slot in exited)
+        assigned = list(zip(rows, slots))
+        if len(slots) < len(rows):
+            assigned.extend(self.displace(processes, rows[len(slots):], now))
+        return assigned
+
+    def displace(self, processes, rows, now):
+        # The table is full of live processes: the busiest newcomers replace the least active tracked ones,
+        # ranked over the longest window, so the top consumers of a large host are still tracked.
+        victims = np.flatnonzero(self.last_seen >= now)
+        if not len(victims):
+            return []
+        cpu, memory, _ = np.nan_to_num(self.means(WINDOWS[-1], victims))
+        order = np.lexsort((memory, cpu))
+        rows = np.array(rows)
+        proc_cpu = np.array([processes[row]['cpu_percent'] or 0 for row in rows], dtype=float)
+        proc_memory = np.array([processes[row]['memory_mb'] or 0 for row in rows], dtype=float)
+        # Newcomers that cannot beat even the least active process are left out before sorting.
+        weakest = order[0]
+        able = (proc_cpu >= cpu[weakest] + DISPLACE_CPU) | (
+            (proc_cpu >= cpu[weakest]) & (proc_memory >= memory[weakest] * DISPLACE_MEMORY))
+        able = np.flatnonzero(able)
+        able = able[np.lexsort((-proc_memory[able], -proc_cpu[able]))][:max(1, int(self.capacity * DISPLACE_SHARE))]
+
+        assigned = []
+        order = iter(order)
+        index = next(order)
+        for candidate in able:
+            if not (proc_cpu[candidate] >= cpu[index] + DISPLACE_CPU
+                    or proc_cpu[candidate] >= cpu[index]
+                    and proc_memory[candidate] >= memory[index] * DISPLACE_MEMORY):
+                continue
+            slot = int(victims[index])
+            self.release(slot)
+            assigned.append((int(rows[candidate]), slot))
+            index = next(order, None)
+            if index is None:
+                break
+        return assigned
+
+    def record(self, processes, now):
+        column = (self.column + 1) % self.points
+        for seconds, covered in self.covered.items():
+            # The column about to be overwritten leaves every window still covering it.
+            if covered and covered[0] == column:
+                self.accumulate(seconds, covered.popleft(), -1)
+        self.column = column
+        self.times[column] = now
+        self.values[:, :, column] = np.nan
+
+        tracked_rows = {}
+        new_rows = []
+        for row, proc in enumerate(processes):
+            slot = self.slots.get((proc['pid'], proc['create_time']))
+            if slot is None:
+                new_rows.append(row)
+            else:
+                tracked_rows[slot] = row
+        self.last_seen[list(tracked_rows)] = now
+
+        assigned = self.allocate(processes, new_rows, now)
+        for row, slot in assigned:
+            # A displaced process loses its slot in this very scan.
+            tracked_rows.pop(slot, None)
+            proc = processes[row]
+            key = (proc['pid'], proc['create_time'])
+            self.slots[key] = slot
+            self.keys[slot] = key
+            tracked_rows[slot] = row
+        slots = np.array(list(tracked_rows), dtype=int)
+        self.untracked = len(processes) - len(slots)
+        self.last_seen[slots] = now
+
+        tracked = [processes[row] for row in tracked_rows.values()]
+        for proc, slot in zip(tracked, slots):
+            self.labels[slot] = (proc['pid'], proc['name'], proc['status'], proc.get('ppid'))
+
+        io = np.array([np.nan if proc['io_bytes'] is None else proc['io_bytes'] for proc in tracked])
+        with np.errstate(invalid='ignore'):
+            io_rate = (io - self.last_io[slots]) / (now - self.last_io_time[slots]) / 1024
+        self.last_io[slots] = io
+        self.last_io_time[slots] = now
+
+        self.values[0, slots, column] = [proc['cpu_percent'] or 0 for proc in tracked]
+        self.values[1, slots, column] = [proc['memory_mb'] for proc in tracked]
+        self.values[2, slots, column] = io_rate
+
+        for seconds, covered in self.covered.items():
+            covered.append(column)
+            self.accumulate(seconds, column, 1)
+            while self.times[covered[0]] < now - seconds:
+                self.accumulate(seconds, covered.popleft(), -1)
+
+        for proc, trend, rate in zip(tracked, self.sparklines(slots), io_rate):
+            proc['cpu_trend'] = trend
+            proc['io_rate'] = None if np.isnan(rate) else float(rate)
+
+    def sparklines(self, slots):
+        if not len(slots):
+            return []
+        columns = (self.column - np.arange(self.spark_width)[::-1]) % self.points
+        block = self.values[0][slots][:, columns]
+        scale = np.maximum(np.nanmax(np.nan_to_num(block, nan=0.0), axis=1, keepdims=True), 1.0)
+        levels = np.clip((np.nan_to_num(block, nan=-1.0) / scale * 8).astype(int), -1, 7)
+        levels[np.isnan(block)] = len(SPARK_CHARS) - 1
+        # Each row of single characters is reinterpreted as one fixed-width string.
+        chars = np.ascontiguousarray(SPARK_CHARS[levels])
+        return chars.view(f'<U{self.spark_width}').ravel().tolist()
+
+    def window(self, seconds, now):
+        # The top consumers of CPU, memory and I/O over one of WINDOWS, each picked with a heap of `top`.
+        slots = np.flatnonzero((self.last_seen >= now - seconds) & (self.counts[seconds][0] > 0))
+        means = self.means(seconds, slots)
+        chosen = set()
+        for column in means:
+            rows = np.flatnonzero(~np.isnan(column)).tolist()
+            chosen.update(heapq.nlargest(self.top, rows, key=column.__getitem__))
+        rows = sorted(chosen)
+        slots = slots[rows]
+        means = means[:, rows]
+
+        records = {}
+        for index, (slot, trend) in enumerate(zip(slots, self.sparklines(slots))):
+            pid, name, status, ppid = self.labels[slot]
+            if pid in records and records[pid]['status'] != 'exited':
+                # A reused PID: the running process wins over the one that exited.
+                continue
+            records[pid] = {
+                'pid': pid,
+                'create_time': self.keys[slot][1],
+                'name': name,
+                'ppid': ppid,
+                'status': status if self.last_seen[slot] >= now else 'exited',
+                'cpu_percent': float(means[0, index]),
+                'memory_mb': float(means[1, index]),
+                'memory_percent': float(means[1, index]) / self.total_memory_mb * 100,
+                'io_rate': None if np.isnan(means[2, index]) else float(means[2, index]),
+                'cpu_trend': trend
+            }
+        return list(records.values())
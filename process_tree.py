@@ -0,0 +1,112 @@
+class ProcessTree:
+    def __init__(self):
+        self.records = {}
+        self.parents = {}
+        self.children = {}
+        self.roots = set()
+        self.totals = {}
+        self.order = []
+
+    def adopts(self, parent, child):
+        # A process can't be older than its parent: if it is, the ppid names a pid that was reused since.
+        parent_time = self.records.get(parent, {}).get('create_time')
+        child_time = self.records.get(child, {}).get('create_time')
+        return parent_time is None or child_time is None or parent_time <= child_time
+
+    def link(self, pid, parent):
+        self.parents[pid] = parent
+        if parent == pid or not self.adopts(parent, pid):
+            self.roots.add(pid)
+            return
+        self.children.setdefault(parent, set()).add(pid)
+        if parent not in self.records:
+            self.roots.add(pid)
+        # Children seen before their parent (same scan, or a stale ppid) stop being roots once it appears,
+        # unless they belonged to an earlier process with this pid; those are shown as roots instead.
+        children = self.children.get(pid, set())
+        for child in list(children):
+            if self.adopts(pid, child):
+                self.roots.discard(child)
+            else:
+                children.discard(child)
+                self.roots.add(child)
+        if not children:
+            self.children.pop(pid, None)
+
+    def unlink(self, pid):
+        parent = self.parents.pop(pid)
+        siblings = self.children.get(parent)
+        if siblings is not None and pid != parent:
+            siblings.discard(pid)
+            if not siblings:
+                del self.children[parent]
+        self.roots.discard(pid)
+        # Orphans are shown as roots until a later scan reports the process they were reparented to.
+        for child in self.children.get(pid, ()):
+            if pid not in self.records:
+                self.roots.add(child)
+
+    def update(self, processes):
+        current = {proc['pid']: proc for proc in processes}
+        previous = self.records
+        self.records = current
+
+        # Only exited, created and reparented processes touch the index; everything else is a dict lookup.
+        for pid, proc in previous.items():
+            if pid not in current or current[pid].get('create_time') != proc.get('create_time'):
+                self.unlink(pid)
+        for pid, proc in current.items():
+            parent = proc.get('ppid') or 0
+            known = self.parents.get(pid)
+            if known is None:
+                self.link(pid, parent)
+            elif known != parent:
+                self.unlink(pid)
+                self.link(pid, parent)
+        self.compute_totals()
+
+    def compute_totals(self):
+        # Breadth-first from the roots puts every parent before its children,
+        # so walking the list backwards folds each subtree into its parent in one pass.
+        order = list(self.roots)
+        children = self.children
+        for pid in order:
+            order.extend(children.get(pid, ()))
+
+        records = self.records
+        totals = {pid: [records[pid]['cpu_percent'] or 0, records[pid]['memory_percent'] or 0, 0] for pid in order}
+        parents = self.parents
+        roots = self.roots
+        for pid in reversed(order):
+            if pid in roots:
+                continue
+            total = totals[pid]
+            parent_total = totals[parents[pid]]
+            parent_total[0] += total[0]
+            parent_total[1] += total[1]
+            parent_total[2] += total[2] + 1
+        self.totals = totals
+        self.order = order
+
+    def child_records(self, pid, visible=None):
+        pids = self.roots if pid is None else self.children.get(pid, ())
+        return [self.records[child] for child in pids if visible is None or child in visible]
+
+    def has_children(self, pid, visible=None):
+        pids = self.children.get(pid)
+        if not pids:
+            return False
+        return visible is None or not visible.isdisjoint(pids)
+
+    def matching(self, predicate):
+        # Matches plus their ancestors; each walk stops at the first ancestor already included.
+        visible = set()
+        for pid, proc in self.records.items():
+            if not predicate(proc):
+                continue
+            while pid not in visible and pid in self.records:
+                visible.add(pid)
+                if pid in self.roots:
+                    break
+                pid = self.parents[pid]
+        return visible
@@ -0,0 +1,189 @@
+import os
+import pwd
+import time
+
+import psutil
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+# /proc/<pid>/stat is a few hundred bytes; longer lines fall back to a plain read.
+SLOT_SIZE = 1024
+# comm is truncated to TASK_COMM_LEN - 1 characters by the kernel.
+COMM_LENGTH = 15
+
+STATUSES = {
+    'R': psutil.STATUS_RUNNING,
+    'S': psutil.STATUS_SLEEPING,
+    'D': psutil.STATUS_DISK_SLEEP,
+    'T': psutil.STATUS_STOPPED,
+    't': psutil.STATUS_TRACING_STOP,
+    'Z': psutil.STATUS_ZOMBIE,
+    'X': psutil.STATUS_DEAD,
+    'x': psutil.STATUS_DEAD,
+    'K': 'wake-kill',
+    'W': psutil.STATUS_WAKING,
+    'I': psutil.STATUS_IDLE,
+    'P': psutil.STATUS_PARKED
+}
+
+
+def parse_io(data):
+    # Fixed order: rchar, wchar, syscr, syscw, read_bytes, write_bytes, cancelled_write_bytes.
+    lines = data.split(b'\n')
+    return int(lines[4].split()[1]) + int(lines[5].split()[1])
+
+
+def parse_stat(data):
+    close = data.rfind(b')')
+    comm = data[data.find(b'(') + 1:close].decode('utf-8', 'replace')
+    # fields[0] is field 3 (state) in proc(5), so field N is fields[N - 3].
+    fields = data[close + 2:].split()
+    return (
+        comm,
+        fields[0].decode('ascii'),
+        int(fields[1]),
+        int(fields[11]) + int(fields[12]),
+        int(fields[19]),
+        int(fields[21])
+    )
+
+
+class ProcfsBackend:
+    name = 'procfs'
+
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.boot_time = psutil.boot_time()
+        self.total_memory = psutil.virtual_memory().total
+        self.arena = bytearray(SLOT_SIZE * 4096)
+        self.io_buffer = bytearray(SLOT_SIZE)
+        self.overflow = {}
+        self.cpu_ticks = {}
+        self.details = {}
+        self.users = {}
+        self.last_scan = None
+
+    def list_pids(self):
+        return [int(name) for name in os.listdir(self.proc_root) if name.isdigit()]
+
+    def read_stats(self, pids):
+        if len(self.arena) < len(pids) * SLOT_SIZE:
+            self.arena = bytearray(len(pids) * SLOT_SIZE * 2)
+        arena = memoryview(self.arena)
+        self.overflow.clear()
+
+        lengths = []
+        for index, pid in enumerate(pids):
+            path = f"{self.proc_root}/{pid}/stat"
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                lengths.append(0)
+                continue
+            try:
+                length = os.readv(fd, [arena[index * SLOT_SIZE:(index + 1) * SLOT_SIZE]])
+                if length == SLOT_SIZE:
+                    self.overflow[index] = bytes(arena[index * SLOT_SIZE:(index + 1) * SLOT_SIZE]) + os.read(fd, 4096)
+            except OSError:
+                length = 0
+            finally:
+                os.close(fd)
+            lengths.append(length)
+        return lengths
+
+    def read_io(self, pid):
+        # Other users' io files are unreadable without privileges; those processes report no I/O.
+        try:
+            fd = os.open(f"{self.proc_root}/{pid}/io", os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            length = os.readv(fd, [self.io_buffer])
+            return parse_io(bytes(self.io_buffer[:length]))
+        except (OSError, ValueError, IndexError):
+            return None
+        finally:
+            os.close(fd)
+
+    def user_name(self, uid):
+        user = self.users.get(uid)
+        if user is None:
+            try:
+                user = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                user = str(uid)
+            self.users[uid] = user
+        return user
+
+    def read_details(self, pid, comm):
+        # The command line and owner only change on exec, which also changes comm,
+        # so they are read once per process instead of on every scan.
+        try:
+            with open(f"{self.proc_root}/{pid}/cmdline", 'rb') as f:
+                argv = f.read().rstrip(b'\0').split(b'\0')
+            uid = os.stat(f"{self.proc_root}/{pid}").st_uid
+        except OSError:
+            return comm, '', '', ''
+        argv = [arg.decode('utf-8', 'replace') for arg in argv if arg]
+        return comm, argv[0] if argv else '', ' '.join(argv), self.user_name(uid)
+
+    def full_name(self, comm, argv0):
+        # Same rule as psutil: a truncated comm is replaced by the executable name from cmdline.
+        extended = os.path.basename(argv0)
+        return extended if extended.startswith(comm) else comm
+
+    def scan(self):
+        now = time.monotonic()
+        elapsed = now - self.last_scan if self.last_scan is not None else None
+        self.last_scan = now
+
+        pids = self.list_pids()
+        lengths = self.read_stats(pids)
+
+        cpu_ticks = {}
+        details = {}
+        results = []
+        for index, (pid, length) in enumerate(zip(pids, lengths)):
+            if not length:
+                continue
+            data = self.overflow.get(index) or bytes(self.arena[index * SLOT_SIZE:index * SLOT_SIZE + length])
+            try:
+                comm, state, ppid, ticks, start_ticks, rss_pages = parse_stat(data)
+            except (ValueError, IndexError):
+                continue
+
+            key = (pid, start_ticks)
+            known = self.details.get(key)
+            if known is None or known[0] != comm:
+                known = self.read_details(pid, comm)
+            details[key] = known
+            _, argv0, cmdline, user = known
+            # Kernel threads rename themselves, so short names are always taken fresh.
+            name = comm if len(comm) < COMM_LENGTH else self.full_name(comm, argv0)
+            cpu_ticks[key] = ticks
+
+            previous = self.cpu_ticks.get(key)
+            if previous is None or not elapsed:
+                cpu_percent = 0.0
+            else:
+                cpu_percent = round((ticks - previous) / CLOCK_TICKS / elapsed * 100, 1)
+
+            rss = rss_pages * PAGE_SIZE
+            results.append({
+                'pid': pid,
+                'create_time': self.boot_time + start_ticks / CLOCK_TICKS,
+                'name': name,
+                'cmdline': cmdline,
+                'user': user,
+                'ppid': ppid,
+                'status': STATUSES.get(state, state),
+                'cpu_percent': cpu_percent,
+                'memory_percent': rss / self.total_memory * 100,
+                'memory_mb': rss / 1024 / 1024,
+                'io_bytes': self.read_io(pid)
+            })
+
+        # Keys are (pid, start time), so exited and reused PIDs drop out here.
+        self.cpu_ticks = cpu_ticks
+        self.details = details
+        return results
@@ -0,0 +1,453 @@
+import operator
+import re
+import threading
+
+import numpy as np
+
+# Query field -> (record key, kind).
+FIELDS = {
+    'name': ('name', 'text'),
+    'cmdline': ('cmdline', 'text'),
+    'cmd': ('cmdline', 'text'),
+    'user': ('user', 'text'),
+    'status': ('status', 'text'),
+    'cgroup': ('cgroup', 'text'),
+    'title': ('title', 'text'),
+    'pid': ('pid', 'number'),
+    'ppid': ('ppid', 'number'),
+    'cpu': ('cpu_percent', 'number'),
+    'memory': ('memory_percent', 'number'),
+    'mem': ('memory_percent', 'number'),
+    'rss': ('memory_mb', 'number')
+}
+NUMBER_OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le
+}
+TEXT_OPERATORS = ('=', '!=', '~', '!~')
+TOKEN = re.compile(r'''\s*(?:(?P<paren>[()])|(?P<op>>=|<=|!=|!~|[=~<>])|/(?P<regex>(?:\\.|[^/\\])*)/(?=[\s)]|$)|"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<word>[^\s()=!~<>"']+))''')
+GRAM = 3
+# Regex syntax that ends a run of literal characters.
+REGEX_META = re.compile(r'\\.|\[(?:\\.|[^\]\\])*\]|\{[^}]*\}|[.^$*+?|()]')
+
+
+class QueryError(ValueError):
+    pass
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise QueryError(f"unexpected {text[position:].strip()[:10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ('dq', 'sq'):
+            kind = 'string'
+        elif kind == 'regex':
+            try:
+                value = re.compile(value, re.IGNORECASE)
+            except re.error as e:
+                raise QueryError(f"bad regex: {e}") from None
+        tokens.append((kind, value))
+    return tokens
+
+
+class Parser:
+    def __init__(self, tokens, default_fields):
+        self.tokens = tokens
+        self.position = 0
+        self.default_fields = default_fields
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def keyword(self, word):
+        kind, value = self.peek()
+        if kind == 'word' and value.lower() == word:
+            self.position += 1
+            return True
+        return False
+
+    def parse(self):
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            raise QueryError(f"unexpected {self.peek()[1]!r}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.keyword('or'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while True:
+            # "a b" means "a and b", as in most search boxes.
+            kind, value = self.peek()
+            if kind is None or kind == 'paren' and value == ')' or kind == 'word' and value.lower() == 'or':
+                return node
+            self.keyword('and')
+            node = ('and', node, self.parse_not())
+
+    def parse_not(self):
+        if self.keyword('not'):
+            return ('not', self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.peek()
+        if kind is None:
+            raise QueryError("unexpected end of query")
+        self.position += 1
+        if kind == 'paren' and value == '(':
+            node = self.parse_or()
+            if self.peek() != ('paren', ')'):
+                raise QueryError("missing ')'")
+            self.position += 1
+            return node
+        if kind == 'op' or kind == 'paren':
+            raise QueryError(f"unexpected {value!r}")
+
+        next_kind, op = self.peek()
+        if kind == 'word' and next_kind == 'op':
+            self.position += 1
+            operand_kind, operand = self.peek()
+            if operand_kind not in ('word', 'string', 'regex'):
+                raise QueryError(f"missing value after {value}{op}")
+            self.position += 1
+            return comparison(value.lower(), op, operand)
+        # A bare word or string searches the default fields.
+        needle = value if kind == 'regex' else value.lower()
+        nodes = [('text', FIELDS[field][0], '~', needle) for field in self.default_fields]
+        node = nodes[0]
+        for other in nodes[1:]:
+            node = ('or', node, other)
+        return node
+
+
+def comparison(field, op, value):
+    if field not in FIELDS:
+        raise QueryError(f"unknown field {field!r}")
+    key, kind = FIELDS[field]
+    if kind == 'number':
+        if op not in NUMBER_OPERATORS or not isinstance(value, str):
+            raise QueryError(f"{field} needs a number comparison")
+        try:
+            return ('number', key, op, float(value))
+        except ValueError:
+            raise QueryError(f"{field} needs a number, not {value!r}") from None
+    if op not in TEXT_OPERATORS:
+        raise QueryError(f"{field} can only be compared with =, !=, ~ or !~")
+    if not isinstance(value, str) and op in ('=', '!='):
+        raise QueryError(f"use ~ to match {field} against a regex")
+    negate = op.startswith('!')
+    node = ('text', key, op.lstrip('!') or '=', value if not isinstance(value, str) else value.lower())
+    return ('not', node) if negate else node
+
+
+def required_literal(pattern):
+    # The longest run of plain characters every match must contain, used to look candidates up in the index.
+    # Alternation and anything inside a group may be optional, so those give no literal.
+    source = pattern.pattern
+    if '|' in source:
+        return ''
+    best = ''
+    position = 0
+    depth = 0
+    for match in [*REGEX_META.finditer(source), None]:
+        token = match.group() if match else ''
+        run = source[position:match.start() if match else len(source)]
+        if token[:1] in ('?', '*', '{'):
+            # The character before an optional quantifier is not required.
+            run = run[:-1]
+        if depth == 0 and len(run) > len(best):
+            best = run
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        if match:
+            position = match.end()
+    return best.lower()
+
+
+class Query:
+    def __init__(self, node, text):
+        self.node = node
+        self.text = text
+        self.predicate = compile_node(node)
+        self.fields = node_fields(node)
+
+
+def node_fields(node):
+    if node[0] in ('and', 'or'):
+        return node_fields(node[1]) | node_fields(node[2])
+    if node[0] == 'not':
+        return node_fields(node[1])
+    return {node[1]}
+
+
+def compile_query(text, default_fields=('name',)):
+    tokens = tokenize(text)
+    if not tokens:
+        raise QueryError("empty query")
+    return Query(Parser(tokens, default_fields).parse(), text)
+
+
+def literal_query(text, default_fields=('name',)):
+    # Plain substring search, for text that does not parse as a query.
+    needle = text.strip().lower()
+    node = ('text', FIELDS[default_fields[0]][0], '~', needle)
+    for field in default_fields[1:]:
+        node = ('or', node, ('text', FIELDS[field][0], '~', needle))
+    return Query(node, text)
+
+
+def compile_node(node):
+    kind = node[0]
+    if kind == 'and':
+        left, right = compile_node(node[1]), compile_node(node[2])
+        return lambda record: left(record) and right(record)
+    if kind == 'or':
+        left, right = compile_node(node[1]), compile_node(node[2])
+        return lambda record: left(record) or right(record)
+    if kind == 'not':
+        inner = compile_node(node[1])
+        return lambda record: not inner(record)
+    _, key, op, value = node
+    if kind == 'number':
+        compare = NUMBER_OPERATORS[op]
+        return lambda record: record.get(key) is not None and compare(record[key], value)
+    if not isinstance(value, str):
+        return lambda record: value.search(record.get(key) or '') is not None
+    if op == '=':
+        return lambda record: (record.get(key) or '').lower() == value
+    return lambda record: value in (record.get(key) or '').lower()
+
+
+class TextColumn:
+    def __init__(self, grams=False):
+        # Processes share names, users and often command lines, so each distinct value gets an id and the
+        # index works on distinct values; a lookup table over the ids then gives the row mask in one step.
+        self.ids = {}
+        self.texts = []
+        self.counts = []
+        self.free = []
+        self.grams = {} if grams else None
+        self.haystack = None
+
+    def acquire(self, value):
+        text = value.lower()
+        id = self.ids.get(text)
+        if id is None:
+            if self.free:
+                id = self.free.pop()
+                self.texts[id] = text
+                self.counts[id] = 0
+            else:
+                id = len(self.texts)
+                self.texts.append(text)
+                self.counts.append(0)
+            self.ids[text] = id
+            if self.grams is not None:
+                for gram in {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}:
+                    self.grams.setdefault(gram, set()).add(id)
+            self.haystack = None
+        self.counts[id] += 1
+        return id
+
+    def release(self, id):
+        self.counts[id] -= 1
+        if self.counts[id]:
+            return
+        text = self.texts[id]
+        del self.ids[text]
+        if self.grams is not None:
+            for gram in {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}:
+                self.grams[gram].discard(id)
+                if not self.grams[gram]:
+                    del self.grams[gram]
+        self.texts[id] = None
+        self.free.append(id)
+        self.haystack = None
+
+    def search(self, needle):
+        # All distinct values joined into one string, so the substring scan runs in C, not once per value.
+        # A needle never contains the separator, so a hit can't straddle two values.
+        if self.haystack is None:
+            texts = [text or '' for text in self.texts]
+            starts = np.cumsum([0] + [len(text) + 1 for text in texts])
+            self.haystack = ('\n'.join(texts), starts)
+        haystack, starts = self.haystack
+        positions = [match.start() for match in re.finditer(re.escape(needle), haystack)]
+        return set((np.searchsorted(starts, positions, side='right') - 1).tolist())
+
+    def matching(self, op, value):
+        if op == '=':
+            id = self.ids.get(value)
+            return [id] if id is not None else []
+        if isinstance(value, str):
+            if not value:
+                return list(self.ids.values())
+            if self.grams is None or len(value) < GRAM:
+                return list(self.search(value))
+            # Sharing every n-gram does not make a substring, so the candidates are checked.
+            postings = sorted((self.grams.get(value[i:i + GRAM], ()) for i in range(len(value) - GRAM + 1)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings[0] else ()
+            return [id for id in candidates if value in self.texts[id]]
+        # A regex is only run on the values that contain its required literal, if it has one.
+        literal = required_literal(value)
+        candidates = self.matching('~', literal) if literal else self.ids.values()
+        return [id for id in candidates if value.search(self.texts[id])]
+
+
+class ProcessIndex:
+    text_fields = ('name', 'cmdline', 'user', 'status', 'cgroup')
+    # Names get an n-gram index. Command lines are mostly distinct, where n-grams would cost tens of
+    # megabytes, so they are searched as one joined string instead.
+    gram_fields = ('name',)
+    number_fields = ('pid', 'ppid', 'cpu_percent', 'memory_percent', 'memory_mb')
+
+    def __init__(self):
+        # Updated by the process snapshot thread while a query is active, read by the UI thread.
+        self.lock = threading.Lock()
+        # The active query, set by the UI; the index is only maintained while there is one.
+        self.wanted = None
+        self.source = None
+        self.slots = {}
+        self.keys = []
+        self.records = []
+        self.signatures = []
+        self.free = []
+        self.columns = {field: TextColumn(field in self.gram_fields) for field in self.text_fields}
+        self.codes = {field: [] for field in self.text_fields}
+        self.arrays = {}
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.live = np.zeros(0, dtype=bool)
+
+    def release(self, slot):
+        for field, column in self.columns.items():
+            codes = self.codes[field]
+            if codes[slot] >= 0:
+                column.release(codes[slot])
+                codes[slot] = -1
+
+    def update(self, processes):
+        with self.lock:
+            if processes is self.source:
+                return
+            self.source = processes
+            self.arrays = {}
+            # Only started, exited and changed processes touch the text columns; the rest is a lookup and a compare.
+            keys = [(proc['pid'], proc.get('create_time')) for proc in processes]
+            signatures = [(proc.get('name'), proc.get('cmdline'), proc.get('user'), proc.get('status'),
+                           proc.get('cgroup')) for proc in processes]
+            get_slot = self.slots.get
+            slots = [get_slot(key) for key in keys]
+            current = set(keys)
+            for key in [key for key in self.slots if key not in current]:
+                slot = self.slots.pop(key)
+                self.release(slot)
+                self.keys[slot] = self.records[slot] = self.signatures[slot] = None
+                self.free.append(slot)
+
+            changed = []
+            for row, slot in enumerate(slots):
+                if slot is None:
+                    if not self.free:
+                        self.grow()
+                    slot = slots[row] = self.free.pop()
+                    self.slots[keys[row]] = slot
+                    self.keys[slot] = keys[row]
+                if self.signatures[slot] != signatures[row]:
+                    changed.append((slot, signatures[row]))
+                self.records[slot] = processes[row]
+            for slot, signature in changed:
+                old = self.signatures[slot] or (None,) * len(self.text_fields)
+                for field, before, after in zip(self.text_fields, old, signature):
+                    codes = self.codes[field]
+                    if before == after and codes[slot] >= 0:
+                        continue
+                    if codes[slot] >= 0:
+                        self.columns[field].release(codes[slot])
+                    codes[slot] = self.columns[field].acquire(after or '')
+                self.signatures[slot] = signature
+
+            self.rows = np.array(slots, dtype=np.int64)
+            self.live = np.zeros(len(self.keys), dtype=bool)
+            self.live[self.rows] = True
+            # Gathered here, off the UI thread, for the fields the active query reads.
+            for field in self.wanted.fields if self.wanted else ():
+                if field in self.number_fields:
+                    self.number_array(field)
+                elif field in self.codes:
+                    self.code_array(field)
+
+    def grow(self):
+        added = max(len(self.keys), 1024)
+        self.free.extend(range(len(self.keys) + added - 1, len(self.keys) - 1, -1))
+        self.keys.extend([None] * added)
+        self.records.extend([None] * added)
+        self.signatures.extend([None] * added)
+        for codes in self.codes.values():
+            codes.extend([-1] * added)
+
+    def code_array(self, field):
+        array = self.arrays.get(field)
+        if array is None:
+            array = self.arrays[field] = np.array(self.codes[field], dtype=np.int64)
+        return array
+
+    def number_array(self, field):
+        # Numbers change on every scan, so a column is only gathered once a query asks for it.
+        array = self.arrays.get(field)
+        if array is None:
+            array = self.arrays[field] = np.full(len(self.keys), np.nan)
+            array[self.rows] = [np.nan if proc.get(field) is None else proc[field] for proc in self.source]
+        return array
+
+    def evaluate(self, node):
+        kind = node[0]
+        if kind == 'and':
+            return self.evaluate(node[1]) & self.evaluate(node[2])
+        if kind == 'or':
+            return self.evaluate(node[1]) | self.evaluate(node[2])
+        if kind == 'not':
+            return ~self.evaluate(node[1]) & self.live
+        _, key, op, value = node
+        if kind == 'number':
+            if key not in self.number_fields:
+                return np.zeros(len(self.live), dtype=bool)
+            array = self.number_array(key)
+            # A missing value matches no comparison, as in the predicate; NaN would pass "!=".
+            with np.errstate(invalid='ignore'):
+                return NUMBER_OPERATORS[op](array, value) & ~np.isnan(array) & self.live
+        if key not in self.columns:
+            return np.zeros(len(self.live), dtype=bool)
+        column = self.columns[key]
+        table = np.zeros(len(column.texts) + 1, dtype=bool)
+        table[column.matching(op, value)] = True
+        # Code -1 (no value) lands on the extra last entry, which is never set.
+        return table[self.code_array(key)] & self.live
+
+    def filter(self, query, processes):
+        # Returns None when the index does not hold this list, or is being updated; the caller then
+        # runs the query's predicate over the rows instead.
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            if processes is not self.source:
+                return None
+            return [self.records[slot] for slot in np.flatnonzero(self.evaluate(query.node)).tolist()]
+        finally:
+            self.lock.release()
@@ -0,0 +1,87 @@
+import time
+
+# Per metric group: (slowest interval while shown, interval while nothing shows it), in seconds.
+# The fastest interval is the configured sample interval (process scan interval for 'processes').
+BUDGETS = {
+    'metrics': (4.0, 5.0),
+    'devices': (4.0, 10.0),
+    'processes': (15.0, 30.0)
+}
+BACKOFF = 1.5
+# Timer jitter: a group due within this much of a tick is sampled on that tick.
+SLACK = 0.05
+
+
+def series_moved(current, previous, percent_threshold=2.0, rate_threshold=0.2, rate_floor=8.0):
+    # Percentages move by points; KB/s rates move by a fraction of the previous value, above a noise floor.
+    for name, value in current.items():
+        last = previous.get(name)
+        if last is None:
+            return True
+        if name.endswith('_percent') or name.isdigit():
+            if abs(value - last) >= percent_threshold:
+                return True
+        elif abs(value - last) >= max(abs(last) * rate_threshold, rate_floor):
+            return True
+    return False
+
+
+class SamplingScheduler:
+    def __init__(self, fastest, budgets=None):
+        self.groups = {}
+        # Budgets from settings.json may only retune the known groups.
+        budgets = {name: budget for name, budget in (budgets or {}).items() if name in BUDGETS and len(budget) == 2}
+        for name, (slowest, hidden) in {**BUDGETS, **budgets}.items():
+            self.groups[name] = {
+                'fastest': fastest.get(name, 1.0),
+                'slowest': slowest,
+                'hidden': hidden,
+                'interval': fastest.get(name, 1.0),
+                'watched': True,
+                'due': 0.0
+            }
+
+    def set_fastest(self, name, seconds):
+        group = self.groups[name]
+        group['fastest'] = seconds
+        group['interval'] = max(group['interval'], seconds) if group['watched'] else group['hidden']
+
+    def set_watched(self, name, watched):
+        group = self.groups[name]
+        if group['watched'] == watched:
+            return False
+        group['watched'] = watched
+        if watched:
+            # Whatever just became visible is sampled right away, at full speed.
+            group['interval'] = group['fastest']
+            group['due'] = 0.0
+        else:
+            group['interval'] = max(group['hidden'], group['fastest'])
+        return True
+
+    def observe(self, name, moved):
+        group = self.groups[name]
+        if not group['watched']:
+            group['interval'] = max(group['hidden'], group['fastest'])
+        elif moved:
+            group['interval'] = group['fastest']
+        else:
+            group['interval'] = min(group['interval'] * BACKOFF, max(group['slowest'], group['fastest']))
+
+    def interval(self, name):
+        return self.groups[name]['interval']
+
+    def due(self, name, now=None):
+        now = time.monotonic() if now is None else now
+        return now + SLACK >= self.groups[name]['due']
+
+    def schedule(self, name, now=None):
+        now = time.monotonic() if now is None else now
+        group = self.groups[name]
+        group['due'] = now + group['interval']
+
+    def next_due(self, names):
+        return min(self.groups[name]['due'] for name in names)
+
+    def intervals(self):
+        return {name: group['interval'] for name, group in self.groups.items()}
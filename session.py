@@ -0,0 +1,395 @@
+import bisect
+import json
+import lzma
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from collector import SERIES
+
+# File: header, then blocks. Each block is compressed on its own and opens with the full process
+# table (a keyframe), so a seek decompresses one block instead of everything before it.
+MAGIC = b'SMSESS\x00\x01'
+CODECS = {'zlib': 0, 'lzma': 1}
+FILE_HEADER = struct.Struct('<8sB')
+BLOCK_HEADER = struct.Struct('<Idd')
+BLOCK_COUNTS = struct.Struct('<III')
+SCAN_HEADER = struct.Struct('<dII')
+LENGTH = struct.Struct('<I')
+KEYFRAME_INTERVAL = 30.0
+SCAN_COLUMNS = (
+    ('ppid', '<u4'),
+    ('cpu_percent', '<f4'),
+    ('memory_percent', '<f4'),
+    ('memory_mb', '<f4'),
+    ('io_rate', '<f4')
+)
+
+
+def compress(codec, data):
+    return lzma.compress(data, preset=6) if codec == CODECS['lzma'] else zlib.compress(data, 6)
+
+
+def decompress(codec, data):
+    return lzma.decompress(data) if codec == CODECS['lzma'] else zlib.decompress(data)
+
+
+class ScanEncoder:
+    def __init__(self):
+        self.rows = {}
+
+    def encode(self, timestamp, processes):
+        current = {}
+        upserts = []
+        for proc in processes:
+            row = (
+                proc['pid'],
+                proc.get('ppid') or 0,
+                proc['cpu_percent'] or 0,
+                proc['memory_percent'] or 0,
+                proc['memory_mb'] or 0,
+                proc.get('io_rate'),
+                proc['name'] or '',
+                proc['status'] or ''
+            )
+            current[row[0]] = row
+            if self.rows.get(row[0]) != row:
+                upserts.append(row)
+        removed = [pid for pid in self.rows if pid not in current]
+        self.rows = current
+
+        # Columns rather than rows: each field compresses against the same field of the other processes.
+        parts = [SCAN_HEADER.pack(timestamp, len(removed), len(upserts)), np.array(removed, dtype='<u4').tobytes(),
+                 np.array([row[0] for row in upserts], dtype='<u4').tobytes()]
+        for index, (_, dtype) in enumerate(SCAN_COLUMNS, 1):
+            column = [np.nan if row[index] is None else row[index] for row in upserts]
+            parts.append(np.array(column, dtype=dtype).tobytes())
+        labels = '\0'.join(f"{row[6]}\0{row[7]}" for row in upserts).encode('utf-8')
+        parts.append(LENGTH.pack(len(labels)) + labels)
+        return b''.join(parts)
+
+
+class ScanDecoder:
+    def __init__(self):
+        self.rows = {}
+
+    def apply(self, payload, offset):
+        timestamp, removed, upserts = SCAN_HEADER.unpack_from(payload, offset)
+        offset += SCAN_HEADER.size
+        for pid in np.frombuffer(payload, '<u4', removed, offset).tolist():
+            self.rows.pop(pid, None)
+        offset += removed * 4
+        pids = np.frombuffer(payload, '<u4', upserts, offset).tolist()
+        offset += upserts * 4
+        columns = []
+        for _, dtype in SCAN_COLUMNS:
+            column = np.frombuffer(payload, dtype, upserts, offset)
+            offset += column.nbytes
+            columns.append(column.tolist())
+        length, = LENGTH.unpack_from(payload, offset)
+        offset += LENGTH.size
+        labels = bytes(payload[offset:offset + length]).decode('utf-8').split('\0') if upserts else []
+        offset += length
+        for index, pid in enumerate(pids):
+            self.rows[pid] = tuple(column[index] for column in columns) + (labels[2 * index], labels[2 * index + 1])
+        return timestamp, offset
+
+    def records(self):
+        return [{
+            'pid': pid,
+            'ppid': ppid,
+            'name': name,
+            'status': status,
+            'cpu_percent': cpu_percent,
+            'memory_percent': memory_percent,
+            'memory_mb': memory_mb,
+            'io_rate': None if io_rate != io_rate else io_rate
+        } for pid, (ppid, cpu_percent, memory_percent, memory_mb, io_rate, name, status) in self.rows.items()]
+
+
+class Block:
+    def __init__(self, payload):
+        samples, scans, devices_length = BLOCK_COUNTS.unpack_from(payload)
+        offset = BLOCK_COUNTS.size
+        self.times = np.frombuffer(payload, '<f8', samples, offset)
+        offset += self.times.nbytes
+        self.values = np.frombuffer(payload, '<f4', samples * len(SERIES), offset).reshape(len(SERIES), samples)
+        offset += self.values.nbytes
+        self.devices = {int(index): detail for index, detail in
+                        json.loads(bytes(payload[offset:offset + devices_length]) or b'{}').items()}
+        offset += devices_length
+        self.payload = payload
+        self.scans = []
+        for _ in range(scans):
+            timestamp = SCAN_HEADER.unpack_from(payload, offset + LENGTH.size)[0]
+            length, = LENGTH.unpack_from(payload, offset)
+            self.scans.append((timestamp, offset + LENGTH.size))
+            offset += LENGTH.size + length
+
+    def sample(self, index):
+        sample = {name: float(self.values[column, index]) for column, name in enumerate(SERIES)}
+        sample['time'] = float(self.times[index])
+        detail = self.devices.get(index)
+        if detail:
+            sample['cores'], sample['disks'], sample['nics'] = detail
+        return sample
+
+
+class SessionReader:
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
+        header = os.pread(self.fd, FILE_HEADER.size, 0)
+        if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header)[0] != MAGIC:
+            os.close(self.fd)
+            raise ValueError(f"{path} is not a session recording")
+        self.codec = FILE_HEADER.unpack(header)[1]
+
+        # Only the block headers are read here; a recording cut short keeps every complete block.
+        self.blocks = []
+        size = os.fstat(self.fd).st_size
+        offset = FILE_HEADER.size
+        while offset + BLOCK_HEADER.size <= size:
+            length, start, end = BLOCK_HEADER.unpack(os.pread(self.fd, BLOCK_HEADER.size, offset))
+            if offset + BLOCK_HEADER.size + length > size:
+                break
+            self.blocks.append((offset + BLOCK_HEADER.size, length, start, end))
+            offset += BLOCK_HEADER.size + length
+        self.starts = [block[2] for block in self.blocks]
+        self.start = self.blocks[0][2] if self.blocks else 0.0
+        self.end = max((block[3] for block in self.blocks), default=self.start)
+        self.cache = (None, None)
+        self.lock = threading.Lock()
+
+    def block_index(self, position):
+        return max(bisect.bisect_right(self.starts, position) - 1, 0)
+
+    def load(self, index):
+        with self.lock:
+            cached_index, block = self.cache
+            if cached_index == index:
+                return block
+            offset, length, _, _ = self.blocks[index]
+            block = Block(decompress(self.codec, os.pread(self.fd, length, offset)))
+            self.cache = (index, block)
+            return block
+
+    def samples(self, start, end):
+        samples = []
+        for index in range(self.block_index(start), len(self.blocks)):
+            if self.blocks[index][2] > end:
+                break
+            block = self.load(index)
+            first, last = np.searchsorted(block.times, (start, end), side='right')
+            samples.extend(block.sample(row) for row in range(first, last))
+        return samples
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SessionCursor:
+    def __init__(self, reader, position):
+        self.reader = reader
+        self.index = reader.block_index(position) if reader.blocks else len(reader.blocks)
+        self.decoder = ScanDecoder()
+        self.block = None
+        self.sample_row = 0
+        self.scan_row = 0
+        self.scan_time = None
+        if self.index < len(reader.blocks):
+            self.open_block()
+        # Scans before the position rebuild the table; samples before it are left to the caller's backfill.
+        self.advance(position)
+
+    def open_block(self):
+        self.block = self.reader.load(self.index)
+        self.decoder = ScanDecoder()
+        self.sample_row = 0
+        self.scan_row = 0
+
+    def advance(self, position):
+        samples = []
+        changed = False
+        while self.block is not None:
+            block = self.block
+            while self.sample_row < len(block.times) and block.times[self.sample_row] <= position:
+                samples.append(block.sample(self.sample_row))
+                self.sample_row += 1
+            while self.scan_row < len(block.scans) and block.scans[self.scan_row][0] <= position:
+                timestamp, offset = block.scans[self.scan_row]
+                self.decoder.apply(block.payload, offset)
+                # A block's keyframe repeats the table the previous block ended with.
+                changed = changed or self.scan_time is None or timestamp > self.scan_time
+                self.scan_time = timestamp
+                self.scan_row += 1
+            if self.sample_row < len(block.times) or self.scan_row < len(block.scans):
+                break
+            if self.index + 1 >= len(self.reader.blocks) or self.reader.starts[self.index + 1] > position:
+                break
+            self.index += 1
+            self.open_block()
+        # Several scans in one step are applied in order, but only the newest table is built.
+        return samples, self.decoder.records() if changed else None
+
+
+class SessionRecorder(threading.Thread):
+    def __init__(self, path, codec='zlib', keyframe_interval=KEYFRAME_INTERVAL):
+        super().__init__(name="SessionRecorder", daemon=True)
+        self.codec = CODECS[codec]
+        self.keyframe_interval = keyframe_interval
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, self.codec))
+        self.events = queue.SimpleQueue()
+        self.error = None
+        self.last_scan = None
+        self.reset_block()
+
+    def reset_block(self):
+        self.block_start = None
+        self.block_end = None
+        self.times = []
+        self.values = []
+        self.devices = {}
+        self.scans = []
+        self.encoder = ScanEncoder()
+
+    def add_samples(self, samples):
+        self.events.put(('metrics', samples))
+
+    def add_processes(self, timestamp, processes):
+        self.events.put(('processes', timestamp, processes))
+
+    def run(self):
+        try:
+            while True:
+                event = self.events.get()
+                if event is None:
+                    break
+                if event[0] == 'metrics':
+                    for sample in event[1]:
+                        self.extend_block(sample['time'])
+                        if 'cores' in sample:
+                            self.devices[len(self.times)] = (sample['cores'], sample['disks'], sample['nics'])
+                        self.times.append(sample['time'])
+                        self.values.append([sample[name] for name in SERIES])
+                else:
+                    _, timestamp, processes = event
+                    self.extend_block(timestamp)
+                    self.last_scan = (timestamp, processes)
+                    self.scans.append(self.encoder.encode(timestamp, processes))
+            self.write_block()
+        except OSError as e:
+            # A full disk ends the recording, not the monitor.
+            self.error = e
+        finally:
+            self.file.close()
+
+    def extend_block(self, timestamp):
+        if self.block_start is not None and timestamp - self.block_start >= self.keyframe_interval:
+            self.write_block()
+            self.reset_block()
+            if self.last_scan:
+                self.scans.append(self.encoder.encode(*self.last_scan))
+        if self.block_start is None:
+            self.block_start = timestamp
+        self.block_end = max(self.block_end or timestamp, timestamp)
+
+    def write_block(self):
+        if self.block_start is None:
+            return
+        values = np.array(self.values, dtype='<f4').reshape(-1, len(SERIES)).T
+        devices = json.dumps(self.devices).encode('utf-8') if self.devices else b''
+        parts = [BLOCK_COUNTS.pack(len(self.times), len(self.scans), len(devices)),
+                 np.array(self.times, dtype='<f8').tobytes(), values.tobytes(), devices]
+        parts.extend(LENGTH.pack(len(scan)) + scan for scan in self.scans)
+        data = compress(self.codec, b''.join(parts))
+        self.file.write(BLOCK_HEADER.pack(len(data), self.block_start, self.block_end) + data)
+        # Flushed per block, so a crash loses at most the last keyframe interval.
+        self.file.flush()
+
+    def stop(self):
+        self.events.put(None)
+
+
+class SessionPlayer(threading.Thread):
+    def __init__(self, reader, speed=1.0):
+        super().__init__(name="SessionPlayer", daemon=True)
+        self.reader = reader
+        self.speed = speed
+        self.interval = 0.05
+        self.samples = queue.SimpleQueue()
+        self.history = None
+        self.missed_ticks = 0
+        self.position = reader.start
+        self.processes = []
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.cursor = SessionCursor(reader, self.position)
+        self.publish(([], self.cursor.decoder.records()))
+
+    def publish(self, events):
+        samples, processes = events
+        for sample in samples:
+            self.samples.put(sample)
+        if processes is not None:
+            self.processes = processes
+            self.generation += 1
+
+    def run(self):
+        last = time.monotonic()
+        while not self.stop_event.is_set():
+            if not self.resume_event.is_set():
+                self.resume_event.wait(0.5)
+                last = time.monotonic()
+                continue
+            now = time.monotonic()
+            with self.lock:
+                if self.stop_event.is_set():
+                    break
+                self.position = min(self.position + (now - last) * self.speed, self.reader.end)
+                self.publish(self.cursor.advance(self.position))
+            last = now
+            self.stop_event.wait(self.interval)
+
+    def seek(self, position):
+        with self.lock:
+            self.position = min(max(position, self.reader.start), self.reader.end)
+            self.cursor = SessionCursor(self.reader, self.position)
+            # Samples queued before the seek belong to the old position.
+            self.drain()
+            self.publish(([], self.cursor.decoder.records()))
+        return self.position
+
+    def get(self):
+        return self.processes
+
+    def drain(self):
+        samples = []
+        while True:
+            try:
+                samples.append(self.samples.get_nowait())
+            except queue.Empty:
+                return samples
+
+    def pause(self):
+        self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    def wake(self):
+        pass
+
+    def stop(self):
+        self.stop_event.set()
+        self.resume_event.set()
+        with self.lock:
+            self.reader.close()
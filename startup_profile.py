@@ -0,0 +1,33 @@
+import sys
+import time
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.phases = []
+        self.last = time.perf_counter()
+        self.interpreter_time = None
+        started = time.time()
+        # psutil is needed by the monitor anyway, so its import is counted under "imports".
+        try:
+            import psutil
+            self.interpreter_time = started - psutil.Process().create_time()
+        except (ImportError, OSError):
+            pass
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def record(self, phase, seconds):
+        self.phases.append((phase, seconds))
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        stream.write("Startup profile:\n")
+        if self.interpreter_time is not None:
+            stream.write(f"  {'interpreter startup':<24}{self.interpreter_time * 1000:8.1f} ms\n")
+        for phase, seconds in self.phases:
+            stream.write(f"  {phase:<24}{seconds * 1000:8.1f} ms\n")
+        stream.flush()
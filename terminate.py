@@ -0,0 +1,126 @@
+import threading
+import time
+
+import psutil
+
+TERMINATED = 'terminated'
+KILLED = 'killed'
+GONE = 'gone'
+DENIED = 'denied'
+ALIVE = 'alive'
+# How often zombies, which wait_procs keeps waiting for, are checked for while waiting.
+POLL_INTERVAL = 0.2
+
+
+class ProcessTerminator(threading.Thread):
+    def __init__(self, targets, tree=False, timeout=3.0, kill_timeout=2.0):
+        super().__init__(name="ProcessTerminator", daemon=True)
+        # targets: (pid, create_time) pairs; create_time None skips the PID-reuse check.
+        self.targets = list(targets)
+        self.tree = tree
+        self.timeout = timeout
+        self.kill_timeout = kill_timeout
+        self.names = {}
+        # Appended to by this thread only; the UI reads the length and the new entries.
+        self.results = []
+        self.total = len(self.targets)
+        self.done = False
+
+    def report(self, proc, result):
+        self.results.append({'pid': proc.pid, 'name': self.names.get(proc.pid, ''), 'result': result})
+
+    def remember(self, proc):
+        try:
+            self.names[proc.pid] = proc.name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self.names.setdefault(proc.pid, '')
+
+    def resolve(self):
+        processes = {}
+        for pid, create_time in self.targets:
+            try:
+                proc = psutil.Process(pid)
+                # A PID from an older scan may already belong to a different process.
+                if create_time is not None and abs(proc.create_time() - create_time) >= 1.0:
+                    raise psutil.NoSuchProcess(pid)
+            except psutil.NoSuchProcess:
+                self.results.append({'pid': pid, 'name': '', 'result': GONE})
+                continue
+            except psutil.AccessDenied:
+                self.results.append({'pid': pid, 'name': '', 'result': DENIED})
+                continue
+            processes[pid] = proc
+        if self.tree:
+            for proc in list(processes.values()):
+                self.add_descendants(proc, processes)
+        for proc in processes.values():
+            self.remember(proc)
+        self.total = len(self.results) + len(processes)
+        return processes
+
+    def add_descendants(self, proc, processes):
+        try:
+            children = proc.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return []
+        added = [child for child in children if child.pid not in processes]
+        for child in added:
+            processes[child.pid] = child
+        return added
+
+    def signal(self, processes, kill):
+        sent = []
+        for proc in processes:
+            try:
+                if kill:
+                    proc.kill()
+                else:
+                    proc.terminate()
+                sent.append(proc)
+            except psutil.NoSuchProcess:
+                self.report(proc, GONE)
+            except psutil.AccessDenied:
+                self.report(proc, DENIED)
+        return sent
+
+    def exited(self, proc, result):
+        # A zombie has exited; only its parent can still reap it, and that parent may be one we just killed.
+        try:
+            zombie = proc.status() == psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            zombie = True
+        except psutil.AccessDenied:
+            zombie = False
+        if zombie:
+            self.report(proc, result)
+        return zombie
+
+    def wait(self, processes, timeout, result):
+        deadline = time.monotonic() + timeout
+        alive = processes
+        while alive:
+            remaining = deadline - time.monotonic()
+            gone, alive = psutil.wait_procs(alive, timeout=min(max(remaining, 0), POLL_INTERVAL),
+                                            callback=lambda proc: self.report(proc, result))
+            alive = [proc for proc in alive if not self.exited(proc, result)]
+            if remaining <= POLL_INTERVAL:
+                break
+        return alive
+
+    def run(self):
+        try:
+            processes = self.resolve()
+            # Parents first: a supervisor that is still running would respawn the workers killed before it.
+            alive = self.wait(self.signal(list(processes.values()), False), self.timeout, TERMINATED)
+            if alive and self.tree:
+                # Children forked while the tree was shutting down are killed outright.
+                for proc in list(alive):
+                    for child in self.add_descendants(proc, processes):
+                        self.remember(child)
+                        alive.append(child)
+                self.total = len(self.results) + len(alive)
+            alive = self.wait(self.signal(alive, True), self.kill_timeout, KILLED)
+            for proc in alive:
+                self.report(proc, ALIVE)
+        finally:
+            self.done = True
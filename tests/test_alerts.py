@@ -0,0 +1,124 @@
+import alerts
+from alerts import AlertEngine, AlertSink
+from metric_store import MetricStore
+
+SERIES = ('cpu_percent', 'memory_percent')
+CPU_RULE = {'name': 'cpu', 'kind': 'level', 'series': 'cpu_percent', 'above': 80, 'clear': 70, 'seconds': 5}
+HOG_RULE = {'name': 'hog', 'kind': 'process', 'field': 'cpu_percent', 'above': 50, 'seconds': 10, 'match': 'py'}
+
+
+def feed(engine, store, start, values):
+    fired = []
+    for offset, cpu_percent in enumerate(values):
+        store.append(start + offset, [cpu_percent, 10.0])
+        fired.extend(alert['time'] for alert in engine.evaluate(store))
+    return fired
+
+
+def process(pid, name, cpu_percent, create_time=None):
+    return {'pid': pid, 'create_time': 100.0 + pid if create_time is None else create_time, 'name': name,
+            'cpu_percent': cpu_percent, 'memory_percent': 1.0, 'memory_mb': 10.0}
+
+
+def alert(rule, key, value=90.0):
+    return {'rule': rule, 'key': key, 'time': 1000.0, 'value': value}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_level_rule_needs_the_full_window_and_rearms_below_clear():
+    engine = AlertEngine([CPU_RULE], series=SERIES)
+    store = MetricStore(SERIES, tiers=((1, 600),))
+
+    # A spike shorter than the window does not fire.
+    assert feed(engine, store, 1000, [10, 10, 10, 10, 10, 10, 95, 95, 10]) == []
+    fired = feed(engine, store, 1009, [90] * 8)
+    assert fired == [1014]
+    # Dropping below the threshold but not the clear level keeps it active.
+    assert feed(engine, store, 1017, [75] * 3 + [90] * 8) == []
+    assert feed(engine, store, 1028, [60] + [90] * 7) == [1034]
+
+
+def test_unknown_series_and_fields_are_skipped():
+    engine = AlertEngine([
+        {'name': 'bogus', 'kind': 'level', 'series': 'gpu_percent', 'above': 1},
+        {'name': 'bogus-process', 'kind': 'process', 'field': 'threads', 'above': 1},
+        CPU_RULE
+    ], series=SERIES)
+    assert [rule['name'] for rule in engine.metric_rules] == ['cpu']
+    assert engine.process_rules == []
+
+
+def test_process_rule_fires_once_per_process_after_holding():
+    engine = AlertEngine([HOG_RULE], series=SERIES)
+    table = [process(1, 'python3', 90), process(2, 'bash', 90), process(3, 'pypy', 20)]
+    assert engine.evaluate_processes(table, now=0) == []
+    assert engine.evaluate_processes(table, now=5) == []
+    fired = engine.evaluate_processes(table, now=10)
+    assert [(alert['pid'], alert['key']) for alert in fired] == [(1, 'hog:1:101.0')]
+    assert engine.evaluate_processes(table, now=15) == []
+
+    table[2] = process(3, 'pypy', 80)
+    assert engine.evaluate_processes(table, now=20) == []
+    assert [alert['pid'] for alert in engine.evaluate_processes(table, now=30)] == [3]
+
+
+def test_reused_pid_does_not_inherit_pending_time_or_cooldown(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(alerts.time, 'monotonic', clock)
+    engine = AlertEngine([HOG_RULE], series=SERIES)
+    sink = AlertSink(cooldown=60)
+    engine.evaluate_processes([process(1, 'python3', 90)], now=0)
+    [fired] = engine.evaluate_processes([process(1, 'python3', 90)], now=10)
+    assert sink.deliver(fired, 'old')
+
+    # The PID now belongs to a new process: it has to hold for the whole window on its own.
+    reused = [process(1, 'python3', 90, create_time=500.0)]
+    assert engine.evaluate_processes(reused, now=11) == []
+    assert engine.evaluate_processes(reused, now=15) == []
+    [fired] = engine.evaluate_processes(reused, now=21)
+    assert fired['key'] == 'hog:1:500.0'
+    # The old process's cooldown is still running but does not silence the new one.
+    clock.now += 11
+    assert sink.deliver(fired, 'new')
+
+
+def test_sink_cooldown_is_per_key(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(alerts.time, 'monotonic', clock)
+    log = tmp_path / 'alerts.log'
+    sink = AlertSink(str(log), cooldown=60)
+
+    assert sink.deliver(alert(HOG_RULE, 'hog:1'), "first")
+    assert not sink.deliver(alert(HOG_RULE, 'hog:1'), "again")
+    # A second process crossing the same rule inside the cooldown is still reported.
+    clock.now += 10
+    assert sink.deliver(alert(HOG_RULE, 'hog:2'), "second")
+    assert sink.suppressed == 1
+
+    clock.now += 55
+    assert sink.deliver(alert(HOG_RULE, 'hog:1'), "after cooldown")
+    assert not sink.deliver(alert(HOG_RULE, 'hog:2'), "still cooling down")
+    assert [line.split('\t')[3] for line in log.read_text().splitlines()] == ["first", "second", "after cooldown"]
+
+
+def test_sink_rule_cooldown_overrides_default_and_expired_keys_are_pruned(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(alerts.time, 'monotonic', clock)
+    sink = AlertSink(cooldown=60)
+    rule = dict(HOG_RULE, cooldown=5)
+
+    assert sink.deliver(alert(rule, 'hog:1'), "")
+    clock.now += 6
+    assert sink.deliver(alert(rule, 'hog:1'), "")
+    for pid in range(2, 50):
+        sink.deliver(alert(rule, f'hog:{pid}'), "")
+    clock.now += 120
+    sink.deliver(alert(CPU_RULE, 'cpu'), "")
+    assert list(sink.quiet_until) == [('cpu', 'cpu')]
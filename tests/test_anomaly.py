@@ -0,0 +1,109 @@
+import numpy as np
+
+import alerts
+import gui
+from alerts import AlertSink
+from anomaly import CPU, LEAK, MetricAnomalies, ProcessAnomalies, StreamingDetector
+from collector import SERIES
+
+
+def sample(timestamp, cpu_percent):
+    record = {name: 10.0 for name in SERIES}
+    record.update(cpu_percent=cpu_percent, time=timestamp)
+    return record
+
+
+def process(pid, cpu_percent, memory_mb, name='worker'):
+    return {'pid': pid, 'create_time': 1000.0 + pid, 'name': name,
+            'cpu_percent': cpu_percent, 'memory_mb': memory_mb}
+
+
+def test_spike_is_flagged_after_warmup_and_does_not_hide_the_next():
+    anomalies = MetricAnomalies(SERIES)
+    rng = np.random.default_rng(1)
+    flagged = [anomalies.update(sample(t, 30 + rng.normal(0, 2))).any() for t in range(60)]
+    assert not any(flagged)
+
+    spike = anomalies.update(sample(60, 70))
+    assert spike[SERIES.index('cpu_percent')]
+    assert not spike[SERIES.index('memory_percent')]
+    assert anomalies.update(sample(61, 70))[SERIES.index('cpu_percent')]
+    # Going idle is not an anomaly.
+    assert not anomalies.update(sample(62, 0)).any()
+
+
+def test_level_shift_is_absorbed():
+    detector = StreamingDetector([2.0], halflife=10.0)
+    for t in range(30):
+        detector.update(['host'], [20.0], t, sweep=False)
+    scores = [detector.update(['host'], [60.0], t, sweep=False)[0][0, 0] for t in range(30, 120)]
+    assert scores[0] > detector.threshold
+    assert scores[-1] < 1
+
+
+def test_exited_series_give_their_slots_back():
+    detector = StreamingDetector([1.0], capacity=2)
+    detector.update(['a', 'b'], [1.0, 2.0], 0)
+    detector.update(['b', 'c', 'd'], [2.0, 3.0, 4.0], 1)
+    assert set(detector.slots) == {'b', 'c', 'd'}
+    assert detector.capacity == 4
+    detector.update(['d'], [4.0], 2)
+    assert list(detector.slots) == ['d']
+    assert len(detector.free) == 3
+
+
+def test_leak_is_told_apart_from_a_sawtooth():
+    anomalies = ProcessAnomalies(leak_seconds=600, leak_rate=0.5)
+    for t in range(0, 3600, 10):
+        # pid 1 grows 2 MB a minute; pid 2 is a garbage-collected sawtooth around 200 MB.
+        table = [process(1, 5.0, 100 + t / 30), process(2, 5.0, 200 + (t % 120) / 2)]
+        anomalies.update(table, t)
+    assert table[0].get('anomaly') == LEAK
+    assert 'anomaly' not in table[1]
+
+
+def test_cpu_spike_is_flagged_per_process():
+    anomalies = ProcessAnomalies()
+    for t in range(40):
+        table = [process(1, 2.0, 50.0), process(2, 2.0, 50.0)]
+        anomalies.update(table, t)
+    table = [process(1, 2.0, 50.0), process(2, 90.0, 50.0)]
+    anomalies.update(table, 40)
+    assert 'anomaly' not in table[0]
+    assert table[1]['anomaly'] == CPU
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_every_leaking_process_reaches_the_sink(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(alerts.time, 'monotonic', clock)
+    monitor = gui.SystemMonitor.__new__(gui.SystemMonitor)
+    monitor.leaking = set()
+    sink = AlertSink(cooldown=300)
+
+    first = dict(process(1, 1.0, 500.0), anomaly=LEAK)
+    second = dict(process(2, 1.0, 700.0), anomaly=LEAK)
+    delivered = [alert['pid'] for alert in monitor.leak_alerts([first]) if sink.deliver(alert, "")]
+    assert delivered == [1]
+    assert monitor.leak_alerts([first]) == []
+
+    # A second process starting to leak inside the cooldown is still reported.
+    clock.now += 30
+    delivered = [alert['pid'] for alert in monitor.leak_alerts([first, second]) if sink.deliver(alert, "")]
+    assert delivered == [2]
+
+    # The first one stops and starts leaking again: that is held back until its own cooldown ends,
+    # but a new process that got its pid is not.
+    clock.now += 30
+    monitor.leak_alerts([second])
+    assert not sink.deliver(monitor.leak_alerts([first, second])[0], "")
+    reused = dict(first, create_time=5000.0)
+    monitor.leak_alerts([second])
+    assert sink.deliver(monitor.leak_alerts([reused, second])[0], "")
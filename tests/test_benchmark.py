@@ -0,0 +1,52 @@
+import json
+
+import benchmark
+from benchmark import SyntheticProcessBackend, compare, measure
+
+
+def test_synthetic_backend_is_reproducible_and_churns():
+    first = SyntheticProcessBackend(500, churn=0.1, seed=7).scan()
+    assert first == SyntheticProcessBackend(500, churn=0.1, seed=7).scan()
+    assert len(first) == 500
+    assert len({proc['pid'] for proc in first}) == 500
+    assert all(proc['ppid'] < proc['pid'] for proc in first)
+
+    backend = SyntheticProcessBackend(500, churn=0.1, seed=7)
+    before = {proc['pid'] for proc in backend.scan()}
+    after = backend.scan()
+    assert 0 < len({proc['pid'] for proc in after} - before) <= 50
+    # Scans hand out copies, so the caller can annotate them freely.
+    after[0]['anomaly'] = 'leak'
+    assert 'anomaly' not in backend.processes[0]
+
+
+def test_measure_reports_latency_and_peak_memory():
+    calls = []
+    result = measure(lambda: calls.append(bytearray(256 * 1024)), 5, prepare=calls.clear)
+    assert result['iterations'] == 5
+    assert result['p99_ms'] >= result['p50_ms'] >= 0
+    assert result['peak_kb'] >= 256
+
+
+def test_compare_flags_slowdowns_over_the_threshold(capsys):
+    baseline = {'a@100': {'p50_ms': 10.0}, 'b@100': {'p50_ms': 10.0}, 'gone@100': {'p50_ms': 1.0}}
+    results = {'a@100': {'p50_ms': 11.0}, 'b@100': {'p50_ms': 13.0}, 'new@100': {'p50_ms': 5.0}}
+    assert compare(results, baseline, 0.2) == ['b@100']
+    assert 'REGRESSION' in capsys.readouterr().out
+
+
+def test_headless_run_writes_a_report_and_compares(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / 'first.json'
+    assert benchmark.main(['--no-gui', '--sizes', '50', '--iterations', '2', '--output', str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert set(report['results']) == {'refresh_processes@50', 'refresh_processes_windowed@50'}
+    assert report['meta']['gui'] is False
+
+    # Against a baseline that was impossibly fast, every path is a regression.
+    for result in report['results'].values():
+        result['p50_ms'] = 1e-6
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(report))
+    assert benchmark.main(['--no-gui', '--sizes', '50', '--iterations', '2', '--output', str(tmp_path / 'second.json'),
+                           '--baseline', str(baseline)]) == 1
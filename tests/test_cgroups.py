@@ -0,0 +1,165 @@
+import numpy as np
+
+from cgroups import CgroupCollector, is_cgroup2
+
+
+def write_cgroup(root, path, usage_usec, memory_bytes, rbytes, wbytes, tasks=1):
+    directory = root / path.lstrip('/')
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / 'cpu.stat').write_text(f"usage_usec {usage_usec}\nuser_usec 0\nsystem_usec 0\n")
+    (directory / 'memory.current').write_text(f"{memory_bytes}\n")
+    (directory / 'io.stat').write_text(f"8:0 rbytes={rbytes} wbytes={wbytes} rios=1 wios=1 dbytes=0 dios=0\n")
+    (directory / 'pids.current').write_text(f"{tasks}\n")
+
+
+def write_process(proc_root, pid, path):
+    directory = proc_root / str(pid)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / 'cgroup').write_text(f"1:name=systemd:/\n0::{path}\n")
+
+
+def process(pid, name='worker'):
+    return {'pid': pid, 'create_time': 100.0 + pid, 'name': name}
+
+
+def make_tree(tmp_path):
+    root = tmp_path / 'cgroup'
+    proc_root = tmp_path / 'proc'
+    root.mkdir()
+    (root / 'cgroup.controllers').write_text('cpu io memory pids\n')
+    # The root has no memory.current or pids.current.
+    (root / 'cpu.stat').write_text("usage_usec 4000000\nuser_usec 0\nsystem_usec 0\n")
+    (root / 'io.stat').write_text("8:0 rbytes=4096 wbytes=0 rios=1 wios=0 dbytes=0 dios=0\n")
+    write_cgroup(root, '/system.slice', 1_000_000, 64 * 1024 * 1024, 0, 0, tasks=3)
+    write_cgroup(root, '/system.slice/web.service', 500_000, 32 * 1024 * 1024, 1024, 2048, tasks=2)
+    write_cgroup(root, '/system.slice/db.service', 200_000, 16 * 1024 * 1024, 0, 0)
+    write_process(proc_root, 10, '/system.slice/web.service')
+    write_process(proc_root, 11, '/system.slice/web.service')
+    write_process(proc_root, 20, '/system.slice/db.service')
+    write_process(proc_root, 1, '/')
+    return root, proc_root
+
+
+def by_path(collector):
+    return {group['path']: group for group in collector.records}
+
+
+def test_detects_unified_hierarchy(tmp_path):
+    root, _ = make_tree(tmp_path)
+    assert is_cgroup2(str(root))
+    assert not is_cgroup2(str(tmp_path))
+
+
+def test_rates_from_two_passes(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    processes = [process(pid) for pid in (1, 10, 11, 20)]
+    collector.update(processes, 1000.0)
+    groups = by_path(collector)
+    assert set(groups) == {'/', '/system.slice', '/system.slice/web.service', '/system.slice/db.service'}
+    # Counters are cumulative, so the first pass has no rates yet.
+    assert groups['/system.slice/web.service']['cpu_percent'] is None
+    assert groups['/system.slice/web.service']['io_rate'] is None
+    assert groups['/system.slice/web.service']['memory_mb'] == 32
+
+    # 1.5 s of CPU and 6 KB of I/O over 2 s.
+    write_cgroup(root, '/system.slice/web.service', 2_000_000, 48 * 1024 * 1024, 1024 + 4096, 2048 + 2048, tasks=2)
+    collector.update([process(pid) for pid in (1, 10, 11, 20)], 1002.0)
+    web = by_path(collector)['/system.slice/web.service']
+    assert web['cpu_percent'] == 75.0
+    assert web['io_rate'] == 3.0
+    assert web['memory_mb'] == 48
+    assert web['tasks'] == 2
+    db = by_path(collector)['/system.slice/db.service']
+    assert db['cpu_percent'] == 0.0
+    assert db['io_rate'] == 0.0
+
+    times, values = collector.history_window(['/system.slice/web.service', '/missing'])
+    assert list(times) == [1000.0, 1002.0]
+    assert values[1, 0] == 75.0
+    assert np.isnan(values[:, 1]).all()
+
+
+def test_maps_processes_to_cgroups(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    processes = [process(pid) for pid in (1, 10, 11, 20)]
+    collector.update(processes, 1000.0)
+    assert {proc['pid']: proc['cgroup'] for proc in processes} == {
+        1: '/', 10: '/system.slice/web.service', 11: '/system.slice/web.service', 20: '/system.slice/db.service'}
+    groups = by_path(collector)
+    assert groups['/system.slice/web.service']['processes'] == 2
+    assert groups['/system.slice/db.service']['processes'] == 1
+    # Only direct members are counted.
+    assert groups['/system.slice']['processes'] == 0
+    assert groups['/']['processes'] == 1
+
+
+def test_membership_is_cached_until_the_process_execs(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    collector.update([process(10)], 1000.0)
+    write_process(proc_root, 10, '/system.slice/db.service')
+    processes = [process(10)]
+    collector.update(processes, 1002.0)
+    assert processes[0]['cgroup'] == '/system.slice/web.service'
+    processes = [process(10, name='postgres')]
+    collector.update(processes, 1004.0)
+    assert processes[0]['cgroup'] == '/system.slice/db.service'
+
+
+def test_removed_cgroups_are_dropped(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    collector.update([process(pid) for pid in (10, 11, 20)], 1000.0)
+    walked = collector.walked
+
+    # The db service stops: its processes exit and the kernel removes its files with the directory.
+    for name in ('cpu.stat', 'memory.current', 'io.stat', 'pids.current'):
+        (root / 'system.slice' / 'db.service' / name).unlink()
+    (root / 'system.slice' / 'db.service').rmdir()
+    collector.update([process(pid) for pid in (10, 11)], 1002.0)
+    assert '/system.slice/db.service' not in by_path(collector)
+    assert '/system.slice/db.service' not in collector.paths
+    # Dropped from the cached tree without listing the directories again.
+    assert collector.walked == walked
+    assert len(collector.slots) == 3
+
+
+def test_new_cgroup_with_a_process_is_found_before_the_next_walk(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    collector.update([process(10)], 1000.0)
+    write_cgroup(root, '/system.slice/cache.service', 0, 1024 * 1024, 0, 0)
+    write_process(proc_root, 30, '/system.slice/cache.service')
+    collector.update([process(10), process(30)], 1002.0)
+    assert by_path(collector)['/system.slice/cache.service']['processes'] == 1
+
+
+def test_recreated_cgroup_restarts_its_rates(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    collector.update([], 1000.0)
+    write_cgroup(root, '/system.slice/web.service', 10, 0, 0, 0)
+    collector.update([], 1002.0)
+    web = by_path(collector)['/system.slice/web.service']
+    assert web['cpu_percent'] is None
+    assert web['io_rate'] is None
+
+
+def test_root_is_the_host_total_and_history_keeps_scan_times(tmp_path):
+    root, proc_root = make_tree(tmp_path)
+    collector = CgroupCollector(str(root), str(proc_root))
+    # Scans come at the pace the scheduler picks, not once a second.
+    for now, usage in ((1000.0, 4_000_000), (1003.0, 7_000_000), (1013.0, 17_000_000)):
+        (root / 'cpu.stat').write_text(f"usage_usec {usage}\n")
+        collector.update([process(1)], now)
+    host = by_path(collector)['/']
+    assert host['name'] == '/'
+    assert host['cpu_percent'] == 100.0
+    assert host['io_rate'] == 0.0
+    assert host['memory_mb'] is None
+
+    times, values = collector.history_window(['/'])
+    assert times.tolist() == [1000.0, 1003.0, 1013.0]
+    assert values[1:, 0].tolist() == [100.0, 100.0]
@@ -0,0 +1,65 @@
+import os
+import time
+
+import psutil
+
+from collector import MetricsCollector, ProcessPool, ProcessSnapshot
+
+
+def test_pool_keeps_handles_and_reopens_a_reused_pid():
+    pool = ProcessPool()
+    pool.scan()
+    handle = pool.handles[os.getpid()]
+    processes = {proc['pid']: proc for proc in pool.scan()}
+    me = processes[os.getpid()]
+    assert pool.handles[os.getpid()] is handle
+    assert me['ppid'] == os.getppid()
+    assert me['create_time'] == handle.create_time()
+    assert (os.getpid(), me['create_time']) in pool.details
+
+    # A different start time means the PID now belongs to another process.
+    pool.started[os.getpid()] = object()
+    pool.scan()
+    assert pool.handles[os.getpid()] is not handle
+
+
+def test_threads_survive_a_failed_read(monkeypatch):
+    collector = MetricsCollector({'selected_disk': '/'}, interval=0.01)
+    real_sample = collector.sample
+    calls = []
+
+    def sample(devices=True):
+        calls.append(devices)
+        if len(calls) == 1:
+            raise psutil.AccessDenied(1)
+        return real_sample(devices)
+
+    collector.sample = sample
+    collector.start()
+    try:
+        assert collector.samples.get(timeout=5)['cpu_percent'] >= 0
+    finally:
+        collector.stop()
+        collector.join(5)
+    assert len(calls) >= 2
+
+    snapshot = ProcessSnapshot(0.01, 'psutil')
+    scans = []
+
+    def scan():
+        scans.append(None)
+        if len(scans) == 1:
+            raise OSError('/proc went away')
+        return [{'pid': 1, 'cpu_percent': 0.0}]
+
+    snapshot.scan = scan
+    snapshot.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not snapshot.generation and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        snapshot.stop()
+        snapshot.join(5)
+    assert snapshot.get() == [{'pid': 1, 'cpu_percent': 0.0}]
+    assert len(scans) >= 2
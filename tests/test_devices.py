@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+import psutil
+
+from collector import IGNORED_DISKS, MetricsCollector, counter_rates
+from metric_store import DeviceStore
+
+Disk = namedtuple('Disk', 'read_bytes write_bytes')
+
+
+def test_counter_rates_per_device():
+    previous = {'sda': Disk(0, 0), 'sdb': Disk(10 * 1024, 0)}
+    current = {'sda': Disk(4096, 4096), 'sdb': Disk(0, 0), 'sdc': Disk(1 << 30, 0)}
+    rates = counter_rates(current, previous, ('read_bytes', 'write_bytes'), 2.0)
+    # A device that just appeared has no rate yet; a counter that went backwards reads as idle.
+    assert rates == {'sda': 4.0, 'sdb': 0.0, 'sdc': 0.0}
+
+
+def test_device_store_restarts_history_when_devices_change():
+    store = DeviceStore(tiers=((1, 60), (10, 60)))
+    times, values = store.window(60)
+    assert values.shape == (0, 0)
+
+    for t in range(10):
+        store.append_mapping(float(t), {'eth0': 1.0, 'lo': 2.0})
+    times, values = store.window(60, now=9.0)
+    assert store.names == ['eth0', 'lo']
+    assert values.shape == (10, 2)
+    assert (values[:, 1] == 2.0).all()
+
+    store.append_mapping(10.0, {'eth0': 5.0, 'lo': 2.0, 'wlan0': 3.0})
+    times, values = store.window(60, now=10.0)
+    assert times.tolist() == [10.0]
+    assert values.tolist() == [[5.0, 2.0, 3.0]]
+
+
+def test_device_store_uses_coarser_tiers_for_long_spans():
+    store = DeviceStore(tiers=((1, 60), (10, 60)), max_points=100)
+    for t in range(300):
+        store.append(float(t), ['0', '1'], [t % 10, 100.0])
+    times, values = store.window(300, now=299.0)
+    assert times[1] - times[0] == 10.0
+    assert (values[:-1, 0] == 4.5).all()
+
+
+def test_sample_reports_cores_disks_and_nics():
+    collector = MetricsCollector({'selected_disk': '/'})
+    sample = collector.sample()
+    assert len(sample['cores']) == psutil.cpu_count()
+    assert sample['cpu_percent'] == round(sum(sample['cores']) / len(sample['cores']), 1)
+    assert not any(name.startswith(IGNORED_DISKS) for name in sample['disks'])
+    assert set(sample['nics']) == set(psutil.net_io_counters(pernic=True))
+    assert all(rate >= 0 for rate in list(sample['disks'].values()) + list(sample['nics'].values()))
+    assert 'cores' not in collector.sample(devices=False)
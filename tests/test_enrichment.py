@@ -0,0 +1,106 @@
+import os
+
+import psutil
+
+import enrichment
+from enrichment import Enricher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        if pid == 13:
+            raise psutil.AccessDenied(pid)
+        self.pid = pid
+
+    def create_time(self):
+        return 1000.0 + self.pid
+
+
+def process(pid, cpu_percent=0.0, memory_mb=10.0, create_time=None):
+    return {'pid': pid, 'create_time': 1000.0 + pid if create_time is None else create_time,
+            'cpu_percent': cpu_percent, 'memory_mb': memory_mb}
+
+
+def make_enricher(monkeypatch, budget, top=2):
+    clock = Clock()
+    monkeypatch.setattr(enrichment.time, 'perf_counter', clock)
+    monkeypatch.setattr(enrichment.psutil, 'Process', FakeProcess)
+    enricher = Enricher(budget=budget, max_age=10.0, top=top)
+    probed = []
+
+    def probe(handle):
+        # Every probe costs one clock unit.
+        clock.now += 1
+        probed.append(handle.pid)
+        return {'threads': handle.pid % 7}
+
+    enricher.probes = {'threads': probe}
+    return enricher, probed
+
+
+def test_budget_probes_visible_rows_then_top_consumers_then_the_rest(monkeypatch):
+    enricher, probed = make_enricher(monkeypatch, budget=3.5, top=1)
+    table = [process(pid) for pid in range(1, 21)]
+    table[9]['cpu_percent'] = 90.0
+    table[14]['memory_mb'] = 4096.0
+    enricher.visible = ((5, 1005.0),)
+
+    enricher.update(table, 0.0)
+    assert probed == [5, 10, 15, 1]
+    assert enricher.probed == 4
+    assert table[4]['threads'] == 5
+    assert table[4]['enriched'] == {'threads': 0.0}
+    assert 'threads' not in table[1]
+
+    # The round-robin cursor carries on where it stopped; fresh values are not probed again.
+    probed.clear()
+    enricher.update(table, 1.0)
+    assert probed == [2, 3, 4, 6]
+
+
+def test_every_process_is_refreshed_eventually(monkeypatch):
+    enricher, probed = make_enricher(monkeypatch, budget=2.5)
+    table = [process(pid) for pid in range(1, 31)]
+    for tick in range(10):
+        enricher.update(table, float(tick))
+    # pid 13 is denied, so its probe never runs and it gets no value.
+    assert set(probed) == set(range(1, 31)) - {13}
+    assert all('threads' in proc for proc in table if proc['pid'] != 13)
+
+    # After max_age the values are due again.
+    probed.clear()
+    enricher.update(table, 30.0)
+    assert len(probed) == 3
+
+
+def test_exited_reused_and_denied_processes(monkeypatch):
+    enricher, probed = make_enricher(monkeypatch, budget=100)
+    table = [process(1), process(2, create_time=5.0), process(13)]
+    enricher.update(table, 0.0)
+    # pid 2 was reused since the scan and pid 13 is denied: both are skipped, and not asked again.
+    assert probed == [1]
+    assert table[1]['enriched'] == {'threads': 0.0}
+    assert 'threads' not in table[1]
+    enricher.update(table, 1.0)
+    assert probed == [1]
+
+    enricher.update(table[:1], 2.0)
+    assert list(enricher.cache) == [(1, 1001.0)]
+
+
+def test_real_probes_on_this_process():
+    me = psutil.Process(os.getpid())
+    enricher = Enricher(budget=1.0)
+    table = [{'pid': me.pid, 'create_time': me.create_time(), 'cpu_percent': 0.0, 'memory_mb': 1.0}]
+    enricher.update(table, 0.0)
+    assert table[0]['threads'] >= 1
+    assert table[0]['uss_mb'] > 0
+    assert set(table[0]['enriched']) == set(enricher.probes)
@@ -0,0 +1,180 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+import fleet
+from collector import SERIES
+from fleet import (FleetAggregator, FleetState, MetricsDecoder, MetricsEncoder, ProcessTableDecoder,
+                   ProcessTableEncoder, stream_to_aggregator)
+from headless import FRAME_HEADER
+
+
+def sample(timestamp, cpu_percent=10.0, **values):
+    record = {name: 0.0 for name in SERIES}
+    record.update(cpu_percent=cpu_percent, time=timestamp, **values)
+    return record
+
+
+def process(pid, name='worker', cpu_percent=1.0, status='running'):
+    return {'pid': pid, 'name': name, 'status': status, 'cpu_percent': cpu_percent,
+            'memory_percent': 0.5, 'memory_mb': 12.0}
+
+
+def payload(frame):
+    return frame[FRAME_HEADER.size:]
+
+
+class FakeCollector:
+    def __init__(self):
+        self.samples = queue.Queue()
+
+    def drain(self):
+        return []
+
+
+class FakeSnapshot:
+    def __init__(self, processes):
+        self.generation = 1
+        self.processes = processes
+
+    def get(self):
+        return self.processes
+
+
+class Agent:
+    def __init__(self, port, hostname, collector, snapshot=None):
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=asyncio.run,
+            args=(stream_to_aggregator('127.0.0.1', port, hostname, collector, snapshot, self.stop_event),),
+            daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(5)
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = FleetAggregator('127.0.0.1', 0)
+    aggregator.start()
+    assert aggregator.ready.wait(5)
+    yield aggregator
+    aggregator.stop()
+
+
+def wait_for(aggregator, state, condition):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        state.apply(aggregator.drain())
+        if condition():
+            return
+        time.sleep(0.02)
+    raise AssertionError("aggregator did not reach the expected state")
+
+
+def test_metrics_delta_sends_only_changed_series():
+    encoder = MetricsEncoder()
+    decoder = MetricsDecoder()
+    first = encoder.encode(sample(1.0, cpu_percent=10.0, memory_percent=40.0))
+    second = encoder.encode(sample(2.0, cpu_percent=12.5, memory_percent=40.0))
+
+    assert len(second) < len(first)
+    assert decoder.decode(payload(first))['memory_percent'] == 40.0
+    decoded = decoder.decode(payload(second))
+    assert decoded['time'] == 2.0
+    assert decoded['cpu_percent'] == 12.5
+    assert decoded['memory_percent'] == 40.0
+
+
+def test_process_table_delta_handles_removals_and_label_changes():
+    encoder = ProcessTableEncoder()
+    decoder = ProcessTableDecoder()
+    decoder.decode(payload(encoder.encode(1.0, [process(1, 'init'), process(2, 'worker'), process(3, 'cron')])))
+
+    idle = encoder.encode(2.0, [process(1, 'init'), process(2, 'worker'), process(3, 'cron')])
+    timestamp, table = decoder.decode(payload(idle))
+    assert timestamp == 2.0
+    assert len(idle) == FRAME_HEADER.size + fleet.PROCESSES_HEADER.size
+    assert len(table) == 3
+
+    changed = encoder.encode(3.0, [process(1, 'init', cpu_percent=50.0), process(2, 'worker', status='sleeping')])
+    _, table = decoder.decode(payload(changed))
+    rows = {proc['pid']: proc for proc in table}
+    assert set(rows) == {1, 2}
+    assert rows[1]['cpu_percent'] == 50.0
+    assert rows[1]['name'] == 'init'
+    assert rows[2]['status'] == 'sleeping'
+
+
+def test_agent_streams_deltas_and_reconnects(aggregator):
+    state = FleetState()
+    collector = FakeCollector()
+    snapshot = FakeSnapshot([process(1, 'init'), process(2, 'worker')])
+    agent = Agent(aggregator.port, 'db1', collector, snapshot)
+    collector.samples.put(sample(1.0, cpu_percent=10.0))
+    collector.samples.put(sample(2.0, cpu_percent=20.0))
+    wait_for(aggregator, state, lambda: 'db1' in state.hosts and state.hosts['db1'].latest
+             and state.hosts['db1'].latest['time'] == 2.0)
+
+    host = state.hosts['db1']
+    assert host.connected
+    assert host.latest['cpu_percent'] == 20.0
+    assert sorted(proc['name'] for proc in host.processes) == ['init', 'worker']
+
+    agent.stop()
+    wait_for(aggregator, state, lambda: not state.hosts['db1'].connected)
+
+    # A reconnect starts new codecs on both ends and lands on the same host and history.
+    collector = FakeCollector()
+    agent = Agent(aggregator.port, 'db1', collector, FakeSnapshot([process(3, 'cron')]))
+    collector.samples.put(sample(3.0, cpu_percent=30.0))
+    wait_for(aggregator, state, lambda: state.hosts['db1'].connected and state.hosts['db1'].latest['time'] == 3.0)
+    agent.stop()
+
+    assert list(state.hosts) == ['db1']
+    assert state.hosts['db1'] is host
+    assert [proc['name'] for proc in host.processes] == ['cron']
+
+
+def test_duplicate_host_names_are_kept_apart(aggregator):
+    state = FleetState()
+    first = FakeCollector()
+    second = FakeCollector()
+    agents = [Agent(aggregator.port, 'web', first)]
+    wait_for(aggregator, state, lambda: 'web' in state.hosts)
+    agents.append(Agent(aggregator.port, 'web', second))
+    wait_for(aggregator, state, lambda: len(state.hosts) == 2)
+
+    first.samples.put(sample(1.0, cpu_percent=10.0))
+    second.samples.put(sample(1.0, cpu_percent=90.0))
+    wait_for(aggregator, state, lambda: all(host.latest for host in state.hosts.values()))
+    for agent in agents:
+        agent.stop()
+
+    duplicate = next(name for name in state.hosts if name != 'web')
+    assert duplicate.startswith('web (127.0.0.1:')
+    assert state.hosts['web'].latest['cpu_percent'] == 10.0
+    assert state.hosts[duplicate].latest['cpu_percent'] == 90.0
+
+
+def test_pending_samples_are_bounded(monkeypatch):
+    monkeypatch.setattr(fleet, 'MAX_PENDING_SAMPLES', 5)
+    aggregator = FleetAggregator()
+    aggregator.push('db1', 'connected', ('10.0.0.2', 5000))
+    for timestamp in range(20):
+        aggregator.push('db1', 'metrics', sample(float(timestamp)))
+        aggregator.push('db1', 'processes', (float(timestamp), [process(timestamp)]))
+    aggregator.push('db1', 'disconnected')
+
+    events = aggregator.drain()
+    assert [kind for kind, _, _ in events] == ['connected'] + ['metrics'] * 5 + ['processes', 'disconnected']
+    assert [data['time'] for kind, _, data in events if kind == 'metrics'] == [15.0, 16.0, 17.0, 18.0, 19.0]
+    assert events[-2][2][0] == 19.0
+    assert aggregator.dropped == 15
+    assert aggregator.drain() == []
@@ -0,0 +1,145 @@
+import json
+import queue
+
+import headless
+from headless import FRAME_HEADER, FRAME_METRICS, FRAME_PROCESSES, METRICS, PROCESS, PROCESSES
+from main import parse_args
+
+
+def sample(time, cpu_percent=12.5):
+    return {'time': time, 'cpu_percent': cpu_percent, 'memory_percent': 40.0, 'disk_percent': 70.0,
+            'bytes_sent': 1024.0, 'bytes_recv': 2048.0}
+
+
+def process(pid, name, status='running', cpu_percent=1.5):
+    return {'pid': pid, 'name': name, 'status': status, 'cpu_percent': cpu_percent, 'memory_percent': 0.5,
+            'memory_mb': 64.0}
+
+
+def short_string(data, offset):
+    end = offset + 1 + data[offset]
+    return data[offset + 1:end].decode('utf-8'), end
+
+
+def read_frames(data):
+    frames = []
+    offset = 0
+    while offset < len(data):
+        length, kind = FRAME_HEADER.unpack_from(data, offset)
+        start = offset + FRAME_HEADER.size
+        # The length counts the kind byte and the payload.
+        offset = start + length - 1
+        frames.append((kind, data[start:offset]))
+    return frames
+
+
+def decode_processes(payload):
+    timestamp, count = PROCESSES.unpack_from(payload)
+    offset = PROCESSES.size
+    processes = []
+    for _ in range(count):
+        pid, cpu_percent, memory_percent, memory_mb = PROCESS.unpack_from(payload, offset)
+        name, offset = short_string(payload, offset + PROCESS.size)
+        status, offset = short_string(payload, offset)
+        processes.append((pid, cpu_percent, memory_percent, memory_mb, name, status))
+    assert offset == len(payload)
+    return timestamp, processes
+
+
+def test_binary_frames_round_trip():
+    data = headless.encode_metrics(sample(1000.25))
+    assert FRAME_HEADER.unpack_from(data) == (1 + METRICS.size, FRAME_METRICS)
+    [(kind, payload)] = read_frames(data)
+    assert METRICS.unpack(payload) == (1000.25, 12.5, 40.0, 70.0, 1024.0, 2048.0)
+
+    processes = [process(1, 'systemd', 'sleeping', None), process(4242, 'демон ' + 'x' * 300)]
+    data = headless.encode_processes(1000.5, processes)
+    [(kind, payload)] = read_frames(data)
+    assert kind == FRAME_PROCESSES
+    timestamp, decoded = decode_processes(payload)
+    assert timestamp == 1000.5
+    assert decoded[0] == (1, 0.0, 0.5, 64.0, 'systemd', 'sleeping')
+    # Names are cut to 255 bytes.
+    assert decoded[1][:4] == (4242, 1.5, 0.5, 64.0)
+    assert decoded[1][4] == ('демон ' + 'x' * 300).encode('utf-8')[:255].decode('utf-8')
+
+
+class FakeCollector:
+    samples_queued = 10
+    alive = True
+
+    def __init__(self, settings, interval):
+        self.samples = queue.Queue()
+        for index in range(self.samples_queued):
+            self.samples.put(sample(float(index)))
+        self.stopped = False
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return self.alive
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeSnapshot:
+    def __init__(self, interval, backend):
+        # One process table, scanned before the first sample arrives.
+        self.generation = 1
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return True
+
+    def stop(self):
+        pass
+
+    def get(self):
+        return [process(7, 'worker')]
+
+
+def run(monkeypatch, tmp_path, *options, status=0):
+    collectors = []
+
+    def make_collector(*args):
+        collectors.append(FakeCollector(*args))
+        return collectors[-1]
+
+    monkeypatch.setattr(headless, 'MetricsCollector', make_collector)
+    monkeypatch.setattr(headless, 'ProcessSnapshot', FakeSnapshot)
+    output = tmp_path / 'out'
+    args = parse_args(['--headless', '--output', str(output), *options])
+    assert headless.run_headless(args) == status
+    assert collectors[0].stopped
+    return output
+
+
+def test_count_stops_after_that_many_samples(monkeypatch, tmp_path):
+    output = run(monkeypatch, tmp_path, '--count', '3')
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line['time'] for line in lines] == [0.0, 1.0, 2.0]
+    assert all(line['type'] == 'metrics' for line in lines)
+
+
+def test_binary_stream_with_processes(monkeypatch, tmp_path):
+    output = run(monkeypatch, tmp_path, '--format', 'binary', '--processes', '--count', '2')
+    frames = read_frames(output.read_bytes())
+    assert [kind for kind, _ in frames] == [FRAME_METRICS, FRAME_PROCESSES, FRAME_METRICS]
+    assert METRICS.unpack(frames[2][1])[0] == 1.0
+    timestamp, processes = decode_processes(frames[1][1])
+    # The table is stamped with the sample it follows.
+    assert timestamp == 0.0
+    assert processes == [(7, 1.5, 0.5, 64.0, 'worker', 'running')]
+
+
+def test_exits_when_the_collector_thread_dies(monkeypatch, tmp_path):
+    monkeypatch.setattr(headless, 'POLL_INTERVAL', 0.01)
+    # The thread died after queuing two samples; those are still written.
+    monkeypatch.setattr(FakeCollector, 'samples_queued', 2)
+    monkeypatch.setattr(FakeCollector, 'alive', False)
+    output = run(monkeypatch, tmp_path, '--count', '5', status=1)
+    assert len(output.read_text().splitlines()) == 2
@@ -0,0 +1,31 @@
+import numpy as np
+
+from heatmap import resample
+
+
+def test_columns_follow_uneven_timestamps():
+    # One sample a second, then the scheduler backs off to 4 s, then a pause, then 2 s steps.
+    times = np.array([-30.0, -29.0, -28.0, -24.0, -20.0, -16.0, -6.0, -4.0, -2.0])
+    values = np.arange(len(times), dtype=float)[:, None]
+    grid = resample(times, values, -30, 0, columns=30)[:, 0]
+
+    assert grid[:3].tolist() == [0.0, 1.0, 2.0]
+    # The 4 s steps fill the columns up to the next sample.
+    assert grid[3:6].tolist() == [2.0, 2.0, 2.0]
+    assert grid[6:10].tolist() == [3.0] * 4
+    # The pause is held for at most two typical steps, then left blank.
+    assert grid[14:18].tolist() == [5.0] * 4
+    assert np.isnan(grid[22:24]).all()
+    assert grid[24:].tolist() == [6.0, 6.0, 7.0, 7.0, 8.0, 8.0]
+
+
+def test_samples_before_the_span_and_missing_values():
+    times = np.array([-100.0, -9.0, -7.0, -5.0])
+    values = np.array([[1.0, 1.0], [2.0, np.nan], [3.0, 3.0], [4.0, 4.0]])
+    grid = resample(times, values, -10, 0, columns=10)
+    # The old sample is held for two typical steps only, and the last one for two steps past its time.
+    assert np.isnan(grid[0]).all()
+    assert grid[1:3, 0].tolist() == [2.0, 2.0]
+    assert np.isnan(grid[1:3, 1]).all()
+    assert grid[3:9].tolist() == [[3.0, 3.0]] * 2 + [[4.0, 4.0]] * 4
+    assert np.isnan(grid[9]).all()
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+
+from history_file import HEADER, HistoryReader, HistoryWriter, list_segments, record_dtype
+
+SERIES = ('cpu_percent', 'memory_percent')
+
+
+def write(writer, times):
+    for timestamp in times:
+        writer.append(float(timestamp), [timestamp % 100, 50.0])
+
+
+def segment_sizes(directory):
+    itemsize = record_dtype(len(SERIES)).itemsize
+    return [(os.path.getsize(path) - HEADER.size) // itemsize for path in list_segments(directory)]
+
+
+def test_batches_are_split_at_the_segment_boundary(tmp_path):
+    writer = HistoryWriter(str(tmp_path), SERIES, segment_records=100, batch_size=60)
+    write(writer, range(1000, 1250))
+    writer.close()
+
+    assert segment_sizes(tmp_path) == [100, 100, 50]
+    reader = HistoryReader(str(tmp_path))
+    times, values = reader.query(0, 2000, list(SERIES))
+    reader.close()
+    assert np.array_equal(times, np.arange(1000, 1250))
+    assert np.array_equal(values[:, 0], np.arange(1000, 1250) % 100)
+
+
+def test_batch_larger_than_a_segment_spans_several(tmp_path):
+    writer = HistoryWriter(str(tmp_path), SERIES, segment_records=40, retention_segments=10, batch_size=500)
+    write(writer, range(130))
+    writer.close()
+    assert segment_sizes(tmp_path) == [40, 40, 40, 10]
+    # Each segment is named after its first timestamp.
+    assert [os.path.basename(path) for path in list_segments(tmp_path)][1] == "segment-000000000040000.bin"
+
+
+def test_reopens_the_last_segment_and_enforces_retention(tmp_path):
+    writer = HistoryWriter(str(tmp_path), SERIES, segment_records=100, retention_segments=2, batch_size=10)
+    write(writer, range(150))
+    writer.close()
+    # A crash can leave half a record behind; it is dropped when the segment is reopened.
+    with open(list_segments(tmp_path)[-1], 'ab') as f:
+        f.write(b'\0' * 5)
+
+    writer = HistoryWriter(str(tmp_path), SERIES, segment_records=100, retention_segments=2, batch_size=10)
+    write(writer, range(150, 260))
+    writer.close()
+    assert segment_sizes(tmp_path) == [100, 60]
+
+    reader = HistoryReader(str(tmp_path))
+    times, _ = reader.query(0, 1000, list(SERIES))
+    reader.close()
+    assert np.array_equal(times, np.arange(100, 260))
+
+
+def test_series_missing_from_an_older_segment_read_as_nan(tmp_path):
+    writer = HistoryWriter(str(tmp_path), SERIES[:1], batch_size=10)
+    for timestamp in range(10):
+        writer.append(float(timestamp), [timestamp])
+    writer.close()
+    reader = HistoryReader(str(tmp_path))
+    times, values = reader.query(2, 5, list(SERIES))
+    reader.close()
+    assert np.array_equal(times, [2, 3, 4, 5])
+    assert np.isnan(values[:, 1]).all()
+
+
+def test_rotation_never_appends_to_an_existing_segment(tmp_path):
+    writer = HistoryWriter(str(tmp_path), SERIES, segment_records=10, batch_size=10)
+    write(writer, range(1000, 1010))
+    writer.close()
+
+    # The clock stepped back: the new segment would start at the same millisecond as the old one.
+    writer = HistoryWriter(str(tmp_path), SERIES, segment_records=10, batch_size=10)
+    write(writer, range(1000, 1005))
+    writer.close()
+    names = [os.path.basename(path) for path in list_segments(tmp_path)]
+    assert names == ["segment-000000001000000.bin", "segment-000000001000001.bin"]
+    assert segment_sizes(tmp_path) == [10, 5]
+
+    reader = HistoryReader(str(tmp_path))
+    times, _ = reader.query(0, 2000, list(SERIES))
+    reader.close()
+    assert np.array_equal(times, np.concatenate([np.arange(1000, 1010), np.arange(1000, 1005)]))
@@ -0,0 +1,109 @@
+import numpy as np
+
+import gui
+from instrumentation import Instrumentation, LatencyHistogram, bucket_index, bucket_value
+
+
+def test_buckets_are_within_six_percent():
+    for micros in [0, 1, 15, 16, 17, 100, 999, 12345, 10 ** 6, 987654321]:
+        value = bucket_value(bucket_index(micros))
+        assert value <= micros
+        assert micros - value <= micros / 16
+
+
+def test_percentiles_match_the_recorded_distribution():
+    histogram = LatencyHistogram()
+    values = np.random.default_rng(3).exponential(0.01, 10000)
+    for value in values:
+        histogram.record(float(value))
+
+    summary = histogram.summary()
+    assert summary['count'] == 10000
+    for q, key in ((50, 'p50_ms'), (90, 'p90_ms'), (99, 'p99_ms')):
+        exact = np.percentile(values, q) * 1000
+        assert abs(summary[key] - exact) <= exact * 0.07
+    assert summary['max_ms'] == values.max() * 1000
+    assert LatencyHistogram().summary()['p99_ms'] == 0.0
+
+
+class Worker:
+    def __init__(self):
+        self.calls = 0
+
+    def step(self):
+        self.calls += 1
+        if self.calls == 3:
+            raise ValueError("failed step")
+        return self.calls
+
+
+def test_instrumented_methods_are_timed_and_reset_in_place():
+    instruments = Instrumentation()
+    worker = Worker()
+    instruments.instrument(worker, 'step', 'worker step')
+    assert worker.step() == 1
+    assert worker.step() == 2
+    try:
+        worker.step()
+    except ValueError:
+        pass
+    assert instruments.histograms['worker step'].count == 3
+
+    instruments.reset()
+    worker.step()
+    report = instruments.export({'late_frames': 2})
+    assert report['histograms']['worker step']['count'] == 1
+    assert report['late_frames'] == 2
+
+
+class Notebook:
+    def __init__(self, selected):
+        self.selected = selected
+
+    def select(self):
+        return self.selected
+
+
+class Label:
+    def config(self, **options):
+        self.options = options
+
+
+class Root:
+    def __init__(self):
+        self.pending = {}
+        self.jobs = 0
+
+    def after(self, delay, callback):
+        self.jobs += 1
+        job = f"after#{self.jobs}"
+        self.pending[job] = callback
+        return job
+
+    def after_cancel(self, job):
+        self.pending.pop(job, None)
+
+
+def test_returning_to_the_debug_tab_keeps_one_refresh_chain():
+    monitor = gui.SystemMonitor.__new__(gui.SystemMonitor)
+    monitor.settings = {'language': 'english'}
+    monitor.localization = {'english': {}}
+    monitor.instruments = None
+    monitor.debug_job = None
+    monitor.root = Root()
+    monitor.notebook = Notebook('debug')
+    monitor.debug_frame = 'debug'
+    monitor.monitor_frame = 'monitor'
+    monitor.debug_status_label = Label()
+    monitor.update_watched = lambda: None
+    monitor.reschedule_render = lambda: None
+
+    for _ in range(3):
+        monitor.on_tab_changed(None)
+    assert list(monitor.root.pending) == [monitor.debug_job]
+
+    # The timer firing reschedules itself, still as the only chain.
+    job = monitor.debug_job
+    monitor.root.pending.pop(job)()
+    assert list(monitor.root.pending) == [monitor.debug_job]
+    assert monitor.debug_status_label.options['text'] == 'instrumentation_off'
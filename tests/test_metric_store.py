@@ -0,0 +1,71 @@
+import numpy as np
+
+from metric_store import MetricStore, RingBuffer
+
+SERIES = ('cpu_percent', 'memory_percent')
+TIERS = ((1, 120), (10, 60), (60, 30))
+
+
+def test_tiers_roll_up_min_mean_and_max():
+    store = MetricStore(SERIES, tiers=TIERS)
+    for t in range(100):
+        store.append(float(t), [t % 10, 50.0])
+
+    tier = store.tiers[1]
+    times, mins, avgs, maxs = tier.window(0)
+    assert times.tolist() == [float(t) for t in range(0, 100, 10)]
+    assert mins[:, 0].tolist() == [0.0] * 10
+    assert avgs[:, 0].tolist() == [4.5] * 10
+    assert maxs[:, 0].tolist() == [9.0] * 10
+    assert (avgs[:, 1] == 50.0).all()
+
+
+def test_open_bucket_is_part_of_every_window():
+    store = MetricStore(SERIES, tiers=TIERS)
+    for t in range(65):
+        store.append(float(t), [float(t), 0.0])
+    times, _, avgs, _ = store.tiers[2].window(0)
+    assert times.tolist() == [0.0, 60.0]
+    assert avgs[:, 0].tolist() == [29.5, 62.0]
+
+
+def test_extend_matches_appending_one_by_one():
+    times = np.arange(1000.0, 1250.0, 0.5)
+    values = np.column_stack([np.sin(times) * 50 + 50, np.cos(times) * 20 + 40])
+    appended = MetricStore(SERIES, tiers=TIERS)
+    for timestamp, row in zip(times, values):
+        appended.append(timestamp, row)
+    extended = MetricStore(SERIES, tiers=TIERS)
+    extended.extend(times[:300], values[:300])
+    extended.extend(times[300:], values[300:])
+
+    assert extended.latest_time == appended.latest_time
+    for left, right in zip(appended.tiers, extended.tiers):
+        for a, b in zip(left.window(0), right.window(0)):
+            assert np.allclose(a, b)
+
+
+def test_finest_tier_that_covers_the_span_is_picked():
+    store = MetricStore(SERIES, tiers=TIERS, max_points=100)
+    assert store.pick_tier(60) is store.tiers[0]
+    # 120 one-second points are more than max_points.
+    assert store.pick_tier(120) is store.tiers[1]
+    assert store.pick_tier(600) is store.tiers[1]
+    assert store.pick_tier(10 ** 6) is store.tiers[-1]
+
+    for t in range(300):
+        store.append(float(t), [float(t), 0.0])
+    times, _, avgs, _ = store.series_window('cpu_percent', 60)
+    assert times[0] == 239.0 and times[-1] == 299.0
+    assert avgs[-1] == 299.0
+
+
+def test_ring_buffer_wraps_and_returns_oldest_first():
+    ring = RingBuffer(4, 1)
+    for t in range(6):
+        ring.append(float(t), [t], [t], [t])
+    times, _, _, _ = ring.last(10)
+    assert times.tolist() == [2.0, 3.0, 4.0, 5.0]
+    ring.extend(np.arange(10.0, 17.0), *(np.arange(7.0)[:, None],) * 3)
+    assert ring.last(2)[0].tolist() == [15.0, 16.0]
+    assert ring.last(4)[0].tolist() == [13.0, 14.0, 15.0, 16.0]
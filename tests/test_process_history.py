@@ -0,0 +1,108 @@
+import numpy as np
+
+from process_history import ProcessHistory
+
+MB = 1024 * 1024
+
+
+def process(pid, cpu_percent, memory_mb=100.0, io_bytes=0, create_time=None, name='worker'):
+    return {'pid': pid, 'create_time': 1000.0 + pid if create_time is None else create_time, 'name': name,
+            'status': 'running', 'ppid': 1, 'cpu_percent': cpu_percent, 'memory_mb': memory_mb,
+            'io_bytes': io_bytes}
+
+
+def by_pid(records):
+    return {proc['pid']: proc for proc in records}
+
+
+def test_record_sets_io_rates_and_sparklines():
+    history = ProcessHistory(1000 * MB, max_processes=8, spark_width=4)
+    first = [process(1, 0.0, io_bytes=0), process(2, 50.0, io_bytes=None)]
+    history.record(first, 10.0)
+    assert first[0]['io_rate'] is None
+    assert first[0]['cpu_trend'] == '   ▁'
+
+    for now, cpu_percent in ((12.0, 25.0), (14.0, 50.0), (16.0, 100.0)):
+        table = [process(1, cpu_percent, io_bytes=int((now - 10) * 4096)), process(2, 50.0, io_bytes=None)]
+        history.record(table, now)
+    assert table[0]['io_rate'] == 4.0
+    assert table[1]['io_rate'] is None
+    assert table[0]['cpu_trend'] == '▁▃▅█'
+    assert table[1]['cpu_trend'] == '████'
+
+
+def test_window_averages_and_marks_exited_processes():
+    history = ProcessHistory(1000 * MB, max_processes=8)
+    for now in range(0, 300, 10):
+        table = [process(1, 10.0, memory_mb=200.0)]
+        if now < 100:
+            table.append(process(2, 80.0))
+        if now >= 200:
+            table.append(process(3, 40.0))
+        history.record(table, float(now))
+
+    records = by_pid(history.window(60, 290.0))
+    assert set(records) == {1, 3}
+    assert records[1]['cpu_percent'] == 10.0
+    assert records[1]['memory_percent'] == 20.0
+
+    records = by_pid(history.window(300, 290.0))
+    assert records[2]['status'] == 'exited'
+    assert records[2]['cpu_percent'] == 80.0
+    assert records[3]['status'] == 'running'
+
+
+def test_reused_pid_prefers_the_running_process():
+    history = ProcessHistory(1000 * MB, max_processes=8)
+    history.record([process(5, 90.0, create_time=1.0, name='old')], 0.0)
+    history.record([process(5, 10.0, create_time=2.0, name='new')], 10.0)
+    records = history.window(60, 10.0)
+    assert [(proc['name'], proc['status']) for proc in records] == [('new', 'running')]
+
+
+def test_full_history_evicts_exited_processes_only():
+    history = ProcessHistory(1000 * MB, max_processes=4)
+    history.record([process(pid, 1.0) for pid in range(1, 5)], 0.0)
+    # Two processes exit and four new ones start: only the two exited slots can be reused.
+    history.record([process(1, 1.0), process(2, 1.0)] + [process(pid, 1.0) for pid in range(10, 14)], 10.0)
+    assert history.untracked == 2
+    assert set(pid for pid, _ in history.slots) == {1, 2, 10, 11}
+    assert np.isnan(history.values[0, history.slots[(10, 1010.0)], 0])
+
+
+def test_busy_newcomers_displace_idle_processes_when_the_table_is_full():
+    history = ProcessHistory(1000 * MB, max_processes=4, top=2)
+    history.record([process(pid, 0.0) for pid in range(1, 5)], 0.0)
+    # Eight live processes for four slots: the two busy newcomers take the slots of idle ones, one per scan
+    # in a table this small, and the quiet newcomers stay untracked.
+    for now in (10.0, 20.0):
+        table = [process(pid, 0.0) for pid in range(1, 5)]
+        table += [process(10, 90.0), process(11, 0.0, memory_mb=500.0), process(12, 0.5), process(13, 0.0)]
+        history.record(table, now)
+    assert history.untracked == 4
+    assert {10, 11} <= set(pid for pid, _ in history.slots)
+    assert len(history.slots) == 4
+    assert table[4]['cpu_trend'].endswith('█')
+    assert 'cpu_trend' not in table[-1]
+
+    # The window keeps only the top two per field, so it holds the newcomers and two idle processes.
+    records = by_pid(history.window(60, 20.0))
+    assert records[10]['cpu_percent'] == 90.0
+    assert records[11]['memory_mb'] == 500.0
+    assert len(records) <= 4
+    assert all(records[pid]['status'] == 'running' for pid in records)
+
+
+def test_window_sums_follow_the_ring_buffer():
+    history = ProcessHistory(1000 * MB, max_processes=2, points=8)
+    rng = np.random.default_rng(3)
+    samples = []
+    for step in range(40):
+        cpu = float(rng.integers(0, 100))
+        samples.append((step * 10.0, cpu))
+        history.record([process(1, cpu)], step * 10.0)
+        now = step * 10.0
+        for seconds in (60, 300):
+            # Only the columns still in the buffer and inside the window count.
+            kept = [value for time, value in samples[-8:] if time >= now - seconds]
+            assert history.window(seconds, now)[0]['cpu_percent'] == np.float32(np.mean(kept))
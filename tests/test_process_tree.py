@@ -0,0 +1,65 @@
+from process_tree import ProcessTree
+
+
+def process(pid, ppid, create_time, cpu_percent=1.0, name='worker'):
+    return {'pid': pid, 'ppid': ppid, 'create_time': create_time, 'name': name,
+            'cpu_percent': cpu_percent, 'memory_percent': 1.0}
+
+
+def pids(records):
+    return sorted(proc['pid'] for proc in records)
+
+
+def test_totals_fold_each_subtree_into_its_parent():
+    tree = ProcessTree()
+    tree.update([process(1, 0, 0), process(10, 1, 5), process(11, 10, 6, cpu_percent=4.0),
+                 process(12, 10, 7), process(20, 1, 8)])
+    assert pids(tree.child_records(None)) == [1]
+    assert pids(tree.child_records(10)) == [11, 12]
+    assert tree.totals[10] == [6.0, 3.0, 2]
+    assert tree.totals[1] == [8.0, 5.0, 4]
+    assert not tree.has_children(11)
+
+
+def test_children_listed_before_their_parent_and_reparenting():
+    tree = ProcessTree()
+    tree.update([process(11, 10, 6), process(10, 1, 5), process(1, 0, 0)])
+    assert pids(tree.child_records(None)) == [1]
+
+    # The parent exits and the child is reparented to init in a later scan.
+    tree.update([process(11, 10, 6), process(1, 0, 0)])
+    assert pids(tree.child_records(None)) == [1, 11]
+    tree.update([process(11, 1, 6), process(1, 0, 0)])
+    assert pids(tree.child_records(None)) == [1]
+    assert pids(tree.child_records(1)) == [11]
+    assert tree.totals[1][2] == 1
+
+
+def test_reused_pid_does_not_inherit_the_old_children():
+    tree = ProcessTree()
+    tree.update([process(1, 0, 0), process(10, 1, 5), process(11, 10, 6), process(12, 10, 7)])
+
+    # pid 10 exited and was reused by a new process within one scan; 11 still reports the old parent
+    # and 12 has already been reparented to init.
+    tree.update([process(1, 0, 0), process(10, 1, 50), process(11, 10, 6), process(12, 1, 7)])
+    assert not tree.has_children(10)
+    assert pids(tree.child_records(None)) == [1, 11]
+    assert pids(tree.child_records(1)) == [10, 12]
+    assert tree.totals[10] == [1.0, 1.0, 0]
+    assert tree.totals[1][2] == 2
+
+    # Once the stale child reports its new parent it moves under it, and a real child of the new process attaches.
+    tree.update([process(1, 0, 0), process(10, 1, 50), process(11, 1, 6), process(12, 1, 7), process(13, 10, 60)])
+    assert pids(tree.child_records(None)) == [1]
+    assert pids(tree.child_records(10)) == [13]
+    assert pids(tree.child_records(1)) == [10, 11, 12]
+
+
+def test_matching_keeps_ancestors_of_matches():
+    tree = ProcessTree()
+    tree.update([process(1, 0, 0, name='init'), process(10, 1, 5, name='bash'),
+                 process(11, 10, 6, name='python'), process(20, 1, 8, name='cron')])
+    visible = tree.matching(lambda proc: proc['name'] == 'python')
+    assert visible == {1, 10, 11}
+    assert pids(tree.child_records(1, visible)) == [10]
+    assert not tree.has_children(20, visible)
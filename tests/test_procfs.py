@@ -0,0 +1,112 @@
+import os
+
+import procfs
+from procfs import CLOCK_TICKS, PAGE_SIZE, ProcfsBackend, parse_io, parse_stat
+
+IO = (b"rchar: 100\nwchar: 200\nsyscr: 1\nsyscw: 2\nread_bytes: 4096\nwrite_bytes: 8192\n"
+      b"cancelled_write_bytes: 0\n")
+
+
+def stat_line(pid, comm, state='S', ppid=1, utime=0, stime=0, start=500, rss=256):
+    # Fields 3 onwards as in proc(5): state ppid pgrp session tty_nr tpgid flags minflt cminflt majflt cmajflt
+    # utime stime cutime cstime priority nice num_threads itrealvalue starttime vsize rss ...
+    fields = [state, ppid, pid, pid, 0, -1, 4194560, 10, 0, 0, 0, utime, stime, 0, 0, 20, 0, 1, 0, start,
+              1 << 20, rss] + [0] * 30
+    return f"{pid} ({comm}) {' '.join(str(field) for field in fields)}\n".encode()
+
+
+def write_process(root, pid, comm, cmdline=None, io=IO, **stat):
+    directory = root / str(pid)
+    directory.mkdir()
+    (directory / 'stat').write_bytes(stat_line(pid, comm, **stat))
+    if cmdline is not None:
+        (directory / 'cmdline').write_bytes(b'\0'.join(arg.encode() for arg in cmdline) + b'\0')
+    if io is not None:
+        (directory / 'io').write_bytes(io)
+    return directory
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def by_pid(records):
+    return {proc['pid']: proc for proc in records}
+
+
+def test_parse_stat_with_parentheses_and_spaces_in_comm():
+    comm, state, ppid, ticks, start, rss = parse_stat(stat_line(42, 'a) b', state='R', ppid=7, utime=30, stime=12,
+                                                                start=999, rss=64))
+    assert (comm, state, ppid, ticks, start, rss) == ('a) b', 'R', 7, 42, 999, 64)
+    assert parse_stat(stat_line(43, '(sd-pam)'))[0] == '(sd-pam)'
+    assert parse_io(IO) == 12288
+
+
+def test_scan_reads_stat_cmdline_and_io(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(procfs.time, 'monotonic', clock)
+    write_process(tmp_path, 10, 'a) b', cmdline=['/usr/bin/a) b', '--flag'], utime=100)
+    write_process(tmp_path, 11, 'kworker/0:1', io=None, state='I', ppid=2)
+    # An io file that cannot be read reports no I/O instead of failing the scan.
+    (write_process(tmp_path, 12, 'sshd', cmdline=['sshd'], io=None) / 'io').mkdir()
+    write_process(tmp_path, 13, 'broken', io=b'rchar: 1\n')
+    (tmp_path / 'self').mkdir()
+
+    backend = ProcfsBackend(str(tmp_path))
+    processes = by_pid(backend.scan())
+    assert set(processes) == {10, 11, 12, 13}
+    proc = processes[10]
+    assert proc['name'] == 'a) b'
+    assert proc['cmdline'] == '/usr/bin/a) b --flag'
+    assert proc['ppid'] == 1
+    assert proc['status'] == 'sleeping'
+    assert proc['memory_mb'] == 256 * PAGE_SIZE / 1024 / 1024
+    assert proc['create_time'] == backend.boot_time + 500 / CLOCK_TICKS
+    assert proc['io_bytes'] == 12288
+    assert proc['user'] == backend.user_name(os.getuid())
+    assert processes[11]['status'] == 'idle'
+    assert processes[11]['cmdline'] == ''
+    assert processes[11]['io_bytes'] is None
+    assert processes[12]['io_bytes'] is None
+    assert processes[13]['io_bytes'] is None
+
+    # One second of CPU over two seconds.
+    (tmp_path / '10' / 'stat').write_bytes(stat_line(10, 'a) b', utime=100 + CLOCK_TICKS))
+    clock.now += 2
+    assert by_pid(backend.scan())[10]['cpu_percent'] == 50.0
+
+
+def test_processes_exiting_mid_scan_are_skipped(tmp_path, monkeypatch):
+    write_process(tmp_path, 10, 'alive', cmdline=['alive'])
+    # Exited after the listing: no directory, or a stat file the kernel no longer fills.
+    write_process(tmp_path, 11, 'gone', cmdline=['gone'])
+    (tmp_path / '11' / 'stat').write_bytes(b'')
+    write_process(tmp_path, 12, 'cut', cmdline=['cut'])
+    (tmp_path / '12' / 'stat').write_bytes(b'12 (cut) S 1 12')
+    # Exited between reading stat and reading cmdline.
+    write_process(tmp_path, 13, 'late')
+
+    backend = ProcfsBackend(str(tmp_path))
+    monkeypatch.setattr(backend, 'list_pids', lambda: [10, 11, 12, 13, 14])
+    processes = by_pid(backend.scan())
+    assert set(processes) == {10, 13}
+    assert processes[13]['cmdline'] == ''
+    assert processes[13]['user'] == ''
+
+
+def test_reused_pid_starts_a_new_cpu_baseline(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(procfs.time, 'monotonic', clock)
+    write_process(tmp_path, 10, 'old', cmdline=['old'], utime=1000, start=500)
+    backend = ProcfsBackend(str(tmp_path))
+    backend.scan()
+    (tmp_path / '10' / 'stat').write_bytes(stat_line(10, 'new', utime=5, start=900))
+    (tmp_path / '10' / 'cmdline').write_bytes(b'new\0')
+    clock.now += 1
+    proc = backend.scan()[0]
+    assert (proc['name'], proc['cmdline'], proc['cpu_percent']) == ('new', 'new', 0.0)
+    assert list(backend.cpu_ticks) == [(10, 900)]
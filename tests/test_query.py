@@ -0,0 +1,89 @@
+import random
+import re
+
+import pytest
+
+from benchmark import SyntheticProcessBackend
+from query import ProcessIndex, QueryError, compile_query, literal_query, required_literal
+
+QUERIES = [
+    'chrome',
+    'name=bash',
+    'name!=bash',
+    'name~post and cpu>0.5',
+    'cpu>=1 or mem>0.5',
+    'not (user=root or user=build)',
+    'cmd~"--port 8050"',
+    'rss<10 and not status=running',
+    'name~/^(java|node)-\\d+$/',
+    'name!~/ex[e]$/ pid<1300',
+    'ppid!=1',
+    'ppid=1',
+    'user~ice cgroup~system',
+    'cgroup!=""',
+    '"spot"',
+]
+
+
+def table(count, seed):
+    processes = SyntheticProcessBackend(count, churn=0.2, seed=seed).scan()
+    rng = random.Random(seed)
+    for proc in processes:
+        # Not every backend fills every column.
+        if rng.random() < 0.1:
+            proc['ppid'] = None
+        if rng.random() < 0.5:
+            proc['cgroup'] = rng.choice(['/system.slice/sshd.service', '/user.slice', ''])
+    return processes
+
+
+def pids(records):
+    return sorted(proc['pid'] for proc in records)
+
+
+@pytest.mark.parametrize('text', QUERIES)
+def test_index_matches_the_predicate(text):
+    query = compile_query(text)
+    index = ProcessIndex()
+    index.wanted = query
+    backend = SyntheticProcessBackend(2000, churn=0.2, seed=11)
+    rng = random.Random(11)
+    for _ in range(4):
+        # Successive scans exercise started, exited and renamed processes in the incremental update.
+        processes = backend.scan()
+        for proc in processes:
+            if rng.random() < 0.1:
+                proc['ppid'] = None
+            proc['cgroup'] = rng.choice(['/system.slice/sshd.service', '/user.slice', '', None])
+        index.update(processes)
+        expected = [proc for proc in processes if query.predicate(proc)]
+        assert pids(index.filter(query, processes)) == pids(expected)
+
+
+def test_filter_declines_a_list_it_does_not_hold():
+    index = ProcessIndex()
+    processes = table(100, 1)
+    index.update(processes)
+    query = compile_query('bash')
+    assert index.filter(query, list(processes)) is None
+    assert index.filter(query, processes) is not None
+
+
+def test_parser_precedence_and_errors():
+    query = compile_query('name=a or name=b cpu>5')
+    assert query.node[0] == 'or'
+    assert query.node[2][0] == 'and'
+    assert query.fields == {'name', 'cpu_percent'}
+    assert compile_query('NOT Name~Py').node == ('not', ('text', 'name', '~', 'py'))
+
+    for text in ['', 'cpu>abc', 'cpu~5', 'bogus=1', '(name=a', 'name=/x/', 'name<', 'name~/(/']:
+        with pytest.raises(QueryError):
+            compile_query(text)
+    assert literal_query('(broken', ('name', 'cmdline')).predicate({'name': 'x', 'cmdline': 'run (broken'})
+
+
+def test_required_literal_only_keeps_mandatory_text():
+    assert required_literal(re.compile('^postgres: \\w+ writer')) == 'postgres: '
+    assert required_literal(re.compile('colou?r-picker')) == 'r-picker'
+    assert required_literal(re.compile('java|node')) == ''
+    assert required_literal(re.compile('(abcdef)?xy')) == 'xy'
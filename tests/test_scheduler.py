@@ -0,0 +1,80 @@
+from collector import SERIES, MetricsCollector
+from scheduler import BUDGETS, SLACK, SamplingScheduler, series_moved
+
+
+def test_series_moved_uses_points_for_percentages_and_fractions_for_rates():
+    previous = {'cpu_percent': 50.0, 'bytes_sent': 1000.0, '0': 10.0}
+    assert not series_moved({'cpu_percent': 51.5, 'bytes_sent': 1150.0, '0': 11.0}, previous)
+    assert series_moved({'cpu_percent': 52.0, 'bytes_sent': 1000.0, '0': 10.0}, previous)
+    assert series_moved({'cpu_percent': 50.0, 'bytes_sent': 1300.0, '0': 10.0}, previous)
+    assert series_moved({'cpu_percent': 50.0, 'bytes_sent': 1000.0, '0': 13.0}, previous)
+    # Tiny rates stay under the noise floor.
+    assert not series_moved({'bytes_sent': 7.0}, {'bytes_sent': 0.0})
+    assert series_moved({'cpu_percent': 50.0, 'sda': 0.0}, previous)
+
+
+def test_quiet_groups_back_off_and_movement_resets():
+    scheduler = SamplingScheduler({'metrics': 1.0})
+    intervals = []
+    for _ in range(6):
+        scheduler.observe('metrics', False)
+        intervals.append(scheduler.interval('metrics'))
+    assert intervals == [1.5, 2.25, 3.375, 4.0, 4.0, 4.0]
+    scheduler.observe('metrics', True)
+    assert scheduler.interval('metrics') == 1.0
+
+
+def test_hidden_groups_slow_down_and_speed_up_when_shown():
+    scheduler = SamplingScheduler({'processes': 3.0})
+    scheduler.schedule('processes', now=100.0)
+    assert not scheduler.due('processes', 101.0)
+    assert scheduler.set_watched('processes', False)
+    assert not scheduler.set_watched('processes', False)
+    assert scheduler.interval('processes') == BUDGETS['processes'][1]
+    scheduler.observe('processes', True)
+    assert scheduler.interval('processes') == BUDGETS['processes'][1]
+
+    scheduler.set_watched('processes', True)
+    assert scheduler.interval('processes') == 3.0
+    assert scheduler.due('processes', 101.0)
+
+
+def test_fastest_interval_wins_over_a_smaller_budget():
+    scheduler = SamplingScheduler({'metrics': 10.0}, budgets={'metrics': (4.0, 5.0), 'bogus': (1, 2)})
+    assert 'bogus' not in scheduler.groups
+    scheduler.observe('metrics', False)
+    assert scheduler.interval('metrics') == 10.0
+    scheduler.set_watched('metrics', False)
+    assert scheduler.interval('metrics') == 10.0
+    scheduler.set_fastest('metrics', 20.0)
+    assert scheduler.interval('metrics') == 5.0
+    scheduler.set_watched('metrics', True)
+    assert scheduler.interval('metrics') == 20.0
+
+
+def test_due_allows_timer_slack():
+    scheduler = SamplingScheduler({'devices': 2.0})
+    scheduler.schedule('devices', now=10.0)
+    assert scheduler.due('devices', 12.0 - SLACK)
+    assert not scheduler.due('devices', 12.0 - 2 * SLACK)
+    scheduler.schedule('metrics', now=10.0)
+    assert scheduler.next_due(('metrics', 'devices')) == 11.0
+
+
+def test_collector_ticks_at_the_earliest_due_group():
+    scheduler = SamplingScheduler({'metrics': 1.0, 'devices': 1.0})
+    collector = MetricsCollector({'selected_disk': '/'}, scheduler=scheduler)
+    sample = {name: 10.0 for name in SERIES}
+    sample.update(cores=[5.0, 5.0], disks={}, nics={})
+    assert collector.next_interval(sample, True, 0.0) == 1.0
+
+    # Nothing moves: both groups back off.
+    assert collector.next_interval(sample, True, 1.0) == 1.5
+    assert collector.next_interval(sample, True, 2.5) == 2.25
+
+    # CPU moves: metrics return to full speed while the quiet devices keep backing off,
+    # and ticks that skip the devices leave their interval alone.
+    sample = dict(sample, cpu_percent=90.0)
+    assert collector.next_interval(sample, True, 4.75) == 1.0
+    assert collector.next_interval(sample, False, 5.75) == 1.5
+    assert scheduler.intervals() == {'metrics': 1.5, 'devices': 3.375, 'processes': 1.0}
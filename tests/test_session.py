@@ -0,0 +1,102 @@
+import pytest
+
+import main
+from collector import SERIES
+from session import SessionCursor, SessionReader, SessionRecorder
+
+
+def sample(timestamp, details=False):
+    record = {name: float(timestamp % 50 + column) for column, name in enumerate(SERIES)}
+    record['time'] = float(timestamp)
+    if details:
+        record.update(cores=[10.0, 20.0], disks={'sda': [1.0, 2.0]}, nics={'eth0': [3.0, 4.0]})
+    return record
+
+
+def process(pid, cpu_percent=1.0, name='worker', io_rate=None):
+    return {'pid': pid, 'ppid': 1, 'name': name, 'status': 'running', 'cpu_percent': cpu_percent,
+            'memory_percent': 0.5, 'memory_mb': 32.0, 'io_rate': io_rate}
+
+
+def table(records):
+    return {proc['pid']: (proc['name'], proc['cpu_percent'], proc['io_rate']) for proc in records}
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'lzma'])
+def test_recording_round_trip(tmp_path, codec):
+    path = str(tmp_path / 'session.smr')
+    recorder = SessionRecorder(path, codec, keyframe_interval=30.0)
+    recorder.start()
+    scans = {10: [process(1), process(2, name='cron')],
+             50: [process(1, cpu_percent=75.0), process(3, io_rate=12.5)],
+             90: [process(3, io_rate=12.5)]}
+    for t in range(100):
+        recorder.add_samples([sample(t, details=t == 5)])
+        if t in scans:
+            recorder.add_processes(float(t), scans[t])
+    recorder.stop()
+    recorder.join(5)
+    assert recorder.error is None
+
+    reader = SessionReader(path)
+    assert (reader.start, reader.end) == (0.0, 99.0)
+    assert len(reader.blocks) == 4
+    samples = reader.samples(-1, 99)
+    assert [record['time'] for record in samples] == [float(t) for t in range(100)]
+    assert samples[42] == sample(42)
+    assert samples[5]['disks'] == {'sda': [1.0, 2.0]}
+
+    # Seeking into a later block rebuilds the table from that block's keyframe.
+    cursor = SessionCursor(reader, 65.0)
+    assert table(cursor.decoder.records()) == {1: ('worker', 75.0, None), 3: ('worker', 1.0, 12.5)}
+    replayed, records = cursor.advance(95.0)
+    assert [record['time'] for record in replayed] == [float(t) for t in range(66, 96)]
+    assert table(records) == {3: ('worker', 1.0, 12.5)}
+    assert cursor.advance(99.0)[1] is None
+    reader.close()
+
+
+def test_recording_cut_short_keeps_complete_blocks(tmp_path):
+    path = tmp_path / 'session.smr'
+    recorder = SessionRecorder(str(path), keyframe_interval=10.0)
+    recorder.start()
+    recorder.add_samples([sample(t) for t in range(35)])
+    recorder.stop()
+    recorder.join(5)
+    with open(path, 'r+b') as f:
+        f.truncate(path.stat().st_size - 3)
+
+    reader = SessionReader(str(path))
+    assert len(reader.blocks) == 3
+    assert reader.end == 29.0
+    reader.close()
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text("hello")
+    with pytest.raises(ValueError):
+        SessionReader(str(path))
+
+
+@pytest.mark.parametrize('argv', [['--headless', '--record', 'out.smr'], ['--agent', 'host:7878', '--record', 'x'],
+                                  ['--record', 'a.smr', '--replay', 'b.smr']])
+def test_record_needs_the_window(argv, capsys):
+    with pytest.raises(SystemExit):
+        main.parse_args(argv)
+    assert '--record' in capsys.readouterr().err
+
+
+def test_replay_does_not_evaluate_alerts():
+    import gui
+
+    class Engine:
+        def evaluate(self, store):
+            raise AssertionError("alerts evaluated during a replay")
+
+    monitor = gui.SystemMonitor.__new__(gui.SystemMonitor)
+    monitor.is_paused = False
+    monitor.replay = object()
+    monitor.alert_engine = Engine()
+    monitor.metric_store = None
+    monitor.check_alerts()
@@ -0,0 +1,43 @@
+import json
+
+import gui
+
+
+def make_monitor(overrides=None):
+    monitor = gui.SystemMonitor.__new__(gui.SystemMonitor)
+    monitor.settings = {'theme': 'light', 'history_enabled': True, 'alert_log': 'alerts.log', 'update_interval': 1}
+    monitor.load_settings(overrides)
+    return monitor
+
+
+def saved():
+    with open('settings.json') as f:
+        return json.load(f)
+
+
+def test_overrides_are_not_saved_and_only_changed_keys_are_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'settings.json').write_text(json.dumps({'theme': 'dark', 'alert_log': '/var/log/monitor.log'}))
+    monitor = make_monitor({'history_enabled': False, 'alert_log': ''})
+    assert monitor.settings['alert_log'] == ''
+    assert monitor.settings['history_enabled'] is False
+
+    monitor.settings['update_interval'] = 2
+    monitor.save_settings()
+    assert saved() == {'theme': 'dark', 'alert_log': '/var/log/monitor.log', 'update_interval': 2}
+
+    # Changing an overridden key in the settings dialog is kept, in this run and in later saves.
+    monitor.settings['history_enabled'] = True
+    monitor.save_settings()
+    monitor.settings['theme'] = 'light'
+    monitor.save_settings()
+    assert saved() == {'theme': 'light', 'alert_log': '/var/log/monitor.log', 'update_interval': 2,
+                       'history_enabled': True}
+    assert monitor.settings['alert_log'] == ''
+
+
+def test_without_a_settings_file_nothing_unchanged_is_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monitor = make_monitor()
+    monitor.save_settings()
+    assert saved() == {}
@@ -0,0 +1,135 @@
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import psutil
+import pytest
+
+import gui
+from terminate import GONE, KILLED, TERMINATED, ProcessTerminator
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="uses sleep, bash and POSIX signals")
+
+
+def run(terminator):
+    terminator.start()
+    terminator.join(30)
+    assert terminator.done
+
+
+def identity(pid):
+    return pid, psutil.Process(pid).create_time()
+
+
+def wait_for_children(pid, count, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        children = psutil.Process(pid).children(recursive=True)
+        if len(children) >= count:
+            return children
+        time.sleep(0.05)
+    raise AssertionError(f"{pid} started fewer than {count} children")
+
+
+def running(pid):
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+@pytest.fixture
+def spawned():
+    processes = []
+    yield processes
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def test_ends_sleepers_and_a_tree_escalating_to_kill(spawned):
+    sleepers = [subprocess.Popen(['sleep', '300']) for _ in range(200)]
+    spawned.extend(sleepers)
+    # The shell and, through the inherited disposition, its children ignore SIGTERM.
+    tree = subprocess.Popen(['bash', '-c', 'trap "" TERM; for i in 1 2 3 4 5; do sleep 300 & done; wait'])
+    spawned.append(tree)
+    descendants = [child.pid for child in wait_for_children(tree.pid, 5)]
+
+    targets = [identity(process.pid) for process in sleepers] + [identity(tree.pid)]
+    terminator = ProcessTerminator(targets, tree=True, timeout=1.0, kill_timeout=5.0)
+    run(terminator)
+
+    results = {result['pid']: result['result'] for result in terminator.results}
+    assert len(terminator.results) == len(results) == terminator.total == 206
+    assert all(results[process.pid] == TERMINATED for process in sleepers)
+    assert results[tree.pid] == KILLED
+    assert all(results[pid] == KILLED for pid in descendants)
+    for process in sleepers + [tree]:
+        assert process.wait(5) is not None
+    assert not any(running(pid) for pid in descendants)
+
+
+def test_reused_pid_is_not_signalled(spawned):
+    process = subprocess.Popen(['sleep', '300'])
+    spawned.append(process)
+    pid, create_time = identity(process.pid)
+    terminator = ProcessTerminator([(pid, create_time - 60)])
+    run(terminator)
+    assert terminator.results == [{'pid': pid, 'name': '', 'result': GONE}]
+    assert process.poll() is None
+
+
+class Widget:
+    def __init__(self):
+        self.options = {}
+        self.rows = []
+
+    def winfo_exists(self):
+        return True
+
+    def config(self, **options):
+        self.options.update(options)
+
+    def insert(self, parent, index, values):
+        self.rows.append(values)
+
+
+class Snapshot:
+    def __init__(self):
+        self.refreshes = 0
+
+    def request_refresh(self):
+        self.refreshes += 1
+
+
+class Root:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+
+def test_progress_window_reports_every_pid(spawned):
+    sleepers = [subprocess.Popen(['sleep', '300']) for _ in range(3)]
+    spawned.extend(sleepers)
+    terminator = ProcessTerminator([identity(process.pid) for process in sleepers] + [(2 ** 22 + 1, None)])
+    run(terminator)
+
+    monitor = gui.SystemMonitor.__new__(gui.SystemMonitor)
+    monitor.settings = {'language': 'english'}
+    monitor.localization = {'english': {'result_terminated': "ended", 'result_gone': "already exited",
+                                         'termination_done': "Done: {} ended, {} killed, {} failed"}}
+    monitor.root = Root()
+    monitor.process_snapshot = Snapshot()
+    window, progress, label, report = Widget(), Widget(), Widget(), Widget()
+    monitor.poll_termination(terminator, window, progress, label, report, 0)
+
+    rows = {values[0]: values[2] for values in report.rows}
+    assert rows == {**{process.pid: "ended" for process in sleepers}, 2 ** 22 + 1: "already exited"}
+    assert progress.options == {'maximum': 4, 'value': 4}
+    assert label.options['text'] == "Done: 4 ended, 0 killed, 0 failed"
+    assert monitor.process_snapshot.refreshes == 1
+    assert not monitor.root.callbacks
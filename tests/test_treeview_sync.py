@@ -0,0 +1,68 @@
+import random
+
+from gui import TreeviewSync
+
+
+class Tree:
+    def __init__(self):
+        self.children = []
+        self.rows = {}
+        self.moves = 0
+
+    def insert(self, parent, index, text='', values=(), tags=()):
+        item = f"I{len(self.rows) + 1:04d}"
+        self.rows[item] = values
+        self.children.append(item)
+        return item
+
+    def item(self, item, text='', values=(), tags=()):
+        self.rows[item] = values
+
+    def delete(self, item):
+        self.children.remove(item)
+
+    def get_children(self, parent):
+        return tuple(self.children)
+
+    def move(self, item, parent, index):
+        # Like ttk: the row is taken out, then put at index among the rest.
+        self.moves += 1
+        self.children.remove(item)
+        self.children.insert(index, item)
+
+    def shown(self):
+        return [self.rows[item][0] for item in self.children]
+
+
+def make_sync(tree):
+    return TreeviewSync(tree, lambda record: (record['pid'], record['cpu']),
+                        {'cpu': lambda record: record['cpu']}, 'cpu')
+
+
+def test_reorder_reaches_the_sorted_order_with_one_move_per_displaced_row():
+    tree = Tree()
+    sync = make_sync(tree)
+    records = [{'pid': pid, 'cpu': float(pid)} for pid in range(2000)]
+    sync.sync(records)
+    assert tree.shown() == list(range(1999, -1, -1))
+
+    # A full reversal keeps one row and moves all the others.
+    tree.moves = 0
+    sync.sort_by('cpu')
+    assert tree.shown() == list(range(2000))
+    assert tree.moves == 1999
+
+
+def test_reorder_after_random_changes():
+    rng = random.Random(5)
+    tree = Tree()
+    sync = make_sync(tree)
+    records = [{'pid': pid, 'cpu': rng.random()} for pid in range(300)]
+    for _ in range(20):
+        records = [dict(record, cpu=rng.random()) if rng.random() < 0.3 else record
+                   for record in records if rng.random() > 0.05]
+        records += [{'pid': rng.randrange(1000, 5000), 'cpu': rng.random()} for _ in range(10)]
+        records = list({record['pid']: record for record in records}.values())
+        sync.sync(records)
+        expected = sorted(records, key=lambda record: record['cpu'], reverse=True)
+        assert tree.shown() == [record['pid'] for record in expected]
@@ -0,0 +1,164 @@
+from gui import VirtualTable
+
+ROW_HEIGHT = 20
+
+
+class Tree:
+    def __init__(self, height):
+        self.height = height
+        self.items = {}
+        self.order = []
+        self.selected = ()
+        self.updates = 0
+        self.bindings = {}
+
+    def bind(self, sequence, callback, add=None):
+        self.bindings[sequence] = callback
+
+    def configure(self, **options):
+        pass
+
+    def insert(self, parent, index, **options):
+        item = f"I{len(self.items) + 1:03d}"
+        self.items[item] = {'values': (), 'tags': ()}
+        self.order.append(item)
+        return item
+
+    def item(self, item, **options):
+        self.updates += 1
+        self.items[item].update(options)
+
+    def delete(self, item):
+        del self.items[item]
+        self.order.remove(item)
+
+    def exists(self, item):
+        return item in self.items
+
+    def bbox(self, item):
+        return (0, self.order.index(item) * ROW_HEIGHT, 100, ROW_HEIGHT)
+
+    def winfo_height(self):
+        return self.height
+
+    def winfo_ismapped(self):
+        return True
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def selection_remove(self, items):
+        self.selected = ()
+
+    def focus(self):
+        return self.selected[0] if self.selected else ''
+
+    def shown(self):
+        return [self.items[item]['values'] for item in self.order]
+
+
+class Scrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        self.range = (first, last)
+
+
+class Event:
+    def __init__(self, state=0):
+        self.state = state
+
+
+def make_table(count, height=10 * ROW_HEIGHT):
+    tree = Tree(height)
+    scrollbar = Scrollbar()
+    table = VirtualTable(tree, scrollbar, lambda proc: (proc['pid'], proc['cpu_percent']),
+                         {'pid': lambda proc: proc['pid'], 'cpu': lambda proc: proc['cpu_percent']}, 'pid',
+                         reverse=False)
+    table.attach()
+    table.sync([{'pid': pid, 'cpu_percent': float(pid % 100)} for pid in range(count)])
+    return table, tree, scrollbar
+
+
+def test_holds_one_screenful_for_any_number_of_records():
+    table, tree, scrollbar = make_table(50000)
+    assert len(tree.order) == 10
+    assert tree.shown()[0] == (0, 0.0)
+    assert scrollbar.range == (0.0, 10 / 50000)
+
+    table.yview('moveto', '0.5')
+    assert [values[0] for values in tree.shown()] == list(range(25000, 25010))
+    table.yview('scroll', '1', 'pages')
+    assert tree.shown()[0][0] == 25009
+    table.yview('moveto', '1.0')
+    assert tree.shown()[-1][0] == 49999
+
+
+def test_unchanged_rows_are_not_rewritten():
+    table, tree, _ = make_table(100)
+    tree.updates = 0
+    table.sync(list(table.records))
+    assert tree.updates == 0
+    records = list(table.records)
+    records[3] = dict(records[3], cpu_percent=99.0)
+    table.sync(records)
+    assert tree.updates == 1
+
+
+def test_short_lists_blank_the_spare_rows_and_resize_adds_rows():
+    table, tree, scrollbar = make_table(3)
+    assert tree.shown()[3:] == [()] * 7
+    assert scrollbar.range == (0, 1)
+    tree.height = 15 * ROW_HEIGHT
+    table.on_configure(None)
+    assert len(tree.order) == 15
+
+
+def test_selection_follows_records_while_scrolling():
+    table, tree, _ = make_table(1000)
+    tree.selection_set([tree.order[2]])
+    table.on_press(Event())
+    table.on_select(None)
+    assert table.selected == 2
+
+    table.yview('scroll', '5', 'units')
+    assert tree.selection() == ()
+    table.on_select(None)
+    assert table.selected_keys == {2}
+    table.yview('scroll', '-5', 'units')
+    assert tree.selection() == (tree.order[2],)
+
+    # Control-click adds a visible row without dropping the one scrolled away.
+    table.yview('moveto', '0.5')
+    tree.selection_set([tree.order[0]])
+    table.on_press(Event(state=0x4))
+    table.on_select(None)
+    assert [record['pid'] for record in table.selected_records()] == [2, 500]
+
+
+def test_keys_move_the_selection_and_scroll_to_it():
+    table, tree, _ = make_table(1000)
+    table.selected = 0
+    assert table.on_key('end') == 'break'
+    assert table.selected == 999
+    assert table.offset == 990
+    table.on_key('page_up')
+    assert table.selected == 990
+    table.on_key(-1)
+    assert table.selected == 989
+    assert table.offset == 989
+    assert tree.selection() == (tree.order[0],)
+
+
+def test_sort_by_toggles_and_keeps_the_window():
+    table, tree, _ = make_table(300)
+    table.sort_by('cpu')
+    assert table.reverse
+    assert tree.shown()[0][1] == 99.0
+    table.sort_by('cpu')
+    assert tree.shown()[0][1] == 0.0
+    assert table.records[table.position(299)]['pid'] == 299